@@ -0,0 +1,65 @@
+"""
+Generación de datos sintéticos para los benchmarks de FlockLedger
+Produce registros con la misma forma que datos_ejemplo.csv
+"""
+
+import csv
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import COLUMNAS, Explotacion, Oveja, Alta, Baja
+
+RAZAS = ['Merino', 'Manchega', 'Churra', 'Lacaune', 'Assaf', 'Cruzada']
+PROCEDENCIAS = ['ES100083', 'ES100091', 'ES060154', 'ES450021', '']
+DESTINOS = ['Matadero', 'ES100083', 'ES450021', 'Cebadero']
+
+
+def _fecha(rng, desde=2012, hasta=2024):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(desde, hasta)}"
+
+
+def generar_filas(n: int, semilla: int = 0):
+    """Generar n filas del registro como listas de texto en el orden de COLUMNAS"""
+    rng = random.Random(semilla)
+    for i in range(1, n + 1):
+        ano = rng.randint(2010, 2024)
+        fila = [
+            str(i),
+            f"ES{10008000000 + i:011d}",
+            str(ano),
+            _fecha(rng, ano, ano),
+            rng.choice(RAZAS),
+            rng.choice(['M', 'H', 'H', 'H', '-']),
+        ]
+        if rng.random() < 0.6:
+            fila += [rng.choice(['A', 'N', 'C']), _fecha(rng), rng.choice(PROCEDENCIAS), f"G{rng.randint(100000, 999999)}"]
+        else:
+            fila += ['', '', '', '']
+        if rng.random() < 0.25:
+            fila += [rng.choice(['M', 'V', 'S']), _fecha(rng), rng.choice(DESTINOS), f"G{rng.randint(100000, 999999)}"]
+        else:
+            fila += ['', '', '', '']
+        yield fila
+
+
+def generar_csv(ruta: str, n: int, semilla: int = 0):
+    """Escribir un CSV sintético de n filas con cabecera como datos_ejemplo.csv"""
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f, lineterminator='\n')
+        escritor.writerow(COLUMNAS + ['Comunicación'])
+        for fila in generar_filas(n, semilla):
+            escritor.writerow(fila + ['E o A'])
+    return ruta
+
+
+def generar_explotacion(n: int, codigo: str = 'ES000000000001', semilla: int = 0) -> Explotacion:
+    """Generar una explotación en memoria con n ovejas"""
+    ovejas = []
+    for fila in generar_filas(n, semilla):
+        alta = Alta(*fila[6:10]) if fila[6] else None
+        baja = Baja(*fila[10:14]) if fila[10] else None
+        ovejas.append(Oveja(int(fila[0]), fila[1], int(fila[2]), fila[3], fila[4], fila[5], alta, baja))
+    return Explotacion(codigo=codigo, nombre=codigo, ovejas=ovejas)
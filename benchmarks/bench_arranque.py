@@ -0,0 +1,53 @@
+"""
+Benchmark: tiempo de importación hasta poder mostrar la ventana de bienvenida
+
+Compara la importación de app (pandas y reportlab diferidos) con la carga
+anterior, que importaba pandas y pdf_export al arrancar. Usa -X importtime
+en un intérprete nuevo para cada medida.
+
+Uso: python benchmarks/bench_arranque.py [repeticiones]
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+ESCENARIOS = [
+    ('antes (pandas + pdf_export + app)', 'import pandas, pdf_export, app'),
+    ('ahora (app)', 'import app'),
+]
+
+
+def medir(codigo: str) -> float:
+    """Suma en segundos de los tiempos propios de todos los módulos importados"""
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    propios = re.findall(r'^import time:\s+(\d+) \|', proceso.stderr, re.MULTILINE)
+    return sum(int(us) for us in propios) / 1e6
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    
+    resultados = {}
+    for nombre, codigo in ESCENARIOS:
+        resultados[nombre] = min(medir(codigo) for _ in range(repeticiones))
+    
+    base = resultados[ESCENARIOS[0][0]]
+    for nombre, segundos in resultados.items():
+        print(f"{nombre:36s} {segundos:7.3f} s  ({base / segundos:.1f}x)")
+    
+    cargados = subprocess.run(
+        [sys.executable, '-c', "import sys, app; print(' '.join(m for m in ('pandas', 'numpy', 'reportlab') if m in sys.modules))"],
+        cwd=SRC, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    print(f"módulos pesados cargados por app: {cargados or 'ninguno'}")
+
+
+if __name__ == "__main__":
+    main()
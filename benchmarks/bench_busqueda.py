@@ -0,0 +1,48 @@
+"""
+Benchmark: búsqueda con IndiceBusqueda frente a str.contains sobre el DataFrame
+
+Uso: python benchmarks/bench_busqueda.py [filas]
+"""
+
+import sys
+import time
+
+from _datos import generar_explotacion
+from indice_busqueda import IndiceBusqueda
+
+CONSULTAS = ['ES1000801234', 'merino', 'G4521', '12/06/2019', 'matadero', 'h', '1234']
+
+
+def buscar_dataframe(explotacion, termino):
+    """Implementación anterior de FlockLedgerApp.search_data"""
+    df = explotacion.to_dataframe()
+    mask = df.astype(str).apply(
+        lambda x: x.str.contains(termino, case=False, na=False)
+    ).any(axis=1)
+    return df[mask]
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    explotacion = generar_explotacion(filas)
+    
+    inicio = time.perf_counter()
+    indice = IndiceBusqueda(explotacion)
+    print(f"Filas: {filas}  construcción del índice: {time.perf_counter() - inicio:.3f} s")
+    print(f"{'consulta':<14} {'resultados':>10} {'DataFrame':>12} {'índice':>12}")
+    
+    for consulta in CONSULTAS:
+        inicio = time.perf_counter()
+        anterior = buscar_dataframe(explotacion, consulta)
+        t_anterior = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        resultados = indice.buscar(consulta)
+        t_indice = time.perf_counter() - inicio
+        
+        print(f"{consulta:<14} {len(resultados):>10} {t_anterior * 1000:>10.1f}ms {t_indice * 1000:>10.2f}ms"
+              + ("" if len(anterior) == len(resultados) else f"  (DataFrame: {len(anterior)})"))
+
+
+if __name__ == "__main__":
+    main()
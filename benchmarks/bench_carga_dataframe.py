@@ -0,0 +1,48 @@
+"""
+Benchmark: Explotacion.from_dataframe por columnas frente a iterrows
+
+Uso: python benchmarks/bench_carga_dataframe.py [filas]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from _datos import generar_csv
+from models import Explotacion, Oveja
+
+
+def from_dataframe_iterrows(df, codigo):
+    """Implementación anterior, fila a fila"""
+    explotacion = Explotacion(codigo=codigo, nombre=codigo)
+    for _, row in df.iterrows():
+        explotacion.agregar_oveja(Oveja.from_dict(row.to_dict()))
+    return explotacion
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = generar_csv(os.path.join(tmp, 'registro.csv'), filas)
+        df = pd.read_csv(ruta, dtype=str, na_filter=False)
+    
+    inicio = time.perf_counter()
+    anterior = from_dataframe_iterrows(df, 'BENCH')
+    t_anterior = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    nueva = Explotacion.from_dataframe(df, codigo='BENCH', nombre='BENCH')
+    t_nueva = time.perf_counter() - inicio
+    
+    assert anterior.ovejas == nueva.ovejas, "Los resultados no coinciden"
+    print(f"Filas: {filas}")
+    print(f"iterrows:      {t_anterior:8.3f} s")
+    print(f"por columnas:  {t_nueva:8.3f} s")
+    print(f"Aceleración:   {t_anterior / t_nueva:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
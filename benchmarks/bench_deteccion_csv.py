@@ -0,0 +1,92 @@
+"""
+Benchmark: detección de codificación, separador y columnas de un CSV
+
+Escribe el mismo registro con distintas codificaciones, separadores y
+nombres de columna, y mide detectar_formato (sin caché y con la cabecera
+ya vista) frente a la carga completa con Explotacion.from_csv. Comprueba
+que todas las variantes dan las mismas ovejas y que una fila con campos
+de más se anota en FilasDesalineadas.
+
+Uso: python benchmarks/bench_deteccion_csv.py [filas]
+"""
+
+import csv
+import os
+import sys
+import tempfile
+import time
+
+from _datos import generar_filas
+from models import COLUMNAS, Explotacion
+from deteccion_csv import FilasDesalineadas, detectar_formato, mapear_cabecera
+
+# Cabecera con otros nombres, como la de algunos registros oficiales
+ALIAS = [
+    'N° de Orden', 'Crotal', 'Año de nacimiento', 'Fecha de identificación', 'RAZA', 'SEXO',
+    'Causa de alta', 'Fecha de alta', 'Origen', 'Guía entrada',
+    'Causa de baja', 'Fecha de baja', 'Destino', 'Guía salida',
+]
+
+VARIANTES = [
+    ('utf-8', ',', COLUMNAS),
+    ('utf-8-sig', ';', COLUMNAS),
+    ('cp1252', ';', ALIAS),
+    ('utf-16', '\t', ALIAS),
+]
+
+REPETICIONES = 1000
+
+
+def escribir(ruta, filas, codificacion, separador, cabecera):
+    with open(ruta, 'w', newline='', encoding=codificacion) as f:
+        escritor = csv.writer(f, delimiter=separador, lineterminator='\r\n')
+        escritor.writerow(cabecera)
+        escritor.writerows(filas)
+
+
+def cronometrar(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    datos = list(generar_filas(filas))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'registro.csv')
+        referencia = None
+        print(f"Filas: {filas}")
+        for codificacion, separador, cabecera in VARIANTES:
+            escribir(ruta, datos, codificacion, separador, cabecera)
+            
+            def en_frio():
+                mapear_cabecera.cache_clear()
+                detectar_formato(ruta)
+            
+            t_frio = cronometrar(en_frio, REPETICIONES)
+            t_cache = cronometrar(lambda: detectar_formato(ruta), REPETICIONES)
+            formato = detectar_formato(ruta)
+            inicio = time.perf_counter()
+            ovejas = Explotacion.from_csv(ruta, codigo='bench').ovejas
+            t_carga = time.perf_counter() - inicio
+            
+            if referencia is None:
+                referencia = ovejas
+            assert ovejas == referencia, f"{codificacion} {separador!r}: las ovejas no coinciden"
+            print(f"{codificacion:>9} {separador!r:>4}  detectado {formato.codificacion}/{formato.separador!r}  "
+                  f"detección {t_frio * 1e6:6.1f} µs (caché {t_cache * 1e6:5.1f} µs)  carga {t_carga:6.3f} s")
+        
+        # Una fila con un campo de más, como las de datos_ejemplo.csv
+        datos[filas // 2] = datos[filas // 2] + ['sobrante']
+        escribir(ruta, datos, 'utf-8', ',', COLUMNAS)
+        desalineadas = FilasDesalineadas()
+        Explotacion.from_csv(ruta, codigo='bench', desalineadas=desalineadas)
+        assert desalineadas.total == 1, desalineadas.resumen()
+        print(desalineadas.resumen())
+
+
+if __name__ == "__main__":
+    main()
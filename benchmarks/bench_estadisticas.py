@@ -0,0 +1,68 @@
+"""
+Benchmark: resumen de explotación con contadores frente a un recorrido por métrica
+
+Mide el camino anterior (una lista de ovejas por métrica y por grupo), el
+primer cálculo de los contadores y un resumen repetido tras un cambio,
+cuando los contadores ya están en vivo en la explotación.
+
+Uso: python benchmarks/bench_estadisticas.py [filas]
+"""
+
+import sys
+import time
+
+from _datos import generar_explotacion
+from models import Oveja
+from utils import EstadisticasExplotacion as E, FormateadorDatos
+
+
+def _agrupar(ovejas, clave):
+    grupos = {}
+    for oveja in ovejas:
+        valor = clave(oveja)
+        if valor:
+            grupos.setdefault(valor, []).append(oveja)
+    return grupos
+
+
+def resumen_por_metrica(explotacion):
+    """Métricas del resumen como se calculaban antes: un recorrido (y una lista) por métrica"""
+    ovejas = explotacion.ovejas
+    return (
+        explotacion.total_ovejas(),
+        len(explotacion.obtener_ovejas_activas()),
+        len(explotacion.obtener_ovejas_con_baja()),
+        {k: len(v) for k, v in _agrupar(ovejas, lambda o: o.raza).items()},
+        {k: len(v) for k, v in _agrupar(ovejas, lambda o: o.sexo).items()},
+        {k: len(v) for k, v in _agrupar(ovejas, lambda o: o.alta and o.alta.causa).items()},
+        {k: len(v) for k, v in _agrupar(ovejas, lambda o: o.baja and o.baja.causa).items()},
+    )
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    explotacion = generar_explotacion(filas)
+    
+    anterior, t_anterior = cronometrar(lambda: resumen_por_metrica(explotacion))
+    c, t_primero = cronometrar(lambda: E.contadores(explotacion))
+    assert anterior == (c.total, c.activas, c.bajas, c.por_raza, c.por_sexo, c.causas_alta, c.causas_baja)
+    
+    explotacion.agregar_oveja(Oveja(filas + 1, 'ES999999999999', 2024, '01/01/2024', 'Merino', 'H'))
+    _, t_repetido = cronometrar(lambda: FormateadorDatos.generar_resumen_explotacion(explotacion))
+    _, t_anterior_repetido = cronometrar(lambda: resumen_por_metrica(explotacion))
+    
+    print(f"Filas: {filas}")
+    print(f"una pasada por métrica:       {t_anterior:8.3f} s")
+    print(f"contadores (primer cálculo):  {t_primero:8.3f} s  ({t_anterior / t_primero:.1f}x)")
+    print(f"tras un cambio, por métrica:  {t_anterior_repetido:8.3f} s")
+    print(f"tras un cambio, resumen:      {t_repetido * 1000:8.3f} ms ({t_anterior_repetido / t_repetido:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: guardar el registro en CSV
+
+Compara escribir_csv (csv.writer por bloques, archivo temporal y
+os.replace) con el camino anterior: to_dataframe() y DataFrame.to_csv
+directamente sobre el archivo del usuario. Mide tiempo y pico de memoria
+y comprueba que ambos archivos son idénticos byte a byte.
+
+Uso: python benchmarks/bench_guardado_csv.py [filas]
+"""
+
+import filecmp
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _datos import generar_explotacion
+from models import escribir_csv
+
+
+def guardar_con_dataframe(explotacion, ruta):
+    """Camino anterior: un diccionario por oveja, un DataFrame y to_csv sobre el destino"""
+    explotacion.to_dataframe().to_csv(ruta, index=False)
+
+
+def medir(guardar):
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    guardar()
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracion, pico
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    explotacion = generar_explotacion(filas)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        anterior = os.path.join(tmp, 'anterior.csv')
+        nuevo = os.path.join(tmp, 'nuevo.csv')
+        # Una pasada corta con cada camino antes de medir: la importación
+        # de pandas no cuenta en la medida
+        calentamiento = generar_explotacion(100)
+        guardar_con_dataframe(calentamiento, anterior)
+        escribir_csv(calentamiento.ovejas, nuevo)
+        t_anterior, m_anterior = medir(lambda: guardar_con_dataframe(explotacion, anterior))
+        t_nuevo, m_nuevo = medir(lambda: escribir_csv(explotacion.ovejas, nuevo))
+        assert filecmp.cmp(anterior, nuevo, shallow=False), "los archivos no coinciden"
+    
+    print(f"Filas: {filas}")
+    print(f"to_dataframe + to_csv: {t_anterior:7.3f} s  pico {m_anterior / 2**20:7.1f} MB")
+    print(f"escribir_csv:          {t_nuevo:7.3f} s  pico {m_nuevo / 2**20:7.1f} MB  "
+          f"({t_anterior / t_nuevo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: guardar tras agregar unas pocas ovejas
+
+Compara reescribir el registro entero con añadir solo las filas nuevas
+(Explotacion.to_csv con seguir_cambios) y comprueba que el archivo
+resultante es el mismo. Añadir solo comprueba la firma del archivo: las
+filas ya guardadas no se vuelven a recorrer (ver guardar_csv).
+
+Uso: python benchmarks/bench_guardado_incremental.py [filas] [nuevas]
+"""
+
+import filecmp
+import os
+import sys
+import tempfile
+import time
+
+from _datos import generar_explotacion
+from models import Oveja, escribir_csv
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    nuevas = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    explotacion = generar_explotacion(filas)
+    explotacion.seguir_cambios()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'registro.csv')
+        completo = os.path.join(tmp, 'completo.csv')
+        explotacion.to_csv(ruta)
+        
+        for i in range(nuevas):
+            explotacion.agregar_oveja(Oveja(filas + i + 1, f"ES{filas + i:012d}", 2024, '01/03/2024', 'Merina', 'H'))
+        
+        inicio = time.perf_counter()
+        escribir_csv(explotacion.ovejas, completo)
+        t_completo = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        explotacion.to_csv(ruta)
+        t_incremental = time.perf_counter() - inicio
+        
+        assert filecmp.cmp(ruta, completo, shallow=False), "los archivos no coinciden"
+    
+    print(f"Filas: {filas} (+{nuevas})")
+    print(f"reescribir todo:  {t_completo * 1000:9.2f} ms")
+    print(f"añadir al final:  {t_incremental * 1000:9.2f} ms  ({t_completo / t_incremental:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
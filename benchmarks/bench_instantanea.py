@@ -0,0 +1,59 @@
+"""
+Benchmark: abrir un registro desde su instantánea binaria frente al CSV
+
+Abrir desde la instantánea no construye ovejas (ver ExplotacionDiferida):
+se mide aparte lo que cuesta construirlas en el primer cambio. También
+compara el tamaño de la instantánea con el del CSV.
+
+Uso: python benchmarks/bench_instantanea.py [filas]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+
+from _datos import generar_csv
+from instantanea import cargar_explotacion, escribir_instantanea, ruta_instantanea
+from models import Explotacion, escribir_csv
+
+
+def cronometrar(funcion):
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = generar_csv(os.path.join(tmp, 'registro.csv'), filas)
+        
+        desde_csv, t_csv = cronometrar(lambda: Explotacion.from_csv(ruta, codigo='BENCH'))
+        escribir_csv(desde_csv.ovejas, ruta)
+        _, t_escribir = cronometrar(lambda: escribir_instantanea(desde_csv.ovejas, ruta))
+        ovejas = desde_csv.ovejas
+        del desde_csv
+        
+        desde_instantanea, t_instantanea = cronometrar(lambda: cargar_explotacion(ruta, codigo='BENCH'))
+        _, t_materializar = cronometrar(desde_instantanea.materializar)
+        assert desde_instantanea.ovejas == ovejas
+        del desde_instantanea
+        
+        tamano_csv = os.path.getsize(ruta)
+        tamano_instantanea = os.path.getsize(ruta_instantanea(ruta))
+    
+    print(f"Filas: {filas}")
+    print(f"abrir desde CSV:          {t_csv:7.3f} s  ({tamano_csv / 2**20:6.1f} MB)")
+    print(f"escribir instantánea:     {t_escribir:7.3f} s  ({tamano_instantanea / 2**20:6.1f} MB)")
+    print(f"abrir desde instantánea:  {t_instantanea:7.3f} s  ({t_csv / t_instantanea:.0f}x)")
+    print(f"construir las ovejas:     {t_materializar:7.3f} s  (primer cambio; abrir + construir "
+          f"{t_csv / (t_instantanea + t_materializar):.1f}x)")
+    print(f"tamaño instantánea / CSV: {tamano_instantanea / tamano_csv:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: latencia del bucle de eventos mientras se carga un CSV en segundo plano
+
+Simula el bucle de Tk (sin pantalla) con un temporizador cada 10 ms y mide
+cuánto se retrasa cada tick mientras EjecutorTareas carga el archivo con
+Explotacion.from_csv en el hilo de fondo. Para comparar, mide también la
+carga en el propio bucle, como se hacía antes.
+
+El objetivo (< 50 ms) es para el retraso mediano. Los retrasos más largos
+coinciden con las recolecciones completas del recolector de ciclos
+(generación 2): recorren todos los objetos vivos, incluidas las ovejas ya
+cargadas, sin soltar el GIL, y no dependen del tamaño de bloque. Se miden
+aparte con gc.callbacks.
+
+Uso: python benchmarks/bench_latencia_carga.py [filas]
+"""
+
+import gc
+import heapq
+import os
+import sys
+import tempfile
+import time
+
+from _datos import generar_csv
+from models import Explotacion
+from tareas import EjecutorTareas, Tarea
+
+TICK_S = 0.010
+
+
+class BucleSimulado:
+    """Lo justo de la interfaz de tk.Tk que usa EjecutorTareas: after y after_cancel"""
+    
+    def __init__(self):
+        self._pendientes = []
+        self._contador = 0
+        self._cancelados = set()
+    
+    def after(self, ms, funcion):
+        self._contador += 1
+        heapq.heappush(self._pendientes, (time.perf_counter() + ms / 1000, self._contador, funcion))
+        return self._contador
+    
+    def after_cancel(self, identificador):
+        self._cancelados.add(identificador)
+    
+    def ejecutar(self, hasta):
+        """Atender temporizadores hasta que hasta() sea cierto; devuelve los retrasos de cada tick"""
+        retrasos = []
+        
+        def programar():
+            previsto = time.perf_counter() + TICK_S
+            self.after(TICK_S * 1000, lambda: tick(previsto))
+        
+        def tick(previsto):
+            retrasos.append(time.perf_counter() - previsto)
+            programar()
+        
+        programar()
+        while not hasta():
+            momento, identificador, funcion = heapq.heappop(self._pendientes)
+            espera = momento - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            if identificador not in self._cancelados:
+                funcion()
+        return retrasos
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = generar_csv(os.path.join(carpeta, 'ES000000000001.csv'), filas)
+        
+        inicio = time.perf_counter()
+        Explotacion.from_csv(ruta, codigo='ES000000000001')
+        t_bloqueo = time.perf_counter() - inicio
+        
+        pausas = []
+        
+        def medir_recoleccion(fase, info):
+            if info['generation'] != 2:
+                return
+            if fase == 'start':
+                pausas.append(time.perf_counter())
+            else:
+                pausas[-1] = time.perf_counter() - pausas[-1]
+        
+        bucle = BucleSimulado()
+        ejecutor = EjecutorTareas(bucle)
+        resultado = []
+        gc.callbacks.append(medir_recoleccion)
+        inicio = time.perf_counter()
+        ejecutor.ejecutar(
+            Tarea("Cargando archivo"),
+            lambda tarea: Explotacion.from_csv(ruta, codigo='ES000000000001', progreso=tarea.progreso),
+            resultado.append,
+            lambda error: resultado.append(error)
+        )
+        retrasos = bucle.ejecutar(lambda: resultado)
+        t_fondo = time.perf_counter() - inicio
+        gc.callbacks.remove(medir_recoleccion)
+        ejecutor.cerrar()
+        
+        assert isinstance(resultado[0], Explotacion) and resultado[0].total_ovejas() == filas
+    
+    retrasos.sort()
+    print(f"Filas: {filas}")
+    print(f"carga en el hilo de la interfaz: bucle bloqueado {t_bloqueo * 1000:.0f} ms")
+    print(f"carga en segundo plano:          {t_fondo:.2f} s, {len(retrasos)} ticks")
+    print(f"  retraso mediano {retrasos[len(retrasos) // 2] * 1000:.1f} ms, "
+          f"p99 {retrasos[int(len(retrasos) * 0.99)] * 1000:.1f} ms, máximo {retrasos[-1] * 1000:.1f} ms")
+    print(f"  recolecciones completas durante la carga: {len(pausas)}, "
+          f"la más larga {max(pausas, default=0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
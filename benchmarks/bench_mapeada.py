@@ -0,0 +1,80 @@
+"""
+Benchmark: explotación mapeada en memoria frente a Explotacion cargada
+
+Mide crear la instantánea desde el CSV (por bloques), abrirla, buscar
+por número de orden e identificación, los contadores y recorrer las
+activas, y la memoria de Python que ocupa cada variante.
+
+Uso: python benchmarks/bench_mapeada.py [filas]
+"""
+
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _datos import generar_csv
+from explotacion_mapeada import ExplotacionMapeada
+from instantanea import crear_instantanea
+from models import Explotacion
+from utils import EstadisticasExplotacion
+
+
+def medir(funcion):
+    """Tiempo y memoria de Python que queda ocupada (resultado, segundos, bytes)"""
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    gc.collect()
+    ocupada, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracion, ocupada
+
+
+def cronometrar(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return resultado, (time.perf_counter() - inicio) / repeticiones
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = generar_csv(os.path.join(tmp, 'regional.csv'), filas)
+        
+        _, t_crear = cronometrar(lambda: crear_instantanea(ruta))
+        mapeada, t_abrir, m_mapeada = medir(lambda: ExplotacionMapeada.abrir(ruta, 'REGIONAL'))
+        cargada, t_cargar, m_cargada = medir(lambda: Explotacion.from_csv(ruta, 'REGIONAL'))
+        
+        muestra = random.Random(0).sample(cargada.ovejas, 1000)
+        _, t_orden = cronometrar(lambda: [mapeada.obtener_oveja(o.numero_orden) for o in muestra])
+        _, t_ident = cronometrar(lambda: [mapeada.obtener_oveja_por_identificacion(o.identificacion)
+                                          for o in muestra[:50]])
+        assert all(mapeada.obtener_oveja(o.numero_orden) == cargada.obtener_oveja(o.numero_orden)
+                   for o in muestra)
+        
+        contadores, t_contadores = cronometrar(lambda: EstadisticasExplotacion.contadores(mapeada))
+        assert not contadores.diferencias(EstadisticasExplotacion.contadores(cargada))
+        activas, t_activas = cronometrar(lambda: sum(1 for _ in mapeada.obtener_ovejas_activas()))
+        assert activas == len(cargada.obtener_ovejas_activas())
+        del mapeada
+    
+    print(f"Filas: {filas}")
+    print(f"crear instantánea (por bloques):  {t_crear:8.3f} s")
+    print(f"abrir mapeada:                    {t_abrir * 1000:8.2f} ms  memoria {m_mapeada / 2**20:7.2f} MB")
+    print(f"cargar Explotacion desde CSV:     {t_cargar:8.3f} s   memoria {m_cargada / 2**20:7.2f} MB")
+    print(f"obtener_oveja:                    {t_orden / len(muestra) * 1e6:8.1f} µs")
+    print(f"obtener_oveja_por_identificacion: {t_ident / 50 * 1000:8.2f} ms")
+    print(f"contadores (numpy):               {t_contadores * 1000:8.2f} ms")
+    print(f"recorrer activas ({activas}):   {t_activas:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
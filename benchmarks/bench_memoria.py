@@ -0,0 +1,96 @@
+"""
+Benchmark: memoria por oveja de una explotación cargada desde CSV
+
+Compara las dataclasses con __slots__ y textos internados frente a
+dataclasses con __dict__ por instancia y un str independiente por celda.
+
+Uso: python benchmarks/bench_memoria.py [filas]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from _datos import generar_csv
+from models import Explotacion
+
+
+@dataclass
+class AltaDict:
+    causa: str
+    fecha: str
+    procedencia: str
+    guia: str
+
+
+@dataclass
+class BajaDict:
+    causa: str
+    fecha: str
+    destino: str
+    guia: str
+
+
+@dataclass
+class OvejaDict:
+    numero_orden: int
+    identificacion: str
+    ano_nacimiento: int
+    fecha_identificacion: str
+    raza: str
+    sexo: str
+    alta: Optional[AltaDict] = None
+    baja: Optional[BajaDict] = None
+
+
+def _copia(texto):
+    """Forzar un str independiente, como al parsear fila a fila"""
+    return (texto + '.')[:-1]
+
+
+def a_dataclasses_con_dict(ovejas):
+    return [
+        OvejaDict(
+            o.numero_orden, _copia(o.identificacion), o.ano_nacimiento,
+            _copia(o.fecha_identificacion), _copia(o.raza), _copia(o.sexo),
+            AltaDict(*map(_copia, (o.alta.causa, o.alta.fecha, o.alta.procedencia, o.alta.guia))) if o.alta else None,
+            BajaDict(*map(_copia, (o.baja.causa, o.baja.fecha, o.baja.destino, o.baja.guia))) if o.baja else None,
+        )
+        for o in ovejas
+    ]
+
+
+def medir(construir):
+    gc.collect()
+    tracemalloc.start()
+    resultado = construir()
+    gc.collect()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, actual
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = generar_csv(os.path.join(tmp, 'registro.csv'), filas)
+        df = pd.read_csv(ruta, dtype=str, na_filter=False)
+    
+    explotacion, compacta = medir(lambda: Explotacion.from_dataframe(df, codigo='BENCH'))
+    del df
+    _, con_dict = medir(lambda: a_dataclasses_con_dict(explotacion.ovejas))
+    
+    print(f"Filas: {filas}")
+    print(f"__dict__ sin internar:       {con_dict / filas:8.1f} bytes/oveja")
+    print(f"__slots__ + internado:       {compacta / filas:8.1f} bytes/oveja (incluye índices)")
+    print(f"Reducción:                   {100 * (1 - compacta / con_dict):8.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: exportación a PDF con una sola tabla (como antes), por páginas
+(generar_pdf) y dibujando en el canvas (generar_pdf_simple, modo 'rapido')
+
+Cada medida se ejecuta en un proceso nuevo para poder informar del pico
+de memoria (ru_maxrss).
+
+Uso: python benchmarks/bench_pdf.py [filas ...]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from _datos import generar_explotacion
+
+
+def una_tabla(exportador, ruta):
+    """Como se generaba antes: un único Table con todas las filas, que reportlab parte en páginas"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate, Table
+    
+    completa = exportador._construir_tabla_datos()
+    tabla = Table(completa._cellvalues, colWidths=completa._colWidths)
+    tabla.setStyle(exportador._estilo_tabla())
+    doc = SimpleDocTemplate(ruta, pagesize=landscape(A4), rightMargin=10*mm, leftMargin=10*mm,
+                            topMargin=15*mm, bottomMargin=10*mm)
+    doc.build([tabla])
+
+
+def medir(modo, filas):
+    from pdf_export import ExportadorPDF
+    explotacion = generar_explotacion(filas)
+    exportador = ExportadorPDF(explotacion)
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'salida.pdf')
+        inicio = time.perf_counter()
+        if modo == 'una_tabla':
+            una_tabla(exportador, ruta)
+        else:
+            generar = exportador.generar_pdf_simple if modo == 'rapido' else exportador.generar_pdf
+            exitoso, mensaje = generar(ruta)
+            assert exitoso, mensaje
+        segundos = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    print(f"{segundos:.3f} {pico}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--medir':
+        medir(sys.argv[2], int(sys.argv[3]))
+        return
+    
+    tamanos = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'filas':>8} {'modo':>12} {'segundos':>9} {'ms/página':>10} {'memoria extra':>14}")
+    for filas in tamanos:
+        for modo in ('una_tabla', 'por_paginas', 'rapido'):
+            if modo == 'una_tabla' and filas > 20_000:
+                print(f"{filas:8d} {modo:>12} {'(omitido: demasiado lento)':>36}")
+                continue
+            salida = subprocess.run([sys.executable, __file__, '--medir', modo, str(filas)],
+                                    capture_output=True, text=True, check=True).stdout
+            segundos, pico_kb = salida.split()
+            paginas = filas / 25
+            print(f"{filas:8d} {modo:>12} {float(segundos):9.2f} {1000 * float(segundos) / paginas:10.2f} "
+                  f"{int(pico_kb) / 1024:11.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark: coste fijo por exportación a PDF (estilos, cabecera)
+
+Exporta muchas veces una explotación pequeña, como en un lote de cientos
+de explotaciones, y mide el tiempo medio por exportación y el de crear
+ExportadorPDF.
+
+Uso: python benchmarks/bench_pdf_fijo.py [repeticiones] [filas]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from _datos import generar_explotacion
+from pdf_export import ExportadorPDF, exportar_explotacion_a_pdf
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    filas = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    explotacion = generar_explotacion(filas)
+    
+    inicio = time.perf_counter()
+    for _ in range(repeticiones * 10):
+        ExportadorPDF(explotacion)
+    t_crear = (time.perf_counter() - inicio) / (repeticiones * 10)
+    print(f"ExportadorPDF(): {t_crear * 1e6:8.1f} µs")
+    
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'salida.pdf')
+        for modo in ('tabla', 'rapido'):
+            exportar_explotacion_a_pdf(explotacion, ruta, modo=modo)
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                exitoso, mensaje = exportar_explotacion_a_pdf(explotacion, ruta, modo=modo)
+                assert exitoso, mensaje
+            t_exportar = (time.perf_counter() - inicio) / repeticiones
+            print(f"exportar ({modo:6s}, {filas} filas): {t_exportar * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
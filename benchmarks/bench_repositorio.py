@@ -0,0 +1,48 @@
+"""
+Benchmark: validación y estadísticas de muchas explotaciones en serie frente a un pool de procesos
+
+Uso: python benchmarks/bench_repositorio.py [explotaciones] [filas_por_explotacion]
+"""
+
+import os
+import sys
+import time
+
+from _datos import generar_explotacion
+from models import RepositorioExplotaciones
+from utils import ValidadorDatos, EstadisticasExplotacion
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    filas = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    
+    repositorio = RepositorioExplotaciones()
+    for i in range(cantidad):
+        repositorio.agregar_explotacion(generar_explotacion(filas, codigo=f"ES{i:012d}", semilla=i))
+    
+    inicio = time.perf_counter()
+    serie = {}
+    for explotacion in repositorio.obtener_todas():
+        serie[explotacion.codigo] = (
+            ValidadorDatos.validar_explotacion(explotacion),
+            EstadisticasExplotacion.contadores(explotacion).como_dict(),
+        )
+    t_serie = time.perf_counter() - inicio
+    
+    print(f"Explotaciones: {cantidad} x {filas} ovejas  CPUs: {os.cpu_count()}")
+    print(f"en serie:        {t_serie:8.3f} s")
+    
+    for procesos in sorted({1, 2, 4, os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        validaciones = repositorio.validar_todas(max_workers=procesos)
+        estadisticas = repositorio.estadisticas_todas(max_workers=procesos)
+        t_pool = time.perf_counter() - inicio
+        
+        assert list(validaciones) == list(serie)
+        assert all(serie[c] == (validaciones[c], estadisticas[c].como_dict()) for c in serie)
+        print(f"{procesos:2d} procesos:     {t_pool:8.3f} s  ({t_serie / t_pool:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
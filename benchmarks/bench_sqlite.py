@@ -0,0 +1,69 @@
+"""
+Benchmark: repositorio sobre SQLite
+
+Crea una base con varias explotaciones y mide abrirla (sin cargar
+ovejas), cargar una explotación, contarla en SQL frente a cargarla y
+contar en memoria, y guardar una sola edición frente a reescribirla.
+
+Uso: python benchmarks/bench_sqlite.py [explotaciones] [filas_por_explotacion]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from _datos import generar_explotacion
+from almacen_sqlite import AlmacenSQLite
+from models import RepositorioExplotaciones, Oveja
+from utils import ContadoresExplotacion
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    filas = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'regional.db')
+        with AlmacenSQLite(ruta) as almacen:
+            repositorio = RepositorioExplotaciones(almacen)
+            _, t_crear = cronometrar(lambda: [
+                repositorio.agregar_explotacion(generar_explotacion(filas, codigo=f"ES{i:012d}", semilla=i))
+                for i in range(cantidad)
+            ])
+        
+        def abrir():
+            almacen = AlmacenSQLite(ruta)
+            repositorio = RepositorioExplotaciones(almacen)
+            return almacen, repositorio, repositorio.cantidad_explotaciones()
+        
+        (almacen, repositorio, n), t_abrir = cronometrar(abrir)
+        codigo = repositorio.obtener_codigos()[-1]
+        
+        sql, t_sql = cronometrar(lambda: almacen.contadores(codigo))
+        explotacion, t_cargar = cronometrar(lambda: repositorio.obtener_explotacion(codigo))
+        memoria, t_contar = cronometrar(lambda: ContadoresExplotacion.calcular(explotacion.ovejas))
+        assert not sql.diferencias(memoria)
+        
+        explotacion.agregar_oveja(Oveja(filas + 1, 'ES999999999999', 2024, '01/03/2024', 'Merina', 'H'))
+        _, t_cambios = cronometrar(repositorio.guardar_cambios)
+        _, t_completo = cronometrar(lambda: almacen.guardar(explotacion))
+        almacen.cerrar()
+    
+    print(f"Explotaciones: {cantidad} x {filas} ovejas ({cantidad * filas} en total)")
+    print(f"crear la base:                 {t_crear:9.3f} s")
+    print(f"abrir y listar ({n}):          {t_abrir * 1000:9.2f} ms")
+    print(f"contadores en SQL:             {t_sql * 1000:9.2f} ms")
+    print(f"cargar + contar en memoria:    {(t_cargar + t_contar) * 1000:9.2f} ms")
+    print(f"guardar una edición:           {t_cambios * 1000:9.2f} ms")
+    print(f"reescribir la explotación:     {t_completo * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: ValidadorDatos.validar_explotacion por columnas frente a oveja a oveja
+
+Por debajo de UMBRAL_VALIDACION_COLUMNAS ovejas validar_explotacion
+también va oveja a oveja. Antes de medir se hace una validación por
+columnas para no contar la importación de pandas (la aplicación la hace
+en segundo plano al arrancar), y un gc.collect() antes de cada medida para
+que una recolección completa de las ovejas generadas no caiga al azar en
+una de las dos.
+
+Uso: python benchmarks/bench_validacion.py [filas]
+"""
+
+import gc
+import random
+import sys
+import time
+
+from _datos import generar_explotacion
+import utils
+from utils import ValidadorDatos
+
+
+def validar_oveja_a_oveja(explotacion):
+    """Implementación anterior"""
+    errores = {}
+    for oveja in explotacion.ovejas:
+        es_valida, lista_errores = ValidadorDatos.validar_oveja(oveja)
+        if not es_valida:
+            errores[oveja.numero_orden] = lista_errores
+    return (len(errores) == 0, errores)
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    explotacion = generar_explotacion(filas)
+    ValidadorDatos.validar_explotacion(generar_explotacion(utils.UMBRAL_VALIDACION_COLUMNAS))
+    
+    # Introducir algunos errores
+    rng = random.Random(1)
+    for oveja in rng.sample(explotacion.ovejas, filas // 50):
+        oveja.sexo = rng.choice(['', 'X'])
+    
+    gc.collect()
+    inicio = time.perf_counter()
+    anterior = validar_oveja_a_oveja(explotacion)
+    t_anterior = time.perf_counter() - inicio
+    
+    gc.collect()
+    inicio = time.perf_counter()
+    nuevo = ValidadorDatos.validar_explotacion(explotacion)
+    t_nuevo = time.perf_counter() - inicio
+    
+    assert anterior == nuevo, "Los resultados no coinciden"
+    print(f"Filas: {filas}  ovejas con errores: {len(nuevo[1])}")
+    print(f"oveja a oveja:  {t_anterior:8.3f} s")
+    print(f"por columnas:   {t_nuevo:8.3f} s  ({t_anterior / t_nuevo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
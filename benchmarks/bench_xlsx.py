@@ -0,0 +1,72 @@
+"""
+Benchmark: abrir el registro desde Excel (.xlsx)
+
+Escribe un libro sintético con escribir_xlsx (openpyxl write_only) y
+compara Explotacion.from_xlsx (openpyxl read_only, por bloques) con
+pd.read_excel + Explotacion.from_dataframe. Mide tiempo y pico de
+memoria de cada camino y comprueba que las ovejas coinciden.
+
+Uso: python benchmarks/bench_xlsx.py [filas]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from _datos import generar_explotacion
+from models import Explotacion, escribir_xlsx
+
+
+def abrir_con_read_excel(ruta):
+    """Camino con pandas: la hoja entera a un DataFrame y de ahí a ovejas"""
+    df = pd.read_excel(ruta, dtype=str, na_filter=False, engine='openpyxl')
+    return Explotacion.from_dataframe(df, codigo='bench')
+
+
+def medir(funcion):
+    """Tiempo sin trazar; en una segunda pasada con tracemalloc, pico de memoria por encima del resultado"""
+    gc.collect()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    del resultado
+    
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcion()
+    retenida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracion, pico - retenida
+
+
+def main():
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    explotacion = generar_explotacion(filas)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, 'registro.xlsx')
+        _, t_escritura, m_escritura = medir(lambda: escribir_xlsx(explotacion.ovejas, ruta))
+        tamano = os.path.getsize(ruta)
+        del explotacion
+        
+        con_pandas, t_pandas, m_pandas = medir(lambda: abrir_con_read_excel(ruta))
+        ovejas_pandas = con_pandas.ovejas
+        del con_pandas
+        con_openpyxl, t_openpyxl, m_openpyxl = medir(lambda: Explotacion.from_xlsx(ruta, codigo='bench'))
+        assert con_openpyxl.ovejas == ovejas_pandas, "las ovejas no coinciden"
+    
+    # Memoria: pico durante la operación sin contar lo que queda (las ovejas)
+    print(f"Filas: {filas}  ({tamano / 2**20:.1f} MB)")
+    print(f"escribir_xlsx:                  {t_escritura:7.3f} s  memoria {m_escritura / 2**20:7.1f} MB")
+    print(f"pd.read_excel + from_dataframe: {t_pandas:7.3f} s  memoria {m_pandas / 2**20:7.1f} MB")
+    print(f"Explotacion.from_xlsx:          {t_openpyxl:7.3f} s  memoria {m_openpyxl / 2**20:7.1f} MB  "
+          f"({t_pandas / t_openpyxl:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
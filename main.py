@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 FlockLedger - Punto de entrada de la aplicación
+
+Sin argumentos abre la interfaz gráfica; con argumentos procesa CSV por
+lotes (python main.py --help).
 """
 
 import sys
@@ -9,9 +12,12 @@ import os
 # Agregar la carpeta src al path para importaciones
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.app import main
-import tkinter as tk
-
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Con argumentos: modo por lotes, sin importar tkinter
+        from lote import main as main_lote
+        sys.exit(main_lote(sys.argv[1:]))
+    
+    from src.app import main
     main()
@@ -0,0 +1,252 @@
+"""
+Almacenamiento en SQLite para FlockLedger
+Guarda muchas explotaciones en un único archivo y las carga bajo demanda
+"""
+
+import functools
+import sqlite3
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from models import Explotacion, CambiosPendientes, CAMPOS_OVEJA, CAMPOS_CATEGORICOS, _construir_ovejas, _columnas_de_ovejas
+from utils import ContadoresExplotacion
+
+# Tabla ovejas: una columna por campo de CAMPOS_OVEJA
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS explotaciones (
+    codigo TEXT PRIMARY KEY,
+    nombre TEXT
+);
+CREATE TABLE IF NOT EXISTS ovejas (
+    id INTEGER PRIMARY KEY,
+    explotacion TEXT NOT NULL REFERENCES explotaciones(codigo) ON DELETE CASCADE,
+    numero_orden INTEGER NOT NULL,
+    identificacion TEXT NOT NULL,
+    ano_nacimiento INTEGER NOT NULL,
+    fecha_identificacion TEXT NOT NULL,
+    raza TEXT NOT NULL,
+    sexo TEXT NOT NULL,
+    alta INTEGER NOT NULL,
+    causa_alta TEXT NOT NULL,
+    fecha_alta TEXT NOT NULL,
+    procedencia TEXT NOT NULL,
+    guia_alta TEXT NOT NULL,
+    baja INTEGER NOT NULL,
+    causa_baja TEXT NOT NULL,
+    fecha_baja TEXT NOT NULL,
+    destino TEXT NOT NULL,
+    guia_baja TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ovejas_orden ON ovejas(explotacion, numero_orden);
+CREATE INDEX IF NOT EXISTS ovejas_identificacion ON ovejas(identificacion);
+CREATE INDEX IF NOT EXISTS ovejas_raza ON ovejas(explotacion, raza);
+-- Las fechas se guardan como en el CSV (DD/MM/YYYY), que no ordena por
+-- fecha: un índice sobre ellas no sirve para rangos. Se quita de las bases
+-- que lo crearon.
+DROP INDEX IF EXISTS ovejas_fecha_baja;
+"""
+
+_INSERTAR = (f"INSERT INTO ovejas (id, explotacion, {', '.join(CAMPOS_OVEJA)}) "
+             f"VALUES ({', '.join('?' * (len(CAMPOS_OVEJA) + 2))})")
+_ACTUALIZAR = (f"UPDATE ovejas SET {', '.join(f'{campo} = ?' for campo in CAMPOS_OVEJA)} "
+               f"WHERE id = ?")
+
+# Filas por llamada a executemany
+TAMANO_LOTE_SQL = 50000
+
+
+def _serializado(metodo):
+    """Ejecutar el método con el cerrojo del almacén (ver AlmacenSQLite)"""
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self._cerrojo:
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+class AlmacenSQLite:
+    """
+    Explotaciones guardadas en una base de datos SQLite
+    
+    Abrir el almacén no carga ninguna oveja: cargar(codigo) lee una
+    explotación cuando se necesita. Las explotaciones cargadas o guardadas
+    quedan vigiladas (ver CambiosPendientes) y guardar_cambios escribe
+    solo las ovejas agregadas, modificadas o eliminadas, en una transacción.
+    
+    Se puede usar desde varios hilos (la aplicación lo usa desde las
+    tareas en segundo plano): la conexión es una sola y cada método
+    público la usa con el cerrojo tomado, así que las llamadas se
+    ejecutan una tras otra y una transacción nunca se mezcla con otra.
+    """
+    
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._cerrojo = threading.RLock()
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.conexion.execute("PRAGMA foreign_keys = ON")
+        self.conexion.execute("PRAGMA journal_mode = WAL")
+        self.conexion.execute("PRAGMA synchronous = NORMAL")
+        with self.conexion:
+            self.conexion.executescript(ESQUEMA)
+        # Por código, explotaciones cargadas o guardadas: el objeto, su
+        # observador de cambios y la fila de cada oveja (id(oveja) -> id)
+        self._vigiladas: Dict[str, Tuple[Explotacion, CambiosPendientes, Dict[int, int]]] = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excepcion):
+        self.cerrar()
+    
+    @_serializado
+    def cerrar(self):
+        self.conexion.close()
+    
+    @_serializado
+    def codigos(self) -> List[str]:
+        """Códigos de las explotaciones guardadas, en orden de alta"""
+        return [codigo for codigo, in self.conexion.execute("SELECT codigo FROM explotaciones ORDER BY rowid")]
+    
+    @_serializado
+    def contiene(self, codigo: str) -> bool:
+        fila = self.conexion.execute("SELECT 1 FROM explotaciones WHERE codigo = ?", (codigo,)).fetchone()
+        return fila is not None
+    
+    @_serializado
+    def cargar(self, codigo: str) -> Optional[Explotacion]:
+        """Leer una explotación con todas sus ovejas (None si no existe)"""
+        fila = self.conexion.execute("SELECT nombre FROM explotaciones WHERE codigo = ?", (codigo,)).fetchone()
+        if fila is None:
+            return None
+        
+        filas = self.conexion.execute(
+            f"SELECT id, {', '.join(CAMPOS_OVEJA)} FROM ovejas WHERE explotacion = ? ORDER BY id", (codigo,)
+        ).fetchall()
+        if filas:
+            ids, *columnas = zip(*filas)
+        else:
+            ids, columnas = (), [()] * len(CAMPOS_OVEJA)
+        columnas = [
+            list(map(sys.intern, columna)) if campo in CAMPOS_CATEGORICOS else columna
+            for campo, columna in zip(CAMPOS_OVEJA, columnas)
+        ]
+        del filas
+        
+        explotacion = Explotacion(codigo=codigo, nombre=fila[0], ovejas=_construir_ovejas(*columnas))
+        self._vigilar(explotacion, ids)
+        return explotacion
+    
+    @_serializado
+    def guardar(self, explotacion: Explotacion):
+        """Guardar (o reemplazar) una explotación completa"""
+        codigo = explotacion.codigo
+        with self.conexion:
+            self.conexion.execute("DELETE FROM ovejas WHERE explotacion = ?", (codigo,))
+            self.conexion.execute(
+                "INSERT INTO explotaciones (codigo, nombre) VALUES (?, ?) "
+                "ON CONFLICT(codigo) DO UPDATE SET nombre = excluded.nombre",
+                (codigo, explotacion.nombre)
+            )
+            ids = self._insertar(codigo, explotacion.ovejas)
+        self._vigilar(explotacion, ids)
+    
+    @_serializado
+    def guardar_cambios(self, explotacion: Explotacion) -> int:
+        """
+        Escribir los cambios de una explotación cargada o guardada aquí
+        
+        Todo va en una transacción con executemany por tipo de cambio; si
+        falla, los cambios siguen pendientes. Retorna las ovejas escritas.
+        """
+        codigo = explotacion.codigo
+        vigilada, cambios, filas = self._vigiladas.get(codigo, (None, None, None))
+        if vigilada is not explotacion:
+            raise KeyError(f"La explotación {codigo} no se cargó ni se guardó en este almacén")
+        
+        pendientes = cambios.extraer()
+        try:
+            with self.conexion:
+                eliminadas = [filas[clave] for clave in pendientes.eliminadas if clave in filas]
+                self.conexion.executemany("DELETE FROM ovejas WHERE id = ?", ((id_fila,) for id_fila in eliminadas))
+                
+                modificadas = [oveja for clave, oveja in pendientes.modificadas.items() if clave in filas]
+                for inicio in range(0, len(modificadas), TAMANO_LOTE_SQL):
+                    lote = modificadas[inicio:inicio + TAMANO_LOTE_SQL]
+                    self.conexion.executemany(_ACTUALIZAR, [
+                        (*valores, filas[id(oveja)])
+                        for oveja, valores in zip(lote, zip(*_columnas_de_ovejas(lote)))
+                    ])
+                
+                agregadas = list(pendientes.agregadas.values())
+                ids = self._insertar(codigo, agregadas)
+        except BaseException:
+            cambios.restaurar(pendientes)
+            raise
+        
+        for clave in pendientes.eliminadas:
+            filas.pop(clave, None)
+        filas.update(zip(map(id, agregadas), ids))
+        return len(eliminadas) + len(modificadas) + len(agregadas)
+    
+    @_serializado
+    def eliminar(self, codigo: str):
+        """Eliminar una explotación y sus ovejas"""
+        with self.conexion:
+            self.conexion.execute("DELETE FROM explotaciones WHERE codigo = ?", (codigo,))
+        self._olvidar(codigo)
+    
+    @_serializado
+    def total_ovejas(self, codigo: str) -> int:
+        """Ovejas guardadas de una explotación, sin cargarla"""
+        return self.conexion.execute("SELECT count(*) FROM ovejas WHERE explotacion = ?", (codigo,)).fetchone()[0]
+    
+    @_serializado
+    def contadores(self, codigo: str) -> ContadoresExplotacion:
+        """
+        Contadores de una explotación calculados en SQL, sin cargarla
+        
+        Coinciden con ContadoresExplotacion.calcular sobre las ovejas
+        guardadas, incluido el orden de primera aparición de cada clave.
+        """
+        contadores = ContadoresExplotacion()
+        contadores.total, contadores.bajas = self.conexion.execute(
+            "SELECT count(*), coalesce(sum(baja), 0) FROM ovejas WHERE explotacion = ?", (codigo,)
+        ).fetchone()
+        
+        def contar(campo, condicion=''):
+            return dict(self.conexion.execute(
+                f"SELECT {campo}, count(*) FROM ovejas WHERE explotacion = ? {condicion} "
+                f"GROUP BY {campo} ORDER BY min(id)", (codigo,)
+            ))
+        
+        contadores.por_raza = contar('raza')
+        contadores.por_sexo = contar('sexo')
+        contadores.por_procedencia = contar('procedencia', "AND alta AND procedencia != ''")
+        contadores.causas_alta = contar('causa_alta', "AND alta AND causa_alta != ''")
+        contadores.por_destino_baja = contar('destino', "AND baja AND destino != ''")
+        contadores.causas_baja = contar('causa_baja', "AND baja AND causa_baja != ''")
+        return contadores
+    
+    def _insertar(self, codigo: str, ovejas) -> range:
+        """Insertar ovejas por lotes con ids consecutivos (dentro de una transacción abierta)"""
+        siguiente = self.conexion.execute("SELECT coalesce(max(id), 0) + 1 FROM ovejas").fetchone()[0]
+        for inicio in range(0, len(ovejas), TAMANO_LOTE_SQL):
+            columnas = _columnas_de_ovejas(ovejas[inicio:inicio + TAMANO_LOTE_SQL])
+            ids = range(siguiente + inicio, siguiente + inicio + len(columnas[0]))
+            self.conexion.executemany(_INSERTAR, zip(ids, [codigo] * len(ids), *columnas))
+        return range(siguiente, siguiente + len(ovejas))
+    
+    def _vigilar(self, explotacion: Explotacion, ids):
+        """Empezar a anotar los cambios de la explotación, recordando la fila de cada oveja"""
+        self._olvidar(explotacion.codigo)
+        cambios = CambiosPendientes()
+        explotacion.suscribir(cambios)
+        self._vigiladas[explotacion.codigo] = (explotacion, cambios, dict(zip(map(id, explotacion.ovejas), ids)))
+    
+    def _olvidar(self, codigo: str):
+        """Dejar de anotar los cambios de una explotación"""
+        vigilada = self._vigiladas.pop(codigo, None)
+        if vigilada is not None:
+            explotacion, cambios, _ = vigilada
+            explotacion.desuscribir(cambios)
@@ -5,11 +5,47 @@ Versión Base con funcionalidades fundamentales
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
 import os
+import threading
 from pathlib import Path
-from models import Explotacion, Oveja, Alta, Baja, RepositorioExplotaciones
-from pdf_export import ExportadorPDF
+from models import (Explotacion, Oveja, Alta, Baja, RepositorioExplotaciones, CambiosPendientes,
+                    guardar_csv, escribir_xlsx, firma_para_agregar)
+from deteccion_csv import FilasDesalineadas
+from tabla_virtual import TablaVirtual
+from indice_busqueda import IndiceBusqueda
+from tareas import EjecutorTareas, Tarea, TareaCancelada
+
+
+# Espera tras la última tecla antes de buscar mientras se escribe
+RETARDO_BUSQUEDA_MS = 250
+
+# Inactividad tras el último guardado (o apertura) de un CSV antes de
+# reconstruir su instantánea
+RETARDO_INSTANTANEA_MS = 30_000
+
+# Módulos pesados que no hacen falta para mostrar la ventana de bienvenida:
+# se importan al abrir un archivo o exportar, o antes en segundo plano
+MODULOS_DIFERIDOS = ('pandas', 'openpyxl', 'instantanea', 'pdf_export')
+
+# Tipos de archivo que se pueden abrir y guardar
+TIPOS_ARCHIVO = [("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("All files", "*.*")]
+
+
+def es_xlsx(ruta):
+    """El archivo es un libro de Excel (se lee y escribe con openpyxl)"""
+    return ruta.lower().endswith('.xlsx')
+
+
+def precargar_modulos():
+    """Importar en un hilo aparte los módulos diferidos mientras se muestra la bienvenida"""
+    def importar():
+        for nombre in MODULOS_DIFERIDOS:
+            try:
+                __import__(nombre)
+            except ImportError:
+                pass
+    
+    threading.Thread(target=importar, name='precarga', daemon=True).start()
 
 
 class WelcomeWindow:
@@ -115,7 +151,13 @@ class FlockLedgerApp:
         self.repositorio = RepositorioExplotaciones()
         self.explotacion_actual = None
         self.current_file = None
-        self.df = None
+        self.indice_busqueda = None
+        self._busqueda_pendiente = None
+        self._instantanea_pendiente = None
+        self._hilo_instantanea = None
+        
+        # Carga, guardado y exportación en segundo plano
+        self.tareas = EjecutorTareas(self.root, al_progresar=self._mostrar_progreso)
         
         # Configurar estilos
         self.setup_styles()
@@ -138,11 +180,12 @@ class FlockLedgerApp:
         # Menú Archivo
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Archivo", menu=file_menu)
-        file_menu.add_command(label="Abrir CSV", command=self.open_file)
+        file_menu.add_command(label="Abrir CSV/Excel", command=self.open_file)
         file_menu.add_command(label="Guardar", command=self.save_file)
         file_menu.add_command(label="Guardar Como", command=self.save_as_file)
         file_menu.add_separator()
         file_menu.add_command(label="Exportar a PDF", command=self.export_to_pdf)
+        file_menu.add_command(label="Exportar a PDF (rápido)", command=lambda: self.export_to_pdf(modo='rapido'))
         file_menu.add_separator()
         file_menu.add_command(label="Salir", command=self.root.quit)
         
@@ -195,6 +238,7 @@ class FlockLedgerApp:
         search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side='left', padx=5)
         search_entry.bind('<Return>', lambda e: self.search_data())
+        search_entry.bind('<KeyRelease>', self._buscar_al_escribir)
         
         ttk.Button(filter_frame, text="Buscar", command=self.search_data).pack(side='left', padx=2)
         ttk.Button(filter_frame, text="Limpiar", command=self.clear_filters).pack(side='left', padx=2)
@@ -213,52 +257,61 @@ class FlockLedgerApp:
         self.status_label = ttk.Label(status_frame, text="Listo", relief='sunken')
         self.status_label.pack(side='left', fill='x', expand=True)
         
-    def create_treeview(self, parent):
-        """Crear tabla de datos con Treeview"""
-        # Frame para scrollbars
-        tree_frame = ttk.Frame(parent)
-        tree_frame.pack(fill='both', expand=True)
-        
-        # Scrollbar vertical
-        vsb = ttk.Scrollbar(tree_frame, orient='vertical')
-        vsb.pack(side='right', fill='y')
-        
-        # Scrollbar horizontal
-        hsb = ttk.Scrollbar(tree_frame, orient='horizontal')
-        hsb.pack(side='bottom', fill='x')
+        # Progreso de la tarea en segundo plano (oculto si no hay ninguna)
+        self.progress_bar = ttk.Progressbar(status_frame, mode='determinate', length=200, maximum=100)
+        self.cancel_button = ttk.Button(status_frame, text="Cancelar", command=self.tareas.cancelar)
         
-        # Crear Treeview
-        self.tree = ttk.Treeview(tree_frame, yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        self.tree.pack(fill='both', expand=True)
-        
-        vsb.config(command=self.tree.yview)
-        hsb.config(command=self.tree.xview)
+    def create_treeview(self, parent):
+        """Crear tabla de datos virtual (solo materializa las filas visibles)"""
+        self.tabla = TablaVirtual(parent)
+        self.tree = self.tabla.tree
         
         # Menú contextual
         self.tree.bind("<Button-3>", self.show_context_menu)
         
     def open_file(self):
-        """Abrir archivo CSV"""
+        """Abrir archivo CSV o Excel"""
         file_path = filedialog.askopenfilename(
-            title="Abrir archivo CSV",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            title="Abrir archivo CSV o Excel",
+            filetypes=TIPOS_ARCHIVO
         )
         
         if not file_path:
             return
         
-        try:
-            # Leer CSV como texto puro para evitar conversiones automáticas
-            self.df = pd.read_csv(file_path, dtype=str, na_filter=False)
-            self.current_file = file_path
-            
-            # Crear explotación desde el CSV
-            codigo_explotacion = os.path.splitext(os.path.basename(file_path))[0]
-            self.explotacion_actual = Explotacion.from_dataframe(
-                self.df, 
+        # Crear explotación leyendo el archivo por bloques, fuera del hilo de Tk
+        codigo_explotacion = os.path.splitext(os.path.basename(file_path))[0]
+        desalineadas = FilasDesalineadas()
+        
+        def cargar(tarea):
+            if es_xlsx(file_path):
+                return Explotacion.from_xlsx(
+                    file_path,
+                    codigo=codigo_explotacion,
+                    nombre=codigo_explotacion,
+                    progreso=tarea.progreso
+                ), None
+            # Antes de leer: si el archivo cambia mientras se lee, no coincidirá
+            firma = firma_para_agregar(file_path)
+            # Desde la instantánea binaria si está al día con el CSV
+            from instantanea import cargar_explotacion
+            return cargar_explotacion(
+                file_path,
                 codigo=codigo_explotacion,
-                nombre=codigo_explotacion
-            )
+                nombre=codigo_explotacion,
+                progreso=tarea.progreso,
+                desalineadas=desalineadas
+            ), firma
+        
+        def al_terminar(resultado):
+            explotacion, firma = resultado
+            self.explotacion_actual = explotacion
+            self.current_file = file_path
+            # Anotar los cambios para que los guardados siguientes sean
+            # incrementales, ya desde el primero si el CSV admite añadir filas
+            explotacion.seguir_cambios().marcar_guardado(file_path, firma)
+            # En segundo plano, antes de los avisos (que bloquean hasta cerrarlos)
+            self._construir_indice_busqueda()
             
             self.repositorio.agregar_explotacion(self.explotacion_actual)
             self.update_info_label()
@@ -271,11 +324,59 @@ class FlockLedgerApp:
                 f"Explotación: {codigo_explotacion}\n"
                 f"Total ovejas: {self.explotacion_actual.total_ovejas()}"
             )
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo abrir el archivo:\n{str(e)}")
+            # Un solo aviso para todas las filas con campos de más
+            if desalineadas:
+                messagebox.showwarning("Filas desalineadas", desalineadas.resumen())
+            if not es_xlsx(file_path):
+                self._programar_instantanea(file_path)
+        
+        self._ejecutar_tarea(Tarea("Cargando archivo"), cargar, al_terminar, "No se pudo abrir el archivo")
+    
+    def _ejecutar_tarea(self, tarea, funcion, al_terminar, mensaje_error, al_fallar=None):
+        """
+        Lanzar una tarea en segundo plano mostrando su progreso en la barra de estado
+        
+        al_fallar(error), si se indica, se llama antes de informar del fallo
+        o de la cancelación.
+        """
+        if self.tareas.ocupado:
+            messagebox.showwarning("Advertencia", f"Espere a que termine: {self.tareas.actual.descripcion}")
+            if al_fallar:
+                al_fallar(TareaCancelada(tarea.descripcion))
+            return
+        
+        def terminar(resultado):
+            self._ocultar_progreso()
+            al_terminar(resultado)
+        
+        def fallar(error):
+            self._ocultar_progreso()
+            if al_fallar:
+                al_fallar(error)
+            if isinstance(error, TareaCancelada):
+                self.status_label.config(text=f"{tarea.descripcion}: cancelado")
+            else:
+                messagebox.showerror("Error", f"{mensaje_error}:\n{str(error)}")
+        
+        self.progress_bar.config(value=0)
+        self.progress_bar.pack(side='left', padx=5)
+        if tarea.cancelable:
+            self.cancel_button.pack(side='left')
+        self.status_label.config(text=f"{tarea.descripcion}...")
+        self.tareas.ejecutar(tarea, funcion, terminar, fallar)
+    
+    def _mostrar_progreso(self, tarea, hechos, total):
+        """Mostrar el avance de la tarea en curso en la barra de estado"""
+        porcentaje = 100 * hechos / total if total else 100
+        self.progress_bar.config(value=porcentaje)
+        self.status_label.config(text=f"{tarea.descripcion}... {porcentaje:.0f}%")
+    
+    def _ocultar_progreso(self):
+        self.progress_bar.pack_forget()
+        self.cancel_button.pack_forget()
     
     def save_file(self):
-        """Guardar archivo CSV actual"""
+        """Guardar archivo actual (CSV o Excel)"""
         if not self.explotacion_actual:
             messagebox.showwarning("Advertencia", "No hay datos para guardar")
             return
@@ -283,7 +384,7 @@ class FlockLedgerApp:
         if not self.current_file:
             self.save_as_file()
         else:
-            self._guardar_csv(self.current_file)
+            self._guardar(self.current_file)
     
     def save_as_file(self):
         """Guardar archivo con nuevo nombre"""
@@ -293,56 +394,108 @@ class FlockLedgerApp:
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=TIPOS_ARCHIVO
         )
         
         if file_path:
             self.current_file = file_path
-            self._guardar_csv(file_path)
+            self._guardar(file_path)
     
-    def _guardar_csv(self, file_path):
-        """Helper para guardar CSV"""
-        try:
-            df = self.explotacion_actual.to_dataframe()
-            df.to_csv(file_path, index=False)
+    def _guardar(self, file_path):
+        """
+        Helper para guardar CSV o Excel (en segundo plano, sobre una copia de la lista de ovejas)
+        
+        Si desde el último guardado en un CSV solo se agregaron ovejas, se
+        añaden al final del archivo en lugar de reescribirlo (ver
+        guardar_csv). La instantánea del CSV se borra al guardar y se
+        reconstruye más tarde (ver _programar_instantanea). Los .xlsx se
+        reescriben siempre y no tienen instantánea.
+        """
+        explotacion = self.explotacion_actual
+        ovejas = list(explotacion.ovejas)
+        cambios = explotacion.seguir_cambios()
+        pendientes = cambios.extraer()
+        xlsx = es_xlsx(file_path)
+        
+        def guardar(tarea):
+            if xlsx:
+                escribir_xlsx(ovejas, file_path, progreso=tarea.progreso)
+                # Un .xlsx no admite añadir filas: sin firma, el próximo CSV se reescribe
+                return None
+            # Tras escribir ya no se llama a tarea.progreso: lo escrito no se cancela
+            firma = guardar_csv(ovejas, file_path, pendientes, progreso=tarea.progreso)
+            from instantanea import borrar_instantanea
+            borrar_instantanea(file_path)
+            return firma
+        
+        def al_terminar(firma):
+            cambios.marcar_guardado(file_path, firma)
             self.update_info_label()
             self.status_label.config(text=f"Archivo guardado: {os.path.basename(file_path)}")
             messagebox.showinfo("Éxito", "Archivo guardado correctamente")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar el archivo:\n{str(e)}")
+            if not xlsx:
+                self._programar_instantanea(file_path)
+        
+        # Cancelable hasta que el archivo cambia: ni reescribir ni añadir
+        # filas lo dejan a medias, y una vez cambiado el guardado termina
+        self._ejecutar_tarea(
+            Tarea("Guardando archivo"),
+            guardar,
+            al_terminar,
+            "No se pudo guardar el archivo",
+            al_fallar=lambda error: cambios.restaurar(pendientes)
+        )
+    
+    def _programar_instantanea(self, file_path):
+        """
+        Reconstruir la instantánea del CSV cuando la aplicación quede inactiva
+        
+        Cada guardado o apertura aplaza la reconstrucción, así que una serie
+        de guardados seguidos solo la reconstruye una vez.
+        """
+        if self._instantanea_pendiente is not None:
+            self.root.after_cancel(self._instantanea_pendiente)
+        self._instantanea_pendiente = self.root.after(
+            RETARDO_INSTANTANEA_MS, lambda: self._reconstruir_instantanea(file_path))
+    
+    def _reconstruir_instantanea(self, file_path):
+        """
+        Escribir la instantánea leyendo el propio CSV, en un hilo aparte
+        
+        No ocupa el ejecutor de tareas: si hay una tarea en curso (o otra
+        reconstrucción) se vuelve a aplazar. Se lee del archivo y no de las
+        ovejas en memoria, que pueden cambiar mientras tanto; si el CSV
+        cambia durante la lectura, la firma no coincidirá y la instantánea
+        no se usará. Si falla, el archivo simplemente se abrirá leyendo el CSV.
+        """
+        self._instantanea_pendiente = None
+        if self.tareas.ocupado or (self._hilo_instantanea and self._hilo_instantanea.is_alive()):
+            self._programar_instantanea(file_path)
+            return
+        
+        def reconstruir():
+            from instantanea import abrir_instantanea, crear_instantanea
+            try:
+                if abrir_instantanea(file_path) is None:
+                    crear_instantanea(file_path)
+            except (OSError, ValueError, OverflowError):
+                pass
+        
+        # Sin daemon: al cerrar se espera a que termine en lugar de dejar el temporal a medias
+        self._hilo_instantanea = threading.Thread(target=reconstruir, name='instantanea')
+        self._hilo_instantanea.start()
     
     def display_data(self):
         """Mostrar datos en la tabla"""
         if not self.explotacion_actual:
             return
         
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tabla.mostrar(self.explotacion_actual.ovejas)
         
-        # Obtener datos del modelo
-        df = self.explotacion_actual.to_dataframe()
-        
-        if df.empty:
+        if not self.explotacion_actual.ovejas:
             self.status_label.config(text="No hay datos para mostrar")
             return
         
-        # Configurar columnas
-        columns = list(df.columns)
-        self.tree['columns'] = columns
-        self.tree.column('#0', width=30, anchor='center')
-        self.tree.heading('#0', text='#')
-        
-        for col in columns:
-            self.tree.column(col, width=100, anchor='w')
-            self.tree.heading(col, text=col)
-        
-        # Agregar datos
-        for idx, oveja in enumerate(self.explotacion_actual.ovejas, 1):
-            row_data = oveja.to_dict()
-            values = [row_data[col] for col in columns]
-            self.tree.insert('', 'end', text=str(idx), values=values)
-        
         self.status_label.config(text=f"Total ovejas: {self.explotacion_actual.total_ovejas()}")
     
     def add_row(self):
@@ -368,12 +521,14 @@ class FlockLedgerApp:
         )
         
         self.explotacion_actual.agregar_oveja(nueva_oveja)
-        self.display_data()
+        if self.tabla.filas is not self.explotacion_actual.ovejas:
+            self.display_data()
+        self.tabla.ir_a(self.explotacion_actual.total_ovejas() - 1, seleccionar=True)
         self.status_label.config(text="Nueva oveja agregada")
     
     def delete_row(self):
         """Eliminar fila seleccionada"""
-        selected = self.tree.selection()
+        selected = self.tabla.seleccion()
         
         if not selected:
             messagebox.showwarning("Advertencia", "Seleccione una fila para eliminar")
@@ -382,13 +537,16 @@ class FlockLedgerApp:
         if not messagebox.askyesno("Confirmar", "¿Desea eliminar la fila seleccionada?"):
             return
         
-        for item in selected:
-            index = int(self.tree.item(item, 'text')) - 1
-            if index < len(self.explotacion_actual.ovejas):
-                oveja_a_eliminar = self.explotacion_actual.ovejas[index]
-                self.explotacion_actual.eliminar_oveja(oveja_a_eliminar.numero_orden)
+        numeros_orden = [oveja.numero_orden for oveja in selected]
+        mostrando_todas = self.tabla.filas is self.explotacion_actual.ovejas
+        self.explotacion_actual.eliminar_ovejas(numeros_orden)
         
-        self.display_data()
+        if mostrando_todas and self.tabla.filas is not self.explotacion_actual.ovejas:
+            # La explotación diferida acaba de construir su lista (ver ExplotacionDiferida)
+            self.display_data()
+        else:
+            # Si se muestran resultados de búsqueda, quitarlos también de esa lista
+            self.tabla.filas_eliminadas(numeros_orden, filtrar=not mostrando_todas)
         self.status_label.config(text="Fila eliminada")
     
     def search_data(self):
@@ -399,28 +557,99 @@ class FlockLedgerApp:
             self.display_data()
             return
         
-        # Buscar en DataFrame
-        df = self.explotacion_actual.to_dataframe()
-        mask = df.astype(str).apply(
-            lambda x: x.str.contains(search_term, case=False, na=False)
-        ).any(axis=1)
-        
-        filtered_df = df[mask]
+        indice = self._obtener_indice_busqueda()
+        if indice is None:
+            return
+        resultados = indice.buscar(search_term)
         
-        if len(filtered_df) == 0:
+        if not resultados:
             messagebox.showinfo("Búsqueda", "No se encontraron resultados")
             return
         
         # Mostrar resultados filtrados
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tabla.mostrar(resultados)
         
-        columns = list(filtered_df.columns)
-        for idx, (_, row) in enumerate(filtered_df.iterrows(), 1):
-            values = [row[col] for col in columns]
-            self.tree.insert('', 'end', text=str(idx), values=values)
+        self.status_label.config(text=f"Búsqueda: {len(resultados)} resultados encontrados")
+    
+    def _obtener_indice_busqueda(self):
+        """
+        Índice de búsqueda de la explotación actual, o None si aún no está listo
+        
+        Si no lo está, se empieza a construir (si no hay otra tarea en
+        curso) y la búsqueda se repite al terminar.
+        """
+        indice = self.indice_busqueda
+        if indice is not None and indice.explotacion is self.explotacion_actual:
+            return indice
+        self._construir_indice_busqueda()
+        self.status_label.config(text="Preparando la búsqueda: se buscará al terminar")
+        return None
+    
+    def _construir_indice_busqueda(self):
+        """
+        Construir en segundo plano el índice de búsqueda de la explotación actual
+        
+        Con 200.000 ovejas tarda unos segundos, que en el hilo de Tk
+        congelarían la ventana en la primera búsqueda. Los cambios hechos
+        mientras tanto se anotan en un CambiosPendientes aparte: si hubo
+        alguno, el índice construido se descarta y se vuelve a empezar.
+        """
+        if self.indice_busqueda is not None:
+            self.indice_busqueda.cerrar()
+            self.indice_busqueda = None
+        explotacion = self.explotacion_actual
+        if explotacion is None or self.tareas.ocupado:
+            return
         
-        self.status_label.config(text=f"Búsqueda: {len(filtered_df)} resultados encontrados")
+        cambios = CambiosPendientes()
+        explotacion.suscribir(cambios)
+        
+        def construir(tarea):
+            return IndiceBusqueda(explotacion, seguir=False, progreso=tarea.progreso)
+        
+        def al_terminar(indice):
+            explotacion.desuscribir(cambios)
+            if explotacion is not self.explotacion_actual:
+                return
+            if cambios.hay_cambios:
+                self._construir_indice_busqueda()
+                return
+            indice.seguir()
+            self.indice_busqueda = indice
+            self.status_label.config(text="Búsqueda preparada")
+            if self.search_var.get():
+                self._busqueda_diferida()
+        
+        self._ejecutar_tarea(
+            Tarea("Preparando la búsqueda"),
+            construir,
+            al_terminar,
+            "No se pudo preparar la búsqueda",
+            al_fallar=lambda error: explotacion.desuscribir(cambios)
+        )
+    
+    def _buscar_al_escribir(self, event=None):
+        """Buscar mientras se escribe, esperando a que se deje de teclear"""
+        if event is not None and event.keysym == 'Return':
+            return
+        if self._busqueda_pendiente is not None:
+            self.root.after_cancel(self._busqueda_pendiente)
+        self._busqueda_pendiente = self.root.after(RETARDO_BUSQUEDA_MS, self._busqueda_diferida)
+    
+    def _busqueda_diferida(self):
+        self._busqueda_pendiente = None
+        if not self.explotacion_actual:
+            return
+        search_term = self.search_var.get()
+        if not search_term:
+            self.display_data()
+            return
+        indice = self._obtener_indice_busqueda()
+        if indice is None:
+            return
+        resultados = indice.buscar(search_term)
+        self.tabla.mostrar(resultados)
+        self.status_label.config(text=f"Búsqueda: {len(resultados)} resultados encontrados")
     
     def clear_filters(self):
         """Limpiar filtros y mostrar todos los datos"""
@@ -465,8 +694,8 @@ class FlockLedgerApp:
         except:
             messagebox.showwarning("Advertencia", "Seleccione una celda")
     
-    def export_to_pdf(self):
-        """Exportar explotación actual a PDF"""
+    def export_to_pdf(self, modo='tabla'):
+        """Exportar explotación actual a PDF ('rapido': dibujo directo, para registros grandes)"""
         if not self.explotacion_actual:
             messagebox.showwarning("Advertencia", "No hay datos para exportar")
             return
@@ -481,17 +710,29 @@ class FlockLedgerApp:
         if not file_path:
             return
         
-        try:
-            exportador = ExportadorPDF(self.explotacion_actual)
-            exitoso, mensaje = exportador.generar_pdf(file_path)
-            
+        # Como al guardar, se exporta una copia de la lista de ovejas: agregar o
+        # eliminar filas mientras tanto no afecta al PDF
+        actual = self.explotacion_actual
+        codigo, nombre, ovejas = actual.codigo, actual.nombre, list(actual.ovejas)
+        
+        def exportar(tarea):
+            from pdf_export import exportar_explotacion_a_pdf
+            explotacion = Explotacion(codigo=codigo, nombre=nombre, ovejas=ovejas)
+            resultado = exportar_explotacion_a_pdf(explotacion, file_path, modo=modo, progreso=tarea.progreso)
+            # generar_pdf convierte la cancelación en un resultado fallido
+            if tarea.cancelada:
+                raise TareaCancelada(tarea.descripcion)
+            return resultado
+        
+        def al_terminar(resultado):
+            exitoso, mensaje = resultado
             if exitoso:
                 messagebox.showinfo("Éxito", f"PDF generado correctamente\n\n{mensaje}")
                 self.status_label.config(text=f"PDF exportado: {os.path.basename(file_path)}")
             else:
                 messagebox.showerror("Error", f"Error al generar PDF:\n\n{mensaje}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al exportar a PDF:\n\n{str(e)}")
+        
+        self._ejecutar_tarea(Tarea("Exportando a PDF"), exportar, al_terminar, "Error al exportar a PDF")
     
     def show_about(self):
         """Mostrar ventana Acerca de"""
@@ -509,6 +750,8 @@ def main():
     # Crear ventana de bienvenida
     welcome_root = tk.Tk()
     welcome = WelcomeWindow(welcome_root)
+    # Precargar cuando la ventana ya está dibujada
+    welcome_root.after_idle(precargar_modulos)
     welcome_root.mainloop()
     
     # Si el usuario no cerró explícitamente, abrir la aplicación principal
@@ -521,6 +764,7 @@ def main():
             app.root.after(100, app.open_file)
         
         app.root.mainloop()
+        app.tareas.cerrar()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,231 @@
+"""
+Detección del formato de los CSV del registro
+Codificación, separador y columnas a partir de los primeros KB del archivo, sin leerlo entero
+"""
+
+import codecs
+import csv
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Tuple
+
+from models import COLUMNAS
+
+# Bytes del principio del archivo que se examinan
+TAMANO_MUESTRA = 16 * 1024
+
+# Cabeceras distintas cuyo separador y columnas se recuerdan
+MAX_CABECERAS_CACHE = 256
+
+# Separadores posibles, en orden de preferencia si empatan
+SEPARADORES = (',', ';', '\t', '|')
+
+# Otras formas de escribir cada columna, ya normalizadas (ver _normalizar);
+# el nombre de COLUMNAS también se acepta
+ALIAS_COLUMNAS = {
+    'Nº Orden': ('n orden', 'n o orden', 'n de orden', 'no de orden', 'num orden', 'numero orden', 'numero de orden', 'orden'),
+    'Identificación': ('identificacion', 'identificador', 'crotal', 'id'),
+    'Año Nacimiento': ('ano nacimiento', 'ano de nacimiento', 'anio nacimiento', 'ano nac', 'nacimiento'),
+    'Fecha Identificación': ('fecha identificacion', 'fecha de identificacion', 'fecha ident', 'f identificacion'),
+    'Raza': ('raza',),
+    'Sexo': ('sexo',),
+    'Causa Alta': ('causa alta', 'causa de alta', 'motivo alta'),
+    'Fecha Alta': ('fecha alta', 'fecha de alta', 'f alta'),
+    'Procedencia': ('procedencia', 'origen', 'explotacion procedencia', 'explotacion origen'),
+    'Guía Alta': ('guia alta', 'guia de alta', 'guia entrada'),
+    'Causa Baja': ('causa baja', 'causa de baja', 'motivo baja'),
+    'Fecha Baja': ('fecha baja', 'fecha de baja', 'f baja'),
+    'Destino': ('destino', 'explotacion destino'),
+    'Guía Baja': ('guia baja', 'guia de baja', 'guia salida'),
+}
+
+# Líneas de filas desalineadas que se guardan como ejemplo
+MAX_EJEMPLOS_DESALINEADAS = 10
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def _normalizar(nombre: str) -> str:
+    """Nombre de columna sin acentos, en minúsculas y con los signos como espacios ('Nº Orden' -> 'no orden')"""
+    descompuesto = unicodedata.normalize('NFKD', nombre.casefold())
+    letras = ''.join(c if c.isalnum() else ' ' for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(letras.split())
+
+
+_COLUMNA_POR_ALIAS = {
+    alias: columna
+    for columna in COLUMNAS
+    for alias in (_normalizar(columna), *ALIAS_COLUMNAS.get(columna, ()))
+}
+
+
+@dataclass(frozen=True)
+class FormatoCSV:
+    """Cómo leer un CSV del registro"""
+    codificacion: str
+    separador: str
+    # Columna de COLUMNAS -> posición en el archivo (las que faltan no están)
+    posiciones: Mapping[str, int]
+    # Campos de la cabecera
+    campos: int
+    # Columnas de la cabecera que no son del registro (se ignoran)
+    ignoradas: Tuple[str, ...]
+
+
+def detectar_codificacion(muestra: bytes) -> str:
+    """
+    Codificación de un archivo a partir de sus primeros bytes
+    
+    Por orden: BOM, UTF-16 sin BOM (la mitad de los bytes a cero), UTF-8
+    si la muestra es válida, y si no cp1252 (o latin-1, que acepta
+    cualquier byte). Un archivo que solo tenga ASCII en la muestra se
+    considera UTF-8.
+    """
+    for bom, codificacion in _BOMS:
+        if muestra.startswith(bom):
+            return codificacion
+    
+    if muestra.count(0) > len(muestra) // 4:
+        pares, impares = muestra[0::2], muestra[1::2]
+        if impares.count(0) > len(impares) // 2:
+            return 'utf-16-le'
+        if pares.count(0) > len(pares) // 2:
+            return 'utf-16-be'
+    
+    try:
+        # Sin final: la muestra puede cortar un carácter por la mitad
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        muestra.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def codificaciones_reserva(codificacion: str) -> Tuple[str, ...]:
+    """
+    Codificaciones con las que reintentar si la detectada falla más allá de la muestra
+    
+    Un UTF-8 que solo tenía ASCII en la muestra puede ser cp1252; cp1252
+    deja algunos bytes sin definir y latin-1 los acepta todos. UTF-16 no
+    tiene reserva.
+    """
+    if codificacion in ('utf-8', 'utf-8-sig'):
+        return ('cp1252', 'latin-1')
+    if codificacion == 'cp1252':
+        return ('latin-1',)
+    return ()
+
+
+def _primera_linea(muestra: bytes, codificacion: str) -> str:
+    # Hasta el primer salto de línea (+1 byte: en UTF-16 LE el '\n' ocupa dos)
+    fin = muestra.find(b'\n')
+    if fin >= 0:
+        muestra = muestra[:fin + 2]
+    texto = codecs.getincrementaldecoder(codificacion)(errors='replace').decode(muestra, final=False)
+    return texto.lstrip('\ufeff').partition('\n')[0].rstrip('\r')
+
+
+def _campos(linea: str, separador: str) -> List[str]:
+    return next(csv.reader([linea], delimiter=separador), [])
+
+
+@lru_cache(maxsize=MAX_CABECERAS_CACHE)
+def mapear_cabecera(cabecera: str) -> Tuple[str, Mapping[str, int], int, Tuple[str, ...]]:
+    """
+    Separador y posición de cada columna según la línea de cabecera
+    
+    El separador es el candidato que divide la cabecera en más campos.
+    Cada campo se compara normalizado con los nombres y alias de
+    ALIAS_COLUMNAS; si una columna aparece dos veces vale la primera.
+    Se recuerda por cabecera: los archivos que comparten cabecera no
+    repiten la detección. Las posiciones se devuelven de solo lectura,
+    porque el resultado es compartido.
+    """
+    separador = max(SEPARADORES, key=lambda candidato: len(_campos(cabecera, candidato)))
+    campos = _campos(cabecera, separador)
+    
+    posiciones = {}
+    ignoradas = []
+    for posicion, nombre in enumerate(campos):
+        columna = _COLUMNA_POR_ALIAS.get(_normalizar(nombre))
+        if columna is not None and columna not in posiciones:
+            posiciones[columna] = posicion
+        elif nombre.strip():
+            ignoradas.append(nombre.strip())
+    return separador, MappingProxyType(posiciones), len(campos), tuple(ignoradas)
+
+
+def detectar_formato(ruta: str, tamano_muestra: int = TAMANO_MUESTRA) -> FormatoCSV:
+    """
+    Detectar codificación, separador y columnas de un CSV del registro
+    
+    Solo se leen los primeros tamano_muestra bytes. Lanza ValueError si el
+    archivo está vacío o ningún campo de la cabecera es una columna del
+    registro.
+    """
+    with open(ruta, 'rb') as archivo:
+        muestra = archivo.read(tamano_muestra)
+    
+    codificacion = detectar_codificacion(muestra)
+    cabecera = _primera_linea(muestra, codificacion)
+    if not cabecera.strip():
+        raise ValueError(f"El archivo no tiene cabecera: {ruta}")
+    
+    separador, posiciones, campos, ignoradas = mapear_cabecera(cabecera)
+    if not posiciones:
+        raise ValueError(f"La cabecera no tiene ninguna columna del registro: {ruta}")
+    return FormatoCSV(codificacion, separador, posiciones, campos, ignoradas)
+
+
+class FilasDesalineadas:
+    """
+    Filas con más campos que la cabecera, anotadas durante la lectura
+    
+    Se informa de todas juntas al terminar (ver resumen) en lugar de fila
+    a fila. Cada columna se lee en la posición que indica la cabecera y
+    los campos sobrantes se descartan.
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.campos = 0
+        # Primeras líneas afectadas (la cabecera es la línea 1)
+        self.lineas: List[int] = []
+    
+    def __bool__(self) -> bool:
+        return self.total > 0
+    
+    def anotar(self, lineas: Iterable[int]):
+        lineas = list(lineas)
+        self.total += len(lineas)
+        self.lineas += lineas[:MAX_EJEMPLOS_DESALINEADAS - len(self.lineas)]
+    
+    def resumen(self) -> str:
+        """Descripción para mostrar al usuario ('' si no hay filas desalineadas)"""
+        if not self.total:
+            return ''
+        lineas = ', '.join(map(str, self.lineas))
+        if self.total > len(self.lineas):
+            lineas += ', ...'
+        return (f"{self.total} filas tienen más campos que la cabecera ({self.campos}); "
+                f"se ignoraron los campos sobrantes. Líneas: {lineas}")
+    
+    def como_dict(self) -> dict:
+        """Lo anotado, para guardarlo (p. ej. en la cabecera de una instantánea)"""
+        return {'total': self.total, 'campos': self.campos, 'lineas': list(self.lineas)}
+    
+    def cargar(self, datos: dict):
+        """Sustituir lo anotado por lo guardado con como_dict"""
+        self.total = datos['total']
+        self.campos = datos['campos']
+        self.lineas = list(datos['lineas'])
@@ -0,0 +1,265 @@
+"""
+Explotación de solo lectura sobre una instantánea mapeada en memoria
+Para registros que no caben en memoria: las ovejas se crean solo al pedirlas
+"""
+
+import bisect
+import operator
+import threading
+from collections.abc import Sequence
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+
+from models import Explotacion, Oveja
+from instantanea import Instantanea, abrir_instantanea, crear_instantanea
+from utils import ContadoresExplotacion
+
+# Filas que se construyen de una vez al recorrer o filtrar la explotación
+TAMANO_BLOQUE = 65536
+
+# Filas por bloque al contar con numpy (sin copiar columnas enteras)
+TAMANO_BLOQUE_CONTEO = 1 << 22
+
+
+class OvejasMapeadas(Sequence):
+    """
+    Ovejas de una instantánea como secuencia de solo lectura
+    
+    Cada acceso construye solo las ovejas pedidas: un índice, una oveja;
+    un rango, las de ese rango (así pagina ExportadorPDF). Al recorrerla
+    se construyen por bloques de TAMANO_BLOQUE.
+    """
+    
+    def __init__(self, instantanea: Instantanea):
+        self._instantanea = instantanea
+    
+    def __len__(self) -> int:
+        return self._instantanea.filas
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            inicio, fin, paso = indice.indices(len(self))
+            if paso == 1:
+                return self._instantanea.ovejas(inicio, max(inicio, fin))
+            return [self[i] for i in range(inicio, fin, paso)]
+        
+        indice = operator.index(indice)
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice de oveja fuera de rango")
+        return self._instantanea.ovejas(indice, indice + 1)[0]
+    
+    def __iter__(self) -> Iterator[Oveja]:
+        for inicio in range(0, len(self), TAMANO_BLOQUE):
+            yield from self[inicio:inicio + TAMANO_BLOQUE]
+
+
+class _ClavesOrdenadas(Sequence):
+    """Valores de una columna en el orden de un índice, leídos bajo demanda (para bisect)"""
+    
+    def __init__(self, valores, indice):
+        self.valores = valores
+        self.indice = indice
+    
+    def __len__(self) -> int:
+        return len(self.indice)
+    
+    def __getitem__(self, posicion: int):
+        return self.valores[self.indice[posicion]]
+
+
+def _contar_codigos(codigos, categorias: list, marcas=None, sin_vacios: bool = False) -> dict:
+    """
+    Contar una columna categórica por sus códigos (solo las filas marcadas)
+    
+    Las categorías están en orden de primera aparición, así que el
+    resultado coincide con el de ContadoresExplotacion.calcular.
+    """
+    cuentas = np.zeros(len(categorias), dtype=np.int64)
+    for inicio in range(0, len(codigos), TAMANO_BLOQUE_CONTEO):
+        bloque = codigos[inicio:inicio + TAMANO_BLOQUE_CONTEO]
+        if marcas is not None:
+            bloque = bloque[marcas[inicio:inicio + TAMANO_BLOQUE_CONTEO].astype(bool)]
+        cuentas += np.bincount(bloque, minlength=len(categorias))
+    return {
+        categoria: cantidad
+        for categoria, cantidad in zip(categorias, cuentas.tolist())
+        if cantidad and not (sin_vacios and categoria == '')
+    }
+
+
+class ExplotacionMapeada:
+    """
+    Explotación de solo lectura respaldada por una instantánea
+    
+    Ofrece la parte de consulta de Explotacion (ovejas, total_ovejas,
+    obtener_oveja, obtener_oveja_por_identificacion, los filtros y
+    contadores), de modo que EstadisticasExplotacion y ExportadorPDF
+    funcionan sin cambios. Nada se lee del disco hasta que se usa y solo
+    se cargan las páginas del archivo que se tocan. Los filtros son
+    generadores en lugar de listas.
+    """
+    
+    def __init__(self, instantanea: Instantanea, codigo: str, nombre: str = None):
+        self.codigo = codigo
+        self.nombre = nombre
+        self.instantanea = instantanea
+        self.ovejas = OvejasMapeadas(instantanea)
+        self._contadores: Optional[ContadoresExplotacion] = None
+    
+    @classmethod
+    def abrir(cls, ruta_csv: str, codigo: str, nombre: str = None,
+              progreso: Optional[Callable[[int, int], None]] = None) -> 'ExplotacionMapeada':
+        """
+        Abrir un CSV del registro a través de su instantánea
+        
+        Si no hay instantánea al día se crea antes, leyendo el CSV por
+        bloques (progreso como en crear_instantanea).
+        """
+        instantanea = abrir_instantanea(ruta_csv)
+        if instantanea is None:
+            crear_instantanea(ruta_csv, progreso)
+            instantanea = abrir_instantanea(ruta_csv)
+            if instantanea is None:
+                raise OSError(f"El archivo cambió mientras se creaba su instantánea: {ruta_csv}")
+        return cls(instantanea, codigo, nombre)
+    
+    def suscribir(self, observador):
+        """La explotación no cambia: no hay nada que notificar"""
+    
+    def desuscribir(self, observador):
+        """La explotación no cambia: no hay nada que notificar"""
+    
+    def total_ovejas(self) -> int:
+        """Obtener total de ovejas"""
+        return len(self.ovejas)
+    
+    def obtener_oveja(self, numero_orden: int) -> Optional[Oveja]:
+        """Obtener una oveja por número de orden (búsqueda binaria en el índice del archivo)"""
+        ordenes = self.instantanea.arreglos['numero_orden'][0]
+        indice = self.instantanea.indices['numero_orden']
+        posicion = bisect.bisect_left(_ClavesOrdenadas(ordenes, indice), numero_orden)
+        if posicion < len(indice) and ordenes[indice[posicion]] == numero_orden:
+            return self.ovejas[int(indice[posicion])]
+        return None
+    
+    def obtener_oveja_por_identificacion(self, identificacion: str) -> Optional[Oveja]:
+        """Obtener una oveja por su identificación (crotal ES...)"""
+        fila = self.instantanea.fila_de_texto('identificacion', identificacion)
+        return None if fila is None else self.ovejas[fila]
+    
+    def obtener_ovejas_con_alta(self) -> Iterator[Oveja]:
+        """Ovejas con alta registrada, a medida que se recorren"""
+        return self._filtrar('alta', True)
+    
+    def obtener_ovejas_con_baja(self) -> Iterator[Oveja]:
+        """Ovejas con baja registrada, a medida que se recorren"""
+        return self._filtrar('baja', True)
+    
+    def obtener_ovejas_activas(self) -> Iterator[Oveja]:
+        """Ovejas sin baja registrada, a medida que se recorren"""
+        return self._filtrar('baja', False)
+    
+    def _filtrar(self, campo: str, valor: bool) -> Iterator[Oveja]:
+        """Recorrer por bloques construyendo solo las ovejas cuyo campo lógico vale valor"""
+        marcas = self.instantanea.arreglos[campo][0]
+        for inicio in range(0, len(marcas), TAMANO_BLOQUE):
+            mascara = marcas[inicio:inicio + TAMANO_BLOQUE].astype(bool)
+            if not valor:
+                mascara = ~mascara
+            if mascara.any():
+                yield from self.instantanea.ovejas(inicio, inicio + len(mascara), mascara.tolist())
+    
+    @property
+    def contadores(self) -> ContadoresExplotacion:
+        """
+        Contadores de la explotación, calculados con numpy sobre las columnas
+        
+        Se calculan la primera vez que se piden (EstadisticasExplotacion los
+        usa en lugar de recorrer las ovejas).
+        """
+        if self._contadores is None:
+            instantanea = self.instantanea
+            
+            def columna(campo):
+                return instantanea.arreglos[campo][0]
+            
+            altas, bajas = columna('alta'), columna('baja')
+            
+            def contar(campo, marcas=None):
+                return _contar_codigos(columna(campo), instantanea.categorias[campo], marcas,
+                                       sin_vacios=marcas is not None)
+            
+            contadores = ContadoresExplotacion()
+            contadores.total = instantanea.filas
+            contadores.bajas = int(np.count_nonzero(bajas))
+            contadores.por_raza = contar('raza')
+            contadores.por_sexo = contar('sexo')
+            contadores.por_procedencia = contar('procedencia', altas)
+            contadores.causas_alta = contar('causa_alta', altas)
+            contadores.por_destino_baja = contar('destino', bajas)
+            contadores.causas_baja = contar('causa_baja', bajas)
+            self._contadores = contadores
+        return self._contadores
+
+
+class ExplotacionDiferida(Explotacion):
+    """
+    Explotación abierta desde una instantánea que construye sus ovejas al cambiar
+    
+    Hasta el primer cambio, ovejas es una OvejasMapeadas: abrir no construye
+    nada y la tabla, las estadísticas o la exportación leen del archivo
+    mapeado. El primer cambio, o el primer uso que necesita las ovejas
+    definitivas (obtener_oveja, un IndiceBusqueda), llama a materializar,
+    que construye la lista y los índices como en Explotacion. Las ovejas
+    leídas antes son copias: no sirven para modificar_oveja.
+    """
+    
+    def __init__(self, instantanea: Instantanea, codigo: str, nombre: str = None):
+        self._instantanea: Optional[Instantanea] = instantanea
+        self._cerrojo = threading.Lock()
+        super().__init__(codigo=codigo, nombre=nombre, ovejas=OvejasMapeadas(instantanea))
+    
+    @property
+    def materializada(self) -> bool:
+        return self._instantanea is None
+    
+    def materializar(self):
+        """Construir la lista de ovejas y los índices (solo la primera vez; admite varios hilos)"""
+        with self._cerrojo:
+            if self._instantanea is None:
+                return
+            self.ovejas = self._instantanea.ovejas()
+            self._instantanea = None
+            self.reindexar()
+    
+    def reindexar(self):
+        # Sin materializar no hay índices: se construyen en materializar
+        if self._instantanea is None:
+            super().reindexar()
+    
+    def agregar_oveja(self, oveja: Oveja):
+        self.materializar()
+        super().agregar_oveja(oveja)
+    
+    def agregar_ovejas(self, ovejas: List[Oveja]):
+        self.materializar()
+        super().agregar_ovejas(ovejas)
+    
+    def eliminar_ovejas(self, numeros_orden):
+        self.materializar()
+        super().eliminar_ovejas(numeros_orden)
+    
+    def modificar_oveja(self, oveja: Oveja, **cambios):
+        self.materializar()
+        super().modificar_oveja(oveja, **cambios)
+    
+    def obtener_oveja(self, numero_orden: int) -> Optional[Oveja]:
+        self.materializar()
+        return super().obtener_oveja(numero_orden)
+    
+    def obtener_oveja_por_identificacion(self, identificacion: str) -> Optional[Oveja]:
+        self.materializar()
+        return super().obtener_oveja_por_identificacion(identificacion)
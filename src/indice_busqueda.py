@@ -0,0 +1,247 @@
+"""
+Índice de búsqueda para FlockLedger
+Búsqueda por subcadena sobre las ovejas de una explotación sin recorrer todo el registro
+"""
+
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from models import Explotacion, Oveja
+
+# Campos indexados: nombre de columna y cómo obtener su valor
+CAMPOS_BUSQUEDA = (
+    ('Nº Orden', lambda o: str(o.numero_orden)),
+    ('Identificación', lambda o: o.identificacion),
+    ('Año Nacimiento', lambda o: str(o.ano_nacimiento)),
+    ('Fecha Identificación', lambda o: o.fecha_identificacion),
+    ('Raza', lambda o: o.raza),
+    ('Sexo', lambda o: o.sexo),
+    ('Causa Alta', lambda o: o.alta.causa if o.alta else ''),
+    ('Fecha Alta', lambda o: o.alta.fecha if o.alta else ''),
+    ('Procedencia', lambda o: o.alta.procedencia if o.alta else ''),
+    ('Guía Alta', lambda o: o.alta.guia if o.alta else ''),
+    ('Causa Baja', lambda o: o.baja.causa if o.baja else ''),
+    ('Fecha Baja', lambda o: o.baja.fecha if o.baja else ''),
+    ('Destino', lambda o: o.baja.destino if o.baja else ''),
+    ('Guía Baja', lambda o: o.baja.guia if o.baja else ''),
+)
+
+# Marcas de inicio y fin para que los valores cortos también tengan trigramas
+_INICIO = '\x02'
+_FIN = '\x03'
+
+# Valores sin ninguna oveja que se toleran antes de compactar el índice
+# (se compacta cuando además superan a los valores en uso)
+MIN_VALORES_COMPACTAR = 1024
+
+# Ovejas indexadas entre dos avisos de progreso al construir el índice
+TAMANO_BLOQUE_INDICE = 10000
+
+
+def _trigramas(texto: str) -> set:
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusqueda:
+    """
+    Índice de trigramas sobre los valores distintos de cada campo
+    
+    Cada valor distinto (en minúsculas) recibe un identificador; los
+    trigramas apuntan a valores y cada valor a las ovejas que lo tienen.
+    Una consulta solo revisa los valores que comparten su trigrama más raro,
+    así que el coste depende del número de coincidencias y no del tamaño
+    del registro. Se mantiene al día suscribiéndose a la explotación; los
+    valores que se quedan sin ovejas salen del vocabulario y, al compactar,
+    también de los trigramas.
+    
+    Con seguir=False no se suscribe: así se puede construir en un hilo de
+    fondo (progreso(hechas, total) se llama cada TAMANO_BLOQUE_INDICE
+    ovejas) y llamar a seguir() desde el hilo que hace los cambios.
+    """
+    
+    def __init__(self, explotacion: Explotacion, seguir: bool = True,
+                 progreso: Optional[Callable[[int, int], None]] = None):
+        self.explotacion = explotacion
+        # Orden de inserción de cada oveja, para devolver resultados en orden
+        self._secuencia: Dict[int, int] = {}
+        self._ovejas: Dict[int, Oveja] = {}
+        self._siguiente = 0
+        # Vocabulario por campo: valor -> identificador de valor
+        self._vocabulario: List[Dict[str, int]] = [{} for _ in CAMPOS_BUSQUEDA]
+        # Identificador de valor -> valor (None si ya no lo tiene ninguna oveja)
+        self._valores: List[Optional[str]] = []
+        self._sin_ovejas = 0
+        # Identificador de valor -> secuencia de oveja, o set si hay varias
+        self._postings: list = []
+        # Trigrama -> identificadores de valor que lo contienen
+        self._trigramas: Dict[str, array] = {}
+        
+        # El índice guarda referencias a las ovejas: una explotación diferida
+        # (ver ExplotacionDiferida) tiene que construir antes las definitivas
+        materializar = getattr(explotacion, 'materializar', None)
+        if materializar is not None:
+            materializar()
+        ovejas = list(explotacion.ovejas)
+        for inicio in range(0, len(ovejas), TAMANO_BLOQUE_INDICE):
+            for oveja in ovejas[inicio:inicio + TAMANO_BLOQUE_INDICE]:
+                self.oveja_agregada(oveja)
+            if progreso:
+                progreso(min(inicio + TAMANO_BLOQUE_INDICE, len(ovejas)), len(ovejas))
+        if seguir:
+            self.seguir()
+    
+    def seguir(self):
+        """Empezar a seguir los cambios de la explotación"""
+        self.explotacion.suscribir(self)
+    
+    def cerrar(self):
+        """Dejar de seguir los cambios de la explotación"""
+        self.explotacion.desuscribir(self)
+    
+    def oveja_agregada(self, oveja: Oveja):
+        """Indexar una oveja nueva"""
+        secuencia = self._siguiente
+        self._siguiente += 1
+        self._secuencia[id(oveja)] = secuencia
+        self._ovejas[secuencia] = oveja
+        self._indexar_valores(oveja, secuencia)
+    
+    def oveja_eliminada(self, oveja: Oveja):
+        """Quitar una oveja del índice"""
+        secuencia = self._secuencia.pop(id(oveja), None)
+        if secuencia is None:
+            return
+        del self._ovejas[secuencia]
+        self._desindexar_valores(oveja, secuencia)
+    
+    def oveja_antes_de_modificar(self, oveja: Oveja):
+        """Retirar los valores actuales antes de que cambien"""
+        secuencia = self._secuencia.get(id(oveja))
+        if secuencia is not None:
+            self._desindexar_valores(oveja, secuencia)
+    
+    def oveja_modificada(self, oveja: Oveja):
+        """Indexar los valores nuevos conservando la posición de la oveja"""
+        secuencia = self._secuencia.get(id(oveja))
+        if secuencia is not None:
+            self._indexar_valores(oveja, secuencia)
+    
+    def buscar(self, texto: str) -> List[Oveja]:
+        """Ovejas con algún campo que contenga el texto (sin distinguir mayúsculas)"""
+        consulta = texto.lower()
+        if not consulta:
+            return []
+        
+        secuencias = set()
+        valores = self._valores
+        for id_valor in self._candidatos(consulta):
+            valor = valores[id_valor]
+            if valor is not None and consulta in valor:
+                self._recoger(id_valor, secuencias)
+        return [self._ovejas[s] for s in sorted(secuencias)]
+    
+    def filtrar(self, campo: str, valor: str) -> List[Oveja]:
+        """Ovejas cuyo campo es exactamente el valor (p. ej. Raza = Merino)"""
+        indice_campo = [nombre for nombre, _ in CAMPOS_BUSQUEDA].index(campo)
+        id_valor = self._vocabulario[indice_campo].get(valor.lower())
+        secuencias = set()
+        if id_valor is not None:
+            self._recoger(id_valor, secuencias)
+        return [self._ovejas[s] for s in sorted(secuencias)]
+    
+    def _candidatos(self, consulta: str):
+        """Identificadores de valor que pueden contener la consulta"""
+        if len(consulta) >= 3:
+            listas = []
+            for trigrama in _trigramas(consulta):
+                lista = self._trigramas.get(trigrama)
+                if lista is None:
+                    return ()
+                listas.append(lista)
+            return min(listas, key=len)
+        
+        # Consultas de 1-2 caracteres: recorrer los trigramas (no los valores)
+        candidatos = set()
+        for trigrama, lista in self._trigramas.items():
+            if consulta in trigrama:
+                candidatos.update(lista)
+        return candidatos
+    
+    def _recoger(self, id_valor: int, secuencias: set):
+        posting = self._postings[id_valor]
+        if isinstance(posting, set):
+            secuencias.update(posting)
+        elif posting is not None:
+            secuencias.add(posting)
+    
+    def _nuevo_valor(self, vocabulario: Dict[str, int], valor: str) -> int:
+        """Dar de alta un valor distinto y sus trigramas"""
+        id_valor = len(self._valores)
+        vocabulario[valor] = id_valor
+        self._valores.append(valor)
+        self._postings.append(None)
+        for trigrama in _trigramas(_INICIO + valor + _FIN):
+            lista = self._trigramas.get(trigrama)
+            if lista is None:
+                lista = self._trigramas[trigrama] = array('I')
+            lista.append(id_valor)
+        return id_valor
+    
+    def _indexar_valores(self, oveja: Oveja, secuencia: int):
+        postings = self._postings
+        for vocabulario, (_, obtener) in zip(self._vocabulario, CAMPOS_BUSQUEDA):
+            valor = obtener(oveja)
+            if not valor:
+                continue
+            valor = valor.lower()
+            id_valor = vocabulario.get(valor)
+            if id_valor is None:
+                id_valor = self._nuevo_valor(vocabulario, valor)
+            posting = postings[id_valor]
+            if posting is None:
+                postings[id_valor] = secuencia
+            elif isinstance(posting, set):
+                posting.add(secuencia)
+            else:
+                postings[id_valor] = {posting, secuencia}
+    
+    def _desindexar_valores(self, oveja: Oveja, secuencia: int):
+        for indice_campo, (_, obtener) in enumerate(CAMPOS_BUSQUEDA):
+            valor = obtener(oveja)
+            if not valor:
+                continue
+            id_valor: Optional[int] = self._vocabulario[indice_campo].get(valor.lower())
+            if id_valor is None:
+                continue
+            posting = self._postings[id_valor]
+            if posting == secuencia:
+                # Sin ovejas: fuera del vocabulario; sus trigramas se limpian al compactar
+                self._postings[id_valor] = None
+                self._valores[id_valor] = None
+                del self._vocabulario[indice_campo][valor.lower()]
+                self._sin_ovejas += 1
+            elif isinstance(posting, set):
+                posting.discard(secuencia)
+                if len(posting) == 1:
+                    self._postings[id_valor] = posting.pop()
+        
+        if self._sin_ovejas > max(MIN_VALORES_COMPACTAR, len(self._valores) - self._sin_ovejas):
+            self._compactar()
+    
+    def _compactar(self):
+        """Renumerar los valores en uso y quitar de los trigramas los que ya no tienen ovejas"""
+        en_uso = [id_valor for id_valor, valor in enumerate(self._valores) if valor is not None]
+        nuevos = {viejo: nuevo for nuevo, viejo in enumerate(en_uso)}
+        self._valores = [self._valores[id_valor] for id_valor in en_uso]
+        self._postings = [self._postings[id_valor] for id_valor in en_uso]
+        for vocabulario in self._vocabulario:
+            for valor, id_valor in vocabulario.items():
+                vocabulario[valor] = nuevos[id_valor]
+        
+        trigramas = {}
+        for trigrama, lista in self._trigramas.items():
+            lista = array('I', [nuevos[id_valor] for id_valor in lista if id_valor in nuevos])
+            if lista:
+                trigramas[trigrama] = lista
+        self._trigramas = trigramas
+        self._sin_ovejas = 0
@@ -0,0 +1,371 @@
+"""
+Instantáneas binarias del registro para FlockLedger
+Copia por columnas de un CSV, guardada junto a él, que se abre sin volver a parsearlo
+"""
+
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from itertools import compress
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+
+from deteccion_csv import FilasDesalineadas
+from models import (Explotacion, Oveja, CAMPOS_OVEJA, CAMPOS_CATEGORICOS, TAMANO_LOTE_CSV,
+                    firma_archivo, leer_csv_por_lotes, _construir_ovejas, _columnas_de_ovejas)
+
+# Formato del archivo:
+#   MAGIA, longitud de la cabecera (uint64 little-endian), cabecera JSON
+#   y después los arreglos de cada columna y los índices, alineados a
+#   ALINEACION bytes.
+# La cabecera guarda la firma (tamaño, mtime_ns) del CSV del que se sacó:
+# si el CSV ya no tiene esa firma, la instantánea no vale. También guarda
+# el resumen de filas desalineadas del CSV (ver FilasDesalineadas), para
+# repetir el aviso al abrirla.
+MAGIA = b'FLKINST\x00'
+VERSION = 3
+ALINEACION = 64
+EXTENSION = '.instantanea'
+
+# Codificación de cada campo de CAMPOS_OVEJA:
+#   'entero': int32, o int64 si algún valor no cabe; 'logico': uint8;
+#   'categorica': códigos uint8, uint16 o int32 (el menor en que quepan) y
+#   los valores distintos en la cabecera;
+#   'texto': los valores en UTF-8, cada uno terminado en NUL, y el
+#   desplazamiento (uint32 o int64) del comienzo de cada uno, más el final.
+_ENTEROS = {'numero_orden', 'ano_nacimiento'}
+_LOGICOS = {'alta', 'baja'}
+TIPOS = {
+    campo: 'entero' if campo in _ENTEROS else
+           'logico' if campo in _LOGICOS else
+           'categorica' if campo in CAMPOS_CATEGORICOS else 'texto'
+    for campo in CAMPOS_OVEJA
+}
+
+
+def ruta_instantanea(ruta_csv: str) -> str:
+    """Archivo de la instantánea de un CSV"""
+    return ruta_csv + EXTENSION
+
+
+class _Columna:
+    """Una columna de la instantánea que se escribe por bloques en archivos temporales"""
+    
+    def __init__(self, tipo: str, directorio: str):
+        self.tipo = tipo
+        self.filas = 0
+        # Mínimo y máximo de una columna entera, para elegir su tipo final
+        self.minimo = self.maximo = 0
+        self.categorias = {} if tipo == 'categorica' else None
+        self.datos = tempfile.TemporaryFile(dir=directorio)
+        self.desplazamientos = None
+        if tipo == 'texto':
+            # Desplazamientos en int64 mientras se escribe; al final se reducen si caben en 32 bits
+            self.bytes_texto = 0
+            self.desplazamientos = tempfile.TemporaryFile(dir=directorio)
+            self.desplazamientos.write(np.zeros(1, dtype='<i8').tobytes())
+    
+    def agregar(self, valores: list):
+        tipo = self.tipo
+        if tipo == 'entero':
+            arreglo = np.array(valores, dtype='<i8')
+            if len(arreglo):
+                self.minimo = min(self.minimo, int(arreglo.min()))
+                self.maximo = max(self.maximo, int(arreglo.max()))
+            self.datos.write(arreglo.tobytes())
+        elif tipo == 'logico':
+            self.datos.write(np.array(valores, dtype='u1').tobytes())
+        elif tipo == 'categorica':
+            categorias = self.categorias
+            codigos = [categorias.setdefault(valor, len(categorias)) for valor in valores]
+            self.datos.write(np.array(codigos, dtype='<i4').tobytes())
+        elif valores:
+            texto = '\x00'.join(valores) + '\x00'
+            if texto.count('\x00') != len(valores):
+                raise ValueError("Un texto contiene el carácter NUL")
+            datos = texto.encode('utf-8')
+            if len(datos) == len(texto):
+                longitudes = np.fromiter(map(len, valores), dtype='<i8', count=len(valores))
+            else:
+                longitudes = np.array([len(valor.encode('utf-8')) for valor in valores], dtype='<i8')
+            self.desplazamientos.write((self.bytes_texto + np.cumsum(longitudes + 1)).astype('<i8').tobytes())
+            self.datos.write(datos)
+            self.bytes_texto += len(datos)
+        self.filas += len(valores)
+    
+    def arreglos(self) -> list:
+        """(dtype en el archivo final, elementos, temporal, dtype del temporal) de cada arreglo"""
+        if self.tipo == 'entero':
+            cabe = -2**31 <= self.minimo and self.maximo < 2**31
+            return [('<i4' if cabe else '<i8', self.filas, self.datos, '<i8')]
+        if self.tipo == 'logico':
+            return [('|u1', self.filas, self.datos, '|u1')]
+        if self.tipo == 'categorica':
+            distintas = len(self.categorias)
+            tipo_codigos = '|u1' if distintas <= 2**8 else '<u2' if distintas <= 2**16 else '<i4'
+            return [(tipo_codigos, self.filas, self.datos, '<i4')]
+        tipo_desplazamientos = '<u4' if self.bytes_texto < 2**32 else '<i8'
+        return [('|u1', self.bytes_texto, self.datos, '|u1'),
+                (tipo_desplazamientos, self.filas + 1, self.desplazamientos, '<i8')]
+    
+    def cerrar(self):
+        self.datos.close()
+        if self.desplazamientos is not None:
+            self.desplazamientos.close()
+
+
+def _copiar(origen, destino, tipo_origen: str, tipo_destino: str):
+    """Copiar un arreglo de un temporal al archivo final, convirtiéndolo por bloques si hace falta"""
+    origen.seek(0)
+    if tipo_origen == tipo_destino:
+        shutil.copyfileobj(origen, destino, 1 << 20)
+        return
+    tamano_elemento = np.dtype(tipo_origen).itemsize
+    while True:
+        bloque = origen.read(tamano_elemento << 20)
+        if not bloque:
+            break
+        destino.write(np.frombuffer(bloque, dtype=tipo_origen).astype(tipo_destino).tobytes())
+
+
+def escribir_instantanea_por_lotes(lotes: Iterable[List[Oveja]], ruta_csv: str, firma: tuple,
+                                   desalineadas: Optional[FilasDesalineadas] = None):
+    """
+    Escribir una instantánea a partir de bloques de ovejas
+    
+    Solo un bloque está en memoria a la vez: cada columna se acumula en un
+    archivo temporal (en la carpeta del destino) y al final se ensamblan.
+    Incluye el índice por número de orden (ver Instantanea.indices).
+    firma es la del CSV al que corresponde y desalineadas, si se indica,
+    las filas desalineadas anotadas al leerlo (se leen después de agotar
+    lotes). Se escribe en un temporal que reemplaza al archivo anterior
+    con os.replace.
+    """
+    ruta = ruta_instantanea(ruta_csv)
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    columnas = {campo: _Columna(TIPOS[campo], directorio) for campo in CAMPOS_OVEJA}
+    try:
+        for lote in lotes:
+            for campo, valores in zip(CAMPOS_OVEJA, _columnas_de_ovejas(lote)):
+                columnas[campo].agregar(valores)
+        filas = columnas['numero_orden'].filas
+        
+        # Índice: posiciones ordenadas por número de orden (estable: en empate, la primera)
+        ordenes = columnas['numero_orden'].datos
+        ordenes.flush()
+        ordenes.seek(0)
+        indice = np.argsort(np.fromfile(ordenes, dtype='<i8', count=filas), kind='stable')
+        indice = indice.astype('<u4' if filas < 2**32 else '<i8')
+        
+        arreglos = []
+        descripcion = {}
+        for campo, columna in columnas.items():
+            partes = columna.arreglos()
+            descripcion[campo] = {'arreglos': [(dtype, cantidad) for dtype, cantidad, _, _ in partes]}
+            if columna.categorias is not None:
+                descripcion[campo]['categorias'] = list(columna.categorias)
+            arreglos += partes
+        
+        cabecera = {
+            'version': VERSION, 'firma': list(firma), 'filas': filas, 'columnas': descripcion,
+            'indices': {'numero_orden': (indice.dtype.str, len(indice))},
+        }
+        if desalineadas:
+            cabecera['desalineadas'] = desalineadas.como_dict()
+        json_cabecera = json.dumps(cabecera, ensure_ascii=False).encode('utf-8')
+        
+        with open(temporal, 'wb') as archivo:
+            archivo.write(MAGIA + struct.pack('<Q', len(json_cabecera)) + json_cabecera)
+            for dtype, _, origen, tipo_origen in arreglos:
+                archivo.write(b'\x00' * (-archivo.tell() % ALINEACION))
+                _copiar(origen, archivo, tipo_origen, dtype)
+            archivo.write(b'\x00' * (-archivo.tell() % ALINEACION))
+            archivo.write(indice.tobytes())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    finally:
+        for columna in columnas.values():
+            columna.cerrar()
+
+
+def escribir_instantanea(ovejas: List[Oveja], ruta_csv: str, firma: tuple = None):
+    """
+    Escribir la instantánea de un CSV recién guardado con estas ovejas
+    
+    firma es la del CSV tras guardarlo (por defecto, la actual).
+    """
+    if firma is None:
+        firma = firma_archivo(ruta_csv)
+    lotes = (ovejas[inicio:inicio + TAMANO_LOTE_CSV] for inicio in range(0, len(ovejas), TAMANO_LOTE_CSV))
+    escribir_instantanea_por_lotes(lotes, ruta_csv, firma)
+
+
+def borrar_instantanea(ruta_csv: str):
+    """Borrar la instantánea de un CSV que acaba de cambiar (si la hay)"""
+    try:
+        os.remove(ruta_instantanea(ruta_csv))
+    except OSError:
+        # Si no se puede borrar tampoco se usará: su firma ya no es la del CSV
+        pass
+
+
+def crear_instantanea(ruta_csv: str, progreso: Optional[Callable[[int, int], None]] = None):
+    """
+    Crear la instantánea de un CSV leyéndolo por bloques
+    
+    Sirve para registros que no caben en memoria como Explotacion.
+    progreso(bytes_leidos, bytes_totales) como en leer_csv_por_lotes.
+    """
+    firma = firma_archivo(ruta_csv)
+    desalineadas = FilasDesalineadas()
+    lotes = leer_csv_por_lotes(ruta_csv, progreso=progreso, desalineadas=desalineadas)
+    escribir_instantanea_por_lotes(lotes, ruta_csv, firma, desalineadas)
+
+
+class Instantanea:
+    """
+    Instantánea abierta con mmap
+    
+    Los arreglos de cada columna son vistas sobre el archivo mapeado: no se
+    lee nada hasta que se usa. Mientras haya arreglos en uso el mapa sigue
+    abierto (se cierra al liberarlos).
+    """
+    
+    def __init__(self, ruta: str):
+        with open(ruta, 'rb') as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        inicio = len(MAGIA) + 8
+        if self._mapa[:len(MAGIA)] != MAGIA:
+            raise ValueError(f"No es una instantánea: {ruta}")
+        longitud, = struct.unpack('<Q', self._mapa[len(MAGIA):inicio])
+        cabecera = json.loads(self._mapa[inicio:inicio + longitud].decode('utf-8'))
+        if cabecera['version'] != VERSION:
+            raise ValueError(f"Versión de instantánea no admitida: {cabecera['version']}")
+        
+        self.firma = tuple(cabecera['firma'])
+        self.filas = cabecera['filas']
+        # Resumen de filas desalineadas del CSV (ver FilasDesalineadas.como_dict), o None
+        self.desalineadas = cabecera.get('desalineadas')
+        self.categorias = {}
+        # Campo -> arreglos; para los textos, también su posición en el archivo
+        self.arreglos = {}
+        self.posiciones = {}
+        posicion = inicio + longitud
+        
+        def leer(dtype, cantidad):
+            nonlocal posicion
+            posicion += -posicion % ALINEACION
+            arreglo = np.frombuffer(self._mapa, dtype=dtype, count=cantidad, offset=posicion)
+            posicion += arreglo.nbytes
+            return arreglo
+        
+        for campo in CAMPOS_OVEJA:
+            columna = cabecera['columnas'][campo]
+            self.posiciones[campo] = posicion + -posicion % ALINEACION
+            self.arreglos[campo] = [leer(dtype, cantidad) for dtype, cantidad in columna['arreglos']]
+            if 'categorias' in columna:
+                self.categorias[campo] = [sys.intern(valor) for valor in columna['categorias']]
+        # Índices: posiciones de las filas ordenadas por el campo
+        self.indices = {campo: leer(dtype, cantidad) for campo, (dtype, cantidad) in cabecera['indices'].items()}
+    
+    def columna(self, campo: str, inicio: int = 0, fin: int = None) -> list:
+        """Valores de una columna (de las filas inicio a fin) como lista de Python"""
+        if fin is None:
+            fin = self.filas
+        tipo = TIPOS[campo]
+        arreglos = self.arreglos[campo]
+        if tipo == 'entero':
+            return arreglos[0][inicio:fin].tolist()
+        if tipo == 'logico':
+            return arreglos[0][inicio:fin].astype(bool).tolist()
+        if tipo == 'categorica':
+            return list(map(self.categorias[campo].__getitem__, arreglos[0][inicio:fin].tolist()))
+        if inicio >= fin:
+            return []
+        # Cada texto termina en NUL: un split los separa todos (sobra el último trozo)
+        datos, desplazamientos = arreglos
+        texto = datos[desplazamientos[inicio]:desplazamientos[fin]].tobytes().decode('utf-8')
+        return texto.split('\x00')[:-1]
+    
+    def ovejas(self, inicio: int = 0, fin: int = None, mascara=None) -> List[Oveja]:
+        """
+        Ovejas de las filas inicio a fin (por defecto, todas)
+        
+        Con mascara (una secuencia de booleanos de fin - inicio elementos)
+        solo se construyen las ovejas de las filas marcadas.
+        """
+        columnas = (self.columna(campo, inicio, fin) for campo in CAMPOS_OVEJA)
+        if mascara is not None:
+            columnas = (list(compress(valores, mascara)) for valores in columnas)
+        return _construir_ovejas(*columnas)
+    
+    def fila_de_texto(self, campo: str, valor: str) -> Optional[int]:
+        """
+        Primera fila cuyo campo de texto vale valor, o None
+        
+        Busca los bytes directamente en el archivo mapeado (sin decodificar
+        ni construir nada); solo se leen las páginas recorridas.
+        """
+        datos, desplazamientos = self.arreglos[campo]
+        inicio = self.posiciones[campo]
+        fin = inicio + len(datos)
+        buscado = valor.encode('utf-8') + b'\x00'
+        if self._mapa[inicio:inicio + len(buscado)] == buscado:
+            return 0
+        posicion = self._mapa.find(b'\x00' + buscado, inicio, fin)
+        if posicion < 0:
+            return None
+        # El valor empieza tras el NUL encontrado; su fila es la de ese desplazamiento
+        return int(np.searchsorted(desplazamientos, posicion + 1 - inicio))
+
+
+def abrir_instantanea(ruta_csv: str) -> Optional[Instantanea]:
+    """
+    Abrir la instantánea de un CSV si existe y corresponde a su versión actual
+    
+    Retorna None si no hay instantánea, si el CSV cambió después de
+    escribirla o si está dañada.
+    """
+    ruta = ruta_instantanea(ruta_csv)
+    try:
+        instantanea = Instantanea(ruta)
+        if instantanea.firma != firma_archivo(ruta_csv):
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return instantanea
+
+
+def cargar_explotacion(ruta_csv: str, codigo: str, nombre: str = None,
+                       progreso=None, desalineadas=None) -> Explotacion:
+    """
+    Cargar un CSV del registro, desde su instantánea si está al día
+    
+    Desde la instantánea no se construye ninguna oveja: se devuelve una
+    ExplotacionDiferida que lee el archivo mapeado hasta el primer cambio.
+    Si no está al día se lee el CSV con Explotacion.from_csv.
+    progreso(hechos, total) y desalineadas se usan como en from_csv (las
+    filas desalineadas se toman de la cabecera de la instantánea).
+    """
+    instantanea = abrir_instantanea(ruta_csv)
+    if instantanea is None:
+        return Explotacion.from_csv(ruta_csv, codigo=codigo, nombre=nombre, progreso=progreso,
+                                    desalineadas=desalineadas)
+    
+    from explotacion_mapeada import ExplotacionDiferida
+    if desalineadas is not None and instantanea.desalineadas:
+        desalineadas.cargar(instantanea.desalineadas)
+    explotacion = ExplotacionDiferida(instantanea, codigo=codigo, nombre=nombre)
+    if progreso:
+        progreso(1, 1)
+    return explotacion
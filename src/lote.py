@@ -0,0 +1,212 @@
+"""
+Procesamiento por lotes para FlockLedger
+Carga, valida, resume y exporta varios CSV desde la línea de comandos, sin interfaz gráfica
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from deteccion_csv import FilasDesalineadas
+from instantanea import cargar_explotacion
+from utils import ValidadorDatos, FormateadorDatos
+
+
+def buscar_archivos(entradas: List[str]) -> List[str]:
+    """Expandir directorios y patrones glob a una lista ordenada de CSV sin repetidos"""
+    archivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            archivos += glob.glob(os.path.join(entrada, '*.csv'))
+        else:
+            archivos += glob.glob(entrada) or [entrada]
+    return sorted(dict.fromkeys(os.path.abspath(a) for a in archivos))
+
+
+def nombres_salida(archivos: List[str]) -> List[str]:
+    """
+    Nombre base de los archivos de salida de cada CSV
+    
+    Es el nombre del CSV sin extensión. Si varios CSV de carpetas distintas
+    se llaman igual (sin distinguir mayúsculas), se usa su ruta relativa a
+    la carpeta común con '_' entre carpetas (granja_a/ES1.csv ->
+    granja_a_ES1); si aun así coincide con otro, se le añade un número.
+    """
+    bases = [os.path.splitext(os.path.basename(ruta))[0] for ruta in archivos]
+    repetidas = {clave for clave, veces in Counter(base.casefold() for base in bases).items() if veces > 1}
+    comun = None
+    if repetidas:
+        try:
+            comun = os.path.commonpath([os.path.dirname(os.path.abspath(ruta)) for ruta in archivos])
+        except ValueError:
+            # Rutas en unidades distintas: solo queda numerar
+            pass
+    
+    nombres = []
+    usados = set()
+    for ruta, base in zip(archivos, bases):
+        nombre = base
+        if base.casefold() in repetidas and comun is not None:
+            relativa = os.path.splitext(os.path.relpath(os.path.abspath(ruta), comun))[0]
+            nombre = '_'.join(parte for parte in relativa.replace(os.sep, '/').split('/') if parte)
+        candidato, numero = nombre, 2
+        while candidato.casefold() in usados:
+            candidato, numero = f"{nombre}_{numero}", numero + 1
+        usados.add(candidato.casefold())
+        nombres.append(candidato)
+    return nombres
+
+
+def procesar_archivo(ruta: str, salida: str, exportar_pdf: bool = True, modo_pdf: str = 'tabla',
+                     nombre: str = None) -> dict:
+    """
+    Cargar, validar, resumir y exportar un CSV
+    
+    Los archivos de salida se llaman nombre_resumen.txt y nombre.pdf (por
+    defecto, el código: el nombre del CSV sin extensión; ver
+    nombres_salida). Retorna un diccionario con el resultado, apto para el
+    informe JSON; si algo falla el error queda en la clave 'error' en
+    lugar de propagarse.
+    """
+    codigo = os.path.splitext(os.path.basename(ruta))[0]
+    nombre = nombre or codigo
+    resultado = {'archivo': ruta, 'codigo': codigo}
+    inicio = time.perf_counter()
+    
+    try:
+        desalineadas = FilasDesalineadas()
+        explotacion = cargar_explotacion(ruta, codigo=codigo, nombre=codigo, desalineadas=desalineadas)
+        resultado['ovejas'] = explotacion.total_ovejas()
+        if desalineadas:
+            resultado['desalineadas'] = desalineadas.resumen()
+        
+        es_valida, errores = ValidadorDatos.validar_explotacion(explotacion)
+        resultado['valida'] = es_valida
+        resultado['errores'] = {str(numero): lista for numero, lista in errores.items()}
+        
+        ruta_resumen = os.path.join(salida, f"{nombre}_resumen.txt")
+        with open(ruta_resumen, 'w', encoding='utf-8') as f:
+            f.write(FormateadorDatos.generar_resumen_explotacion(explotacion))
+        resultado['resumen'] = ruta_resumen
+        
+        if exportar_pdf:
+            from pdf_export import exportar_explotacion_a_pdf
+            ruta_pdf = os.path.join(salida, f"{nombre}.pdf")
+            exitoso, mensaje = exportar_explotacion_a_pdf(explotacion, ruta_pdf, modo=modo_pdf)
+            if not exitoso:
+                raise RuntimeError(mensaje)
+            resultado['pdf'] = ruta_pdf
+    except Exception as e:
+        resultado['error'] = str(e)
+    
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def procesar_lote(archivos: List[str], salida: str, workers: int = 1, exportar_pdf: bool = True,
+                  modo_pdf: str = 'tabla'):
+    """
+    Procesar los archivos, un proceso por archivo; genera los resultados en el orden de entrada
+    
+    Cada archivo escribe con su nombre de nombres_salida, así que dos CSV
+    con el mismo nombre en carpetas distintas no se pisan la salida.
+    """
+    nombres = nombres_salida(archivos)
+    if workers <= 1 or len(archivos) <= 1:
+        for ruta, nombre in zip(archivos, nombres):
+            yield procesar_archivo(ruta, salida, exportar_pdf, modo_pdf, nombre)
+        return
+    
+    n = len(archivos)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(procesar_archivo, archivos, [salida] * n, [exportar_pdf] * n, [modo_pdf] * n, nombres)
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description="Procesar registros de explotaciones (CSV) sin interfaz gráfica: "
+                    "validar, generar el resumen y exportar a PDF."
+    )
+    parser.add_argument('entradas', nargs='+', help="Archivos CSV, directorios o patrones glob")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument('-o', '--salida', default='.', help="Directorio para resúmenes y PDF")
+    parser.add_argument('--informe-json', metavar='RUTA', help="Escribir un informe JSON con los resultados")
+    parser.add_argument('--sin-pdf', action='store_true', help="No exportar a PDF")
+    parser.add_argument('--modo-pdf', choices=('tabla', 'rapido'), default='tabla',
+                        help="Motor de PDF: 'tabla' (platypus) o 'rapido' (dibujo directo en el canvas)")
+    parser.add_argument('--pdf-combinado', metavar='RUTA',
+                        help="Unir además todos los PDF en uno, con un marcador por explotación (requiere pypdf)")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    """Punto de entrada del modo por lotes; retorna el código de salida"""
+    args = crear_parser().parse_args(argv)
+    
+    archivos = buscar_archivos(args.entradas)
+    if not archivos:
+        print("No se encontraron archivos CSV", file=sys.stderr)
+        return 2
+    # pypdf es opcional: sin él se falla antes de crear la salida o exportar nada
+    if args.pdf_combinado:
+        if args.sin_pdf:
+            print("--pdf-combinado no es compatible con --sin-pdf", file=sys.stderr)
+            return 2
+        from pdf_export import comprobar_pypdf
+        try:
+            comprobar_pypdf()
+        except ImportError as e:
+            print(str(e), file=sys.stderr)
+            return 2
+    os.makedirs(args.salida, exist_ok=True)
+    
+    inicio = time.perf_counter()
+    resultados = []
+    for resultado in procesar_lote(archivos, args.salida, args.workers, not args.sin_pdf, args.modo_pdf):
+        resultados.append(resultado)
+        nombre = os.path.basename(resultado['archivo'])
+        if 'error' in resultado:
+            print(f"[ERROR] {nombre}: {resultado['error']}")
+        elif resultado['valida']:
+            print(f"[OK]    {nombre}: {resultado['ovejas']} ovejas")
+        else:
+            print(f"[AVISO] {nombre}: {resultado['ovejas']} ovejas, {len(resultado['errores'])} con errores")
+        if 'desalineadas' in resultado:
+            print(f"[AVISO] {nombre}: {resultado['desalineadas']}")
+    
+    if args.pdf_combinado:
+        from pdf_export import combinar_pdfs
+        # Marcador: el nombre del PDF, que distingue los códigos repetidos
+        combinar_pdfs([(os.path.splitext(os.path.basename(r['pdf']))[0], r['pdf'])
+                       for r in resultados if 'pdf' in r], args.pdf_combinado)
+        print(f"PDF combinado: {args.pdf_combinado}")
+    duracion = time.perf_counter() - inicio
+    
+    fallidos = sum(1 for r in resultados if 'error' in r)
+    print(f"\n{len(resultados)} archivos ({fallidos} fallidos) en {duracion:.2f} s: "
+          f"{len(resultados) / duracion:.2f} archivos/s")
+    
+    if args.informe_json:
+        informe = {
+            'archivos': len(resultados),
+            'fallidos': fallidos,
+            'segundos': round(duracion, 3),
+            'archivos_por_segundo': round(len(resultados) / duracion, 3),
+            'resultados': resultados,
+        }
+        with open(args.informe_json, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+    
+    return 1 if fallidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
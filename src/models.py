@@ -3,12 +3,74 @@ Modelos de datos para FlockLedger
 Define las estructuras de datos para Explotación, Oveja, Alta y Baja
 """
 
-from dataclasses import dataclass, asdict
-from datetime import datetime
-from typing import Optional, List
+import copy
+import csv
+import io
+import os
+import re
+import shutil
+import sys
+from dataclasses import dataclass, asdict, field
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Optional, List, Callable, Iterable, Iterator
 
 
-@dataclass
+# Columnas del registro en el orden en que se exportan
+COLUMNAS = [
+    'Nº Orden',
+    'Identificación',
+    'Año Nacimiento',
+    'Fecha Identificación',
+    'Raza',
+    'Sexo',
+    'Causa Alta',
+    'Fecha Alta',
+    'Procedencia',
+    'Guía Alta',
+    'Causa Baja',
+    'Fecha Baja',
+    'Destino',
+    'Guía Baja',
+]
+
+# Campos de una oveja por columnas, en el orden de los argumentos de
+# _construir_ovejas (alta y baja indican si la oveja tiene alta o baja)
+CAMPOS_OVEJA = (
+    'numero_orden', 'identificacion', 'ano_nacimiento', 'fecha_identificacion', 'raza', 'sexo',
+    'alta', 'causa_alta', 'fecha_alta', 'procedencia', 'guia_alta',
+    'baja', 'causa_baja', 'fecha_baja', 'destino', 'guia_baja',
+)
+
+# Campo de CAMPOS_OVEJA que corresponde a cada columna de COLUMNAS
+# (alta y baja no tienen columna propia)
+CAMPO_DE_COLUMNA = dict(zip(COLUMNAS, (campo for campo in CAMPOS_OVEJA if campo not in ('alta', 'baja'))))
+
+# Campos de texto con pocos valores distintos
+CAMPOS_CATEGORICOS = frozenset({
+    'fecha_identificacion', 'raza', 'sexo', 'causa_alta', 'fecha_alta', 'procedencia',
+    'causa_baja', 'fecha_baja', 'destino',
+})
+
+# Las mismas, como columnas: al leer se internan para compartir los str
+COLUMNAS_CATEGORICAS = frozenset(
+    columna for columna, campo in CAMPO_DE_COLUMNA.items() if campo in CAMPOS_CATEGORICOS
+)
+
+# Sin __dict__ por instancia (dataclass(slots=True) requiere Python 3.10+)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Filas por bloque al leer CSV de forma incremental
+TAMANO_LOTE_CSV = 50000
+
+# Campos de más que se toleran en una fila de CSV (ver leer_csv_por_lotes)
+CAMPOS_DE_MAS = 4
+
+# Filas por bloque al leer .xlsx: openpyxl entrega tuplas de celdas, que
+# ocupan bastante más que las columnas de texto de un bloque de CSV
+TAMANO_LOTE_XLSX = 10000
+
+@dataclass(**_SLOTS)
 class Alta:
     """Modelo de datos para el alta de una oveja"""
     causa: str
@@ -20,7 +82,7 @@ class Alta:
         return asdict(self)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Baja:
     """Modelo de datos para la baja de una oveja"""
     causa: str
@@ -32,7 +94,7 @@ class Baja:
         return asdict(self)
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Oveja:
     """Modelo de datos para una oveja"""
     numero_orden: int
@@ -115,25 +177,153 @@ class Explotacion:
     codigo: str
     nombre: Optional[str] = None
     ovejas: List[Oveja] = None
+    # Índices hash: clave -> Oveja, o lista de Ovejas si la clave está repetida
+    _por_orden: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _por_identificacion: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Objetos notificados de los cambios (ver suscribir)
+    _observadores: list = field(default_factory=list, init=False, repr=False, compare=False)
+    # Contadores mantenidos en vivo (ver EstadisticasExplotacion.activar_contadores)
+    contadores: Optional[object] = field(default=None, init=False, repr=False, compare=False)
+    # Cambios desde el último guardado (ver seguir_cambios)
+    cambios: Optional['CambiosPendientes'] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.ovejas is None:
             self.ovejas = []
+        self.reindexar()
+    
+    def __reduce__(self):
+        # Al copiar a otro proceso solo viajan los datos, por columnas (mucho
+        # más rápido de serializar que un objeto por oveja): los índices se
+        # reconstruyen y los observadores (ventanas, contadores) se quedan.
+        # Se recibe una Explotacion aunque se envíe una subclase
+        return (_explotacion_desde_columnas, (self.codigo, self.nombre, _columnas_de_ovejas(self.ovejas)))
+    
+    def __copy__(self):
+        # copy y deepcopy no pasan por __reduce__: copian todos los atributos como en cualquier objeto
+        copia = object.__new__(type(self))
+        copia.__dict__.update(self.__dict__)
+        return copia
+    
+    def __deepcopy__(self, memo):
+        copia = object.__new__(type(self))
+        memo[id(self)] = copia
+        copia.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return copia
+    
+    def reindexar(self):
+        """
+        Reconstruir los índices por número de orden e identificación
+        
+        Solo es necesario si se modifica self.ovejas o los campos clave
+        de una oveja sin pasar por los métodos de la explotación.
+        """
+        self._por_orden = {}
+        self._por_identificacion = {}
+        for oveja in self.ovejas:
+            self._indexar(oveja)
+    
+    def _indexar(self, oveja: Oveja):
+        _indice_agregar(self._por_orden, oveja.numero_orden, oveja)
+        if oveja.identificacion:
+            _indice_agregar(self._por_identificacion, oveja.identificacion, oveja)
+    
+    def _desindexar(self, oveja: Oveja):
+        _indice_quitar(self._por_orden, oveja.numero_orden, oveja)
+        if oveja.identificacion:
+            _indice_quitar(self._por_identificacion, oveja.identificacion, oveja)
+    
+    def suscribir(self, observador):
+        """
+        Registrar un observador de cambios en la explotación
+        
+        El observador debe implementar oveja_agregada(oveja) y
+        oveja_eliminada(oveja), que se llaman tras cada alta o baja de
+        una oveja en la lista, y oveja_antes_de_modificar(oveja) y
+        oveja_modificada(oveja), que rodean cada modificación hecha con
+        modificar_oveja, asignar_alta o asignar_baja.
+        """
+        self._observadores.append(observador)
+    
+    def desuscribir(self, observador):
+        """Dejar de notificar a un observador"""
+        if observador in self._observadores:
+            self._observadores.remove(observador)
     
     def agregar_oveja(self, oveja: Oveja):
         """Agregar una oveja a la explotación"""
         self.ovejas.append(oveja)
+        self._indexar(oveja)
+        for observador in self._observadores:
+            observador.oveja_agregada(oveja)
+    
+    def agregar_ovejas(self, ovejas: List[Oveja]):
+        """Agregar varias ovejas a la explotación"""
+        self.ovejas.extend(ovejas)
+        for oveja in ovejas:
+            self._indexar(oveja)
+        for observador in self._observadores:
+            for oveja in ovejas:
+                observador.oveja_agregada(oveja)
     
     def eliminar_oveja(self, numero_orden: int):
         """Eliminar una oveja por número de orden"""
-        self.ovejas = [o for o in self.ovejas if o.numero_orden != numero_orden]
+        self.eliminar_ovejas([numero_orden])
+    
+    def eliminar_ovejas(self, numeros_orden: Iterable[int]):
+        """Eliminar varias ovejas por número de orden en una sola pasada"""
+        eliminadas = []
+        for numero_orden in set(numeros_orden):
+            eliminadas.extend(_indice_obtener(self._por_orden, numero_orden))
+        
+        if not eliminadas:
+            return
+        
+        for oveja in eliminadas:
+            self._desindexar(oveja)
+        
+        ids_eliminadas = {id(oveja) for oveja in eliminadas}
+        self.ovejas[:] = [o for o in self.ovejas if id(o) not in ids_eliminadas]
+        
+        for observador in self._observadores:
+            for oveja in eliminadas:
+                observador.oveja_eliminada(oveja)
+    
+    def modificar_oveja(self, oveja: Oveja, **cambios):
+        """
+        Modificar campos de una oveja de la explotación
+        
+        Mantiene al día los índices y avisa a los observadores; los cambios
+        hechos asignando atributos directamente no se notifican.
+        """
+        self._desindexar(oveja)
+        for observador in self._observadores:
+            observador.oveja_antes_de_modificar(oveja)
+        
+        for campo, valor in cambios.items():
+            setattr(oveja, campo, valor)
+        
+        self._indexar(oveja)
+        for observador in self._observadores:
+            observador.oveja_modificada(oveja)
+    
+    def asignar_alta(self, oveja: Oveja, alta: Optional[Alta]):
+        """Registrar (o quitar, con None) el alta de una oveja"""
+        self.modificar_oveja(oveja, alta=alta)
+    
+    def asignar_baja(self, oveja: Oveja, baja: Optional[Baja]):
+        """Registrar (o quitar, con None) la baja de una oveja"""
+        self.modificar_oveja(oveja, baja=baja)
     
     def obtener_oveja(self, numero_orden: int) -> Optional[Oveja]:
         """Obtener una oveja por número de orden"""
-        for oveja in self.ovejas:
-            if oveja.numero_orden == numero_orden:
-                return oveja
-        return None
+        ovejas = _indice_obtener(self._por_orden, numero_orden)
+        return ovejas[0] if ovejas else None
+    
+    def obtener_oveja_por_identificacion(self, identificacion: str) -> Optional[Oveja]:
+        """Obtener una oveja por su identificación (crotal ES...)"""
+        ovejas = _indice_obtener(self._por_identificacion, identificacion)
+        return ovejas[0] if ovejas else None
     
     def obtener_ovejas_con_alta(self) -> List[Oveja]:
         """Obtener todas las ovejas con alta registrada"""
@@ -161,45 +351,789 @@ class Explotacion:
         data = [oveja.to_dict() for oveja in self.ovejas]
         return pd.DataFrame(data)
     
+    def seguir_cambios(self) -> 'CambiosPendientes':
+        """
+        Anotar desde ahora las ovejas agregadas, modificadas y eliminadas
+        
+        Con los cambios anotados, to_csv solo añade las filas nuevas al
+        final del archivo cuando es posible (ver guardar_csv).
+        """
+        if self.cambios is None:
+            self.cambios = CambiosPendientes()
+            self.suscribir(self.cambios)
+        return self.cambios
+    
+    def to_csv(self, ruta: str, tamano_lote: int = TAMANO_LOTE_CSV,
+               progreso: Optional[Callable[[int, int], None]] = None):
+        """Guardar el registro en CSV (ver guardar_csv, o escribir_csv sin seguir_cambios)"""
+        if self.cambios is None:
+            escribir_csv(self.ovejas, ruta, tamano_lote, progreso)
+            return
+        
+        pendientes = self.cambios.extraer()
+        try:
+            firma = guardar_csv(self.ovejas, ruta, pendientes, tamano_lote, progreso)
+        except BaseException:
+            self.cambios.restaurar(pendientes)
+            raise
+        self.cambios.marcar_guardado(ruta, firma)
+    
+    def to_xlsx(self, ruta: str, tamano_lote: int = TAMANO_LOTE_CSV,
+                progreso: Optional[Callable[[int, int], None]] = None):
+        """Guardar el registro en un libro .xlsx (ver escribir_xlsx)"""
+        escribir_xlsx(self.ovejas, ruta, tamano_lote, progreso)
+    
     @classmethod
     def from_dataframe(cls, df, codigo: str, nombre: str = None):
-        """Crear explotación desde DataFrame de pandas"""
-        explotacion = cls(codigo=codigo, nombre=nombre)
+        """
+        Crear explotación desde DataFrame de pandas
         
-        for _, row in df.iterrows():
-            oveja = Oveja.from_dict(row.to_dict())
-            explotacion.agregar_oveja(oveja)
+        Convierte columnas completas de una vez en lugar de recorrer
+        fila a fila; el resultado es equivalente a aplicar Oveja.from_dict
+        sobre cada fila, salvo que un entero infinito da 0 en lugar de
+        OverflowError.
+        """
+        return cls(codigo=codigo, nombre=nombre, ovejas=_ovejas_desde_dataframe(df))
+    
+    @classmethod
+    def from_csv(cls, ruta: str, codigo: str, nombre: str = None,
+                 tamano_lote: int = TAMANO_LOTE_CSV,
+                 progreso: Optional[Callable[[int, int], None]] = None,
+                 desalineadas: Optional['FilasDesalineadas'] = None):
+        """
+        Crear explotación leyendo un CSV por bloques
         
+        Nunca se mantiene el DataFrame completo en memoria: cada bloque se
+        convierte a ovejas y se descarta. progreso(bytes_leidos, bytes_totales)
+        se llama tras cada bloque. Las filas con campos de más se anotan en
+        desalineadas (ver leer_csv_por_lotes).
+        """
+        explotacion = cls(codigo=codigo, nombre=nombre)
+        for lote in leer_csv_por_lotes(ruta, tamano_lote, progreso, desalineadas):
+            explotacion.agregar_ovejas(lote)
+        return explotacion
+    
+    @classmethod
+    def from_xlsx(cls, ruta: str, codigo: str, nombre: str = None,
+                  tamano_lote: int = TAMANO_LOTE_XLSX,
+                  progreso: Optional[Callable[[int, int], None]] = None):
+        """
+        Crear explotación leyendo un libro .xlsx por bloques
+        
+        Las filas se recorren en modo read_only de openpyxl (ver
+        leer_xlsx_por_lotes). progreso(filas_leidas, filas_totales) se llama
+        tras cada bloque.
+        """
+        explotacion = cls(codigo=codigo, nombre=nombre)
+        for lote in leer_xlsx_por_lotes(ruta, tamano_lote, progreso):
+            explotacion.agregar_ovejas(lote)
         return explotacion
 
 
-class RepositorioExplotaciones:
-    """Repositorio para gestionar múltiples explotaciones"""
+def _indice_agregar(indice: dict, clave, oveja: Oveja):
+    """Registrar una oveja bajo una clave del índice"""
+    actual = indice.get(clave)
+    if actual is None:
+        indice[clave] = oveja
+    elif isinstance(actual, list):
+        actual.append(oveja)
+    else:
+        indice[clave] = [actual, oveja]
+
+
+def _indice_quitar(indice: dict, clave, oveja: Oveja):
+    """Quitar una oveja concreta (por identidad) de una clave del índice"""
+    actual = indice.get(clave)
+    if actual is oveja:
+        del indice[clave]
+    elif isinstance(actual, list):
+        restantes = [o for o in actual if o is not oveja]
+        if len(restantes) == 1:
+            indice[clave] = restantes[0]
+        elif restantes:
+            indice[clave] = restantes
+        else:
+            del indice[clave]
+
+
+def _indice_obtener(indice: dict, clave) -> List[Oveja]:
+    """Ovejas registradas bajo una clave, en orden de inserción"""
+    actual = indice.get(clave)
+    if actual is None:
+        return []
+    if isinstance(actual, list):
+        return list(actual)
+    return [actual]
+
+
+def _int_o_cero(valor) -> int:
+    """int(valor), o 0 si no es convertible (como en Oveja.from_dict)"""
+    try:
+        return int(valor)
+    except (ValueError, TypeError, OverflowError):
+        return 0
+
+
+def _columna_entera(serie) -> list:
+    """
+    Conversión vectorizada a int con 0 para valores no convertibles
+    
+    Da lo mismo que _int_o_cero valor a valor; solo se convierten uno a
+    uno los valores que no son enteros escritos en ASCII.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        return serie.fillna(0).astype('int64').tolist()
+    
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+        return np.where(np.isfinite(valores), valores, 0).astype('int64').tolist()
+    
+    try:
+        # numpy convierte cada objeto con int(); solo falla si hay algún valor no convertible
+        return serie.to_numpy(dtype=object).astype('int64').tolist()
+    except (ValueError, TypeError, OverflowError):
+        pass
+    
+    # Los enteros en texto ASCII se convierten de una vez; el resto
+    # ('１２', '1_000', 2.5, True, textos no numéricos...) uno a uno con int()
+    valores = serie.tolist()
+    texto = serie.astype(str).str.strip()
+    validos = texto.str.fullmatch(_ENTERO.pattern).fillna(False).to_numpy(dtype=bool)
+    enteros = pd.to_numeric(texto.where(validos, '0')).astype('int64').tolist()
+    for posicion in np.flatnonzero(~validos).tolist():
+        enteros[posicion] = _int_o_cero(valores[posicion])
+    return enteros
+
+
+def _columna_texto(serie) -> list:
+    """Convertir una columna a lista de str (equivalente a str(valor))"""
+    import pandas as pd
+    
+    if pd.api.types.is_string_dtype(serie.dtype) and not serie.isna().any():
+        return serie.tolist()
+    return [str(valor) for valor in serie.tolist()]
+
+
+def _columna_presente(serie):
+    """Máscara con el valor de verdad de cada celda (como en Oveja.from_dict)"""
+    return serie.to_numpy(dtype=object).astype(bool)
+
+
+def _ovejas_desde_dataframe(df) -> List[Oveja]:
+    """Construir todas las ovejas de un DataFrame en una sola pasada"""
+    import numpy as np
+    
+    n = len(df)
+    if n == 0:
+        return []
+    
+    def texto(columna):
+        if columna not in df.columns:
+            return [''] * n
+        valores = _columna_texto(df[columna])
+        if columna in COLUMNAS_CATEGORICAS:
+            return list(map(sys.intern, valores))
+        return valores
+    
+    def entero(columna):
+        if columna in df.columns:
+            return _columna_entera(df[columna])
+        return [0] * n
+    
+    def presente(columna):
+        if columna in df.columns:
+            return _columna_presente(df[columna])
+        return np.zeros(n, dtype=bool)
+    
+    con_alta = (presente('Causa Alta') | presente('Fecha Alta')).tolist()
+    con_baja = (presente('Causa Baja') | presente('Fecha Baja')).tolist()
+    
+    return _construir_ovejas(
+        entero('Nº Orden'), texto('Identificación'), entero('Año Nacimiento'),
+        texto('Fecha Identificación'), texto('Raza'), texto('Sexo'),
+        con_alta, texto('Causa Alta'), texto('Fecha Alta'),
+        texto('Procedencia'), texto('Guía Alta'),
+        con_baja, texto('Causa Baja'), texto('Fecha Baja'),
+        texto('Destino'), texto('Guía Baja'),
+    )
+
+
+def leer_csv_por_lotes(ruta: str, tamano_lote: int = TAMANO_LOTE_CSV,
+                       progreso: Optional[Callable[[int, int], None]] = None,
+                       desalineadas: Optional['FilasDesalineadas'] = None) -> Iterator[List[Oveja]]:
+    """
+    Leer un CSV del registro por bloques, devolviendo listas de ovejas
+    
+    La codificación, el separador y la posición de cada columna se toman
+    de los primeros KB del archivo (ver detectar_formato), así que valen
+    UTF-8, UTF-16 o cp1252, con ',', ';', tabulador o '|', y cabeceras con
+    otros nombres o en otro orden. Cada columna se lee en la posición de su
+    cabecera; las filas con más campos que la cabecera se anotan en
+    desalineadas, si se indica, para informar de todas juntas. Una fila
+    con más de CAMPOS_DE_MAS campos de más hace fallar la lectura.
+    
+    Si la codificación detectada falla más adelante en el archivo, se
+    vuelve a leer con la siguiente de codificaciones_reserva y se sigue
+    desde la primera fila aún no devuelta.
+    """
+    import numpy as np
+    import pandas as pd
+    from deteccion_csv import codificaciones_reserva, detectar_formato
+    
+    formato = detectar_formato(ruta)
+    # Columnas de reserva tras las de la cabecera: si alguna no está vacía,
+    # la fila trae campos de más
+    nombres = [f'_{posicion}' for posicion in range(formato.campos + CAMPOS_DE_MAS)]
+    for columna, posicion in formato.posiciones.items():
+        nombres[posicion] = columna
+    sobrantes = nombres[formato.campos:]
+    if desalineadas is not None:
+        desalineadas.campos = formato.campos
+    
+    total = os.path.getsize(ruta)
+    codificaciones = (formato.codificacion, *codificaciones_reserva(formato.codificacion))
+    # Filas ya devueltas: al reintentar con otra codificación se saltan
+    devueltas = 0
+    for intento, codificacion in enumerate(codificaciones):
+        leidas = 0
+        try:
+            with open(ruta, 'rb') as archivo:
+                # Leer como texto puro para evitar conversiones automáticas
+                lector = pd.read_csv(
+                    archivo, encoding=codificacion, sep=formato.separador,
+                    header=None, skiprows=1, names=nombres,
+                    dtype=str, na_filter=False, chunksize=tamano_lote
+                )
+                with lector:
+                    for bloque in lector:
+                        if leidas < devueltas:
+                            saltar = min(devueltas - leidas, len(bloque))
+                            leidas += saltar
+                            bloque = bloque.iloc[saltar:]
+                            if bloque.empty:
+                                continue
+                        if desalineadas is not None:
+                            # La cabecera es la línea 1
+                            filas = np.flatnonzero((bloque[sobrantes].to_numpy() != '').any(axis=1))
+                            desalineadas.anotar((filas + leidas + 2).tolist())
+                        leidas += len(bloque)
+                        devueltas = leidas
+                        ovejas = _ovejas_desde_dataframe(bloque)
+                        del bloque
+                        if progreso:
+                            progreso(min(archivo.tell(), total), total)
+                        yield ovejas
+        except UnicodeDecodeError:
+            if intento == len(codificaciones) - 1:
+                raise
+        else:
+            break
+    
+    if progreso:
+        progreso(total, total)
+
+
+_ALTA_VACIA = Alta('', '', '', '')
+_BAJA_VACIA = Baja('', '', '', '')
+
+
+def fila_csv(oveja: Oveja) -> tuple:
+    """Valores de una oveja en el orden de COLUMNAS (como Oveja.to_dict, sin el diccionario)"""
+    alta = oveja.alta or _ALTA_VACIA
+    baja = oveja.baja or _BAJA_VACIA
+    return (
+        oveja.numero_orden, oveja.identificacion, oveja.ano_nacimiento,
+        oveja.fecha_identificacion, oveja.raza, oveja.sexo,
+        alta.causa, alta.fecha, alta.procedencia, alta.guia,
+        baja.causa, baja.fecha, baja.destino, baja.guia,
+    )
+
+
+def escribir_csv(ovejas: List[Oveja], ruta: str, tamano_lote: int = TAMANO_LOTE_CSV,
+                 progreso: Optional[Callable[[int, int], None]] = None):
+    """
+    Escribir el registro en CSV por bloques, sin pasar por pandas
+    
+    Se escribe en un archivo temporal junto al destino que luego lo
+    reemplaza con os.replace: si el proceso se interrumpe (o progreso lanza
+    una excepción) el archivo anterior queda intacto. El nuevo archivo
+    conserva los permisos del que reemplaza. progreso(filas_escritas, total)
+    se llama tras cada bloque.
+    """
+    total = len(ovejas)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        # Mismo formato que DataFrame.to_csv: QUOTE_MINIMAL y fin de línea del sistema
+        with open(temporal, 'x', newline='', encoding='utf-8', buffering=1 << 20) as archivo:
+            escritor = csv.writer(archivo, lineterminator=os.linesep)
+            escritor.writerow(COLUMNAS)
+            for inicio in range(0, total, tamano_lote):
+                escritor.writerows(map(fila_csv, ovejas[inicio:inicio + tamano_lote]))
+                if progreso:
+                    progreso(min(inicio + tamano_lote, total), total)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        if os.path.exists(ruta):
+            shutil.copymode(ruta, temporal)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def firma_archivo(ruta: str) -> tuple:
+    """Tamaño y fecha de modificación: si cambian, el archivo no es el que escribimos"""
+    estado = os.stat(ruta)
+    return estado.st_size, estado.st_mtime_ns
+
+
+def firma_para_agregar(ruta: str) -> Optional[tuple]:
+    """
+    Firma de un CSV al que agregar_filas_csv puede añadir filas, o None
+    
+    Hace falta que el archivo tenga el formato de escribir_csv (UTF-8 sin
+    BOM, ',' y las columnas de COLUMNAS en su orden, con el fin de línea
+    del sistema) y que acabe en fin de línea. Solo se leen la cabecera y
+    los últimos bytes. Al abrir un archivo se toma antes de leerlo: si
+    cambia mientras se lee, la firma ya no coincide y el primer guardado
+    lo reescribe.
+    """
+    cabecera = (','.join(COLUMNAS) + os.linesep).encode('utf-8')
+    fin = os.linesep.encode('utf-8')
+    try:
+        firma = firma_archivo(ruta)
+        with open(ruta, 'rb') as archivo:
+            if archivo.read(len(cabecera)) != cabecera:
+                return None
+            archivo.seek(-len(fin), os.SEEK_END)
+            if archivo.read() != fin:
+                return None
+    except OSError:
+        return None
+    return firma
+
+
+def agregar_filas_csv(ovejas: List[Oveja], ruta: str, tamano: int):
+    """
+    Añadir filas al final de un CSV escrito por escribir_csv
+    
+    tamano es el tamaño esperado del archivo antes de añadir. Si algo
+    falla, el archivo se trunca de nuevo a ese tamaño.
+    """
+    texto = io.StringIO(newline='')
+    csv.writer(texto, lineterminator=os.linesep).writerows(map(fila_csv, ovejas))
+    
+    with open(ruta, 'r+b') as archivo:
+        if archivo.seek(0, os.SEEK_END) != tamano:
+            raise OSError(f"El archivo cambió desde el último guardado: {ruta}")
+        try:
+            archivo.write(texto.getvalue().encode('utf-8'))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        except BaseException:
+            archivo.truncate(tamano)
+            raise
+
+
+def guardar_csv(ovejas: List[Oveja], ruta: str, cambios: 'CambiosPendientes',
+                tamano_lote: int = TAMANO_LOTE_CSV,
+                progreso: Optional[Callable[[int, int], None]] = None) -> tuple:
+    """
+    Guardar el registro haciendo lo mínimo según los cambios anotados
+    
+    Si desde el último guardado en ese archivo solo se han agregado ovejas
+    (según las notificaciones de la explotación) y el archivo conserva la
+    firma de entonces, se añaden sus filas al final; en otro caso se
+    reescribe entero con escribir_csv. Retorna la firma del archivo
+    resultante, para CambiosPendientes.marcar_guardado.
+    
+    progreso se llama antes de empezar a añadir y no después: una vez
+    añadidas las filas, cancelar ya no puede hacer fallar el guardado (y
+    que los cambios restaurados se añadan otra vez).
+    """
+    nuevas = cambios.solo_agregadas(ovejas, ruta)
+    if nuevas is None:
+        escribir_csv(ovejas, ruta, tamano_lote, progreso)
+    else:
+        if progreso:
+            progreso(len(ovejas) - len(nuevas), len(ovejas))
+        agregar_filas_csv(nuevas, ruta, cambios.firma[0])
+    return firma_archivo(ruta)
+
+
+# Hoja del libro en la que escribir_xlsx guarda el registro
+HOJA_XLSX = 'Registro'
+
+_ENTERO = re.compile(r'[+-]?[0-9]+')
+
+
+def _texto_celda(valor) -> str:
+    """Texto de una celda de Excel (vacía -> '', fecha -> dd/mm/aaaa, 5.0 -> '5')"""
+    if valor is None:
+        return ''
+    if isinstance(valor, str):
+        return valor
+    if isinstance(valor, datetime):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    return str(valor)
+
+
+def _entero_celda(valor) -> int:
+    """Entero de una celda de Excel con 0 para valores no convertibles (como _columna_entera)"""
+    return _int_o_cero(valor)
+
+
+def _ovejas_desde_filas(filas: List[tuple], posiciones: dict) -> List[Oveja]:
+    """Construir las ovejas de un bloque de filas de Excel (posiciones: columna -> índice)"""
+    n = len(filas)
+    columnas = list(zip(*filas))
+    
+    def valores(columna):
+        posicion = posiciones.get(columna)
+        return columnas[posicion] if posicion is not None else (None,) * n
+    
+    def texto(columna):
+        resultado = list(map(_texto_celda, valores(columna)))
+        if columna in COLUMNAS_CATEGORICAS:
+            return list(map(sys.intern, resultado))
+        return resultado
+    
+    def entero(columna):
+        return list(map(_entero_celda, valores(columna)))
+    
+    causas_alta, fechas_alta = texto('Causa Alta'), texto('Fecha Alta')
+    causas_baja, fechas_baja = texto('Causa Baja'), texto('Fecha Baja')
+    
+    return _construir_ovejas(
+        entero('Nº Orden'), texto('Identificación'), entero('Año Nacimiento'),
+        texto('Fecha Identificación'), texto('Raza'), texto('Sexo'),
+        [bool(causa or fecha) for causa, fecha in zip(causas_alta, fechas_alta)],
+        causas_alta, fechas_alta, texto('Procedencia'), texto('Guía Alta'),
+        [bool(causa or fecha) for causa, fecha in zip(causas_baja, fechas_baja)],
+        causas_baja, fechas_baja, texto('Destino'), texto('Guía Baja'),
+    )
+
+
+def leer_xlsx_por_lotes(ruta: str, tamano_lote: int = TAMANO_LOTE_XLSX,
+                        progreso: Optional[Callable[[int, int], None]] = None) -> Iterator[List[Oveja]]:
+    """
+    Leer el registro de un libro .xlsx por bloques, devolviendo listas de ovejas
+    
+    Se lee la hoja HOJA_XLSX y, si el libro no la tiene (otro programa la
+    creó o se renombró), la primera. openpyxl en modo read_only recorre las
+    filas del XML sin cargar la hoja: la memoria depende del tamaño del
+    bloque, no del de la hoja. La primera fila es la cabecera (columnas de COLUMNAS en cualquier orden;
+    las que falten quedan vacías) y las filas en blanco se saltan.
+    progreso(filas_leidas, filas_totales) se llama tras cada bloque si el
+    libro declara su tamaño, y siempre al terminar.
+    """
+    from openpyxl import load_workbook
+    
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        hoja = libro[HOJA_XLSX] if HOJA_XLSX in libro.sheetnames else libro.worksheets[0]
+        # Sin la etiqueta dimension (los libros de write_only no la llevan) no hay total
+        total = hoja.max_row
+        filas = hoja.iter_rows(values_only=True)
+        cabecera = next(filas, ())
+        posiciones = {}
+        for posicion, nombre in enumerate(cabecera):
+            if nombre is not None:
+                posiciones.setdefault(str(nombre).strip(), posicion)
+        ancho = len(cabecera)
+        
+        leidas = 1
+        bloque = []
+        for fila in filas:
+            leidas += 1
+            if not any(valor is not None for valor in fila):
+                continue
+            if len(fila) < ancho:
+                fila = fila + (None,) * (ancho - len(fila))
+            bloque.append(fila)
+            if len(bloque) == tamano_lote:
+                yield _ovejas_desde_filas(bloque, posiciones)
+                bloque = []
+                if progreso and total:
+                    progreso(min(leidas, total), total)
+        if bloque:
+            yield _ovejas_desde_filas(bloque, posiciones)
+    finally:
+        libro.close()
+    
+    if progreso:
+        progreso(leidas, leidas)
+
+
+def escribir_xlsx(ovejas: List[Oveja], ruta: str, tamano_lote: int = TAMANO_LOTE_CSV,
+                  progreso: Optional[Callable[[int, int], None]] = None):
+    """
+    Escribir el registro en un libro .xlsx
+    
+    openpyxl en modo write_only vuelca cada fila al XML de la hoja según se
+    añade, sin mantener las celdas en memoria. Como escribir_csv, se escribe
+    en un archivo temporal que luego reemplaza al destino.
+    progreso(filas_escritas, total) se llama tras cada bloque.
+    """
+    from openpyxl import Workbook
+    
+    total = len(ovejas)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet(HOJA_XLSX)
+        hoja.append(COLUMNAS)
+        for inicio in range(0, total, tamano_lote):
+            for oveja in ovejas[inicio:inicio + tamano_lote]:
+                hoja.append(fila_csv(oveja))
+            if progreso:
+                progreso(min(inicio + tamano_lote, total), total)
+        libro.save(temporal)
+        if os.path.exists(ruta):
+            shutil.copymode(ruta, temporal)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+class CambiosPendientes:
+    """
+    Observador que anota los cambios de una explotación desde el último guardado
+    
+    Las ovejas se anotan por identidad. Los cambios hechos sin pasar por
+    los métodos de la explotación no se notifican y no se ven aquí.
+    """
     
     def __init__(self):
+        # id -> oveja (la referencia evita que el id se reutilice); las
+        # agregadas en orden de alta
+        self.agregadas: dict = {}
+        self.modificadas: dict = {}
+        self.eliminadas: dict = {}
+        # Archivo escrito en el último guardado (o abierto) y su firma entonces
+        self.ruta: Optional[str] = None
+        self.firma: Optional[tuple] = None
+    
+    @property
+    def hay_cambios(self) -> bool:
+        return bool(self.agregadas or self.modificadas or self.eliminadas)
+    
+    def oveja_agregada(self, oveja: Oveja):
+        self.agregadas[id(oveja)] = oveja
+    
+    def oveja_eliminada(self, oveja: Oveja):
+        if self.agregadas.pop(id(oveja), None) is None:
+            self.modificadas.pop(id(oveja), None)
+            self.eliminadas[id(oveja)] = oveja
+    
+    def oveja_antes_de_modificar(self, oveja: Oveja):
+        pass
+    
+    def oveja_modificada(self, oveja: Oveja):
+        # Una oveja agregada se guarda con sus valores al guardar: no cuenta como modificada
+        if id(oveja) not in self.agregadas:
+            self.modificadas[id(oveja)] = oveja
+    
+    def extraer(self) -> 'CambiosPendientes':
+        """
+        Separar los cambios anotados hasta ahora para guardarlos
+        
+        Los cambios que lleguen mientras se guarda se anotan aparte; si el
+        guardado falla, restaurar los vuelve a juntar.
+        """
+        extraidos = CambiosPendientes()
+        extraidos.agregadas, self.agregadas = self.agregadas, {}
+        extraidos.modificadas, self.modificadas = self.modificadas, {}
+        extraidos.eliminadas, self.eliminadas = self.eliminadas, {}
+        extraidos.ruta, extraidos.firma = self.ruta, self.firma
+        return extraidos
+    
+    def restaurar(self, extraidos: 'CambiosPendientes'):
+        """Volver a anotar unos cambios extraídos que no llegaron a guardarse"""
+        # Lo eliminado después de extraer ya no está en la lista: no se vuelve a anotar
+        self.agregadas = {clave: oveja for clave, oveja in {**extraidos.agregadas, **self.agregadas}.items()
+                          if clave not in self.eliminadas}
+        self.modificadas = {clave: oveja for clave, oveja in {**extraidos.modificadas, **self.modificadas}.items()
+                            if clave not in self.eliminadas}
+        self.eliminadas = {**extraidos.eliminadas, **self.eliminadas}
+    
+    def marcar_guardado(self, ruta: str, firma: Optional[tuple]):
+        """
+        Registrar que el archivo ruta refleja los cambios extraídos
+        
+        También al abrir un CSV, con su firma_para_agregar. Sin firma (p. ej.
+        un CSV con otro formato) el siguiente guardado reescribe el archivo
+        entero.
+        """
+        self.ruta, self.firma = os.path.abspath(ruta), firma
+    
+    def solo_agregadas(self, ovejas: List[Oveja], ruta: str) -> Optional[List[Oveja]]:
+        """
+        Ovejas a añadir al final del archivo, o None si hay que reescribirlo
+        
+        Solo se puede añadir si el archivo es el del último guardado, no ha
+        cambiado desde entonces, no hubo modificaciones ni bajas y las
+        ovejas agregadas son exactamente las últimas de la lista.
+        """
+        if self.modificadas or self.eliminadas or self.firma is None or self.ruta != os.path.abspath(ruta):
+            return None
+        try:
+            if firma_archivo(ruta) != self.firma:
+                return None
+        except OSError:
+            return None
+        
+        nuevas = list(self.agregadas.values())
+        if len(nuevas) > len(ovejas):
+            return None
+        cola = ovejas[len(ovejas) - len(nuevas):]
+        if any(a is not b for a, b in zip(cola, nuevas)):
+            return None
+        return nuevas
+
+
+def _construir_ovejas(ordenes, identificaciones, anos, fechas_ident, razas, sexos,
+                      con_alta, causas_alta, fechas_alta, procedencias, guias_alta,
+                      con_baja, causas_baja, fechas_baja, destinos, guias_baja) -> List[Oveja]:
+    """Crear los objetos Oveja a partir de columnas ya convertidas"""
+    return [
+        Oveja(
+            orden, ident, ano, fecha_ident, raza, sexo,
+            Alta(causa_a, fecha_a, procedencia, guia_a) if alta else None,
+            Baja(causa_b, fecha_b, destino, guia_b) if baja else None,
+        )
+        for (orden, ident, ano, fecha_ident, raza, sexo,
+             alta, causa_a, fecha_a, procedencia, guia_a,
+             baja, causa_b, fecha_b, destino, guia_b)
+        in zip(ordenes, identificaciones, anos, fechas_ident, razas, sexos,
+               con_alta, causas_alta, fechas_alta, procedencias, guias_alta,
+               con_baja, causas_baja, fechas_baja, destinos, guias_baja)
+    ]
+
+
+def _columnas_de_ovejas(ovejas: List[Oveja]) -> tuple:
+    """Inverso de _construir_ovejas: una lista por argumento"""
+    altas = [oveja.alta for oveja in ovejas]
+    bajas = [oveja.baja for oveja in ovejas]
+    vacia_alta = Alta('', '', '', '')
+    vacia_baja = Baja('', '', '', '')
+    altas_o_vacia = [alta or vacia_alta for alta in altas]
+    bajas_o_vacia = [baja or vacia_baja for baja in bajas]
+    
+    def columna(objetos, campo):
+        return list(map(attrgetter(campo), objetos))
+    
+    return (
+        columna(ovejas, 'numero_orden'), columna(ovejas, 'identificacion'),
+        columna(ovejas, 'ano_nacimiento'), columna(ovejas, 'fecha_identificacion'),
+        columna(ovejas, 'raza'), columna(ovejas, 'sexo'),
+        [alta is not None for alta in altas],
+        columna(altas_o_vacia, 'causa'), columna(altas_o_vacia, 'fecha'),
+        columna(altas_o_vacia, 'procedencia'), columna(altas_o_vacia, 'guia'),
+        [baja is not None for baja in bajas],
+        columna(bajas_o_vacia, 'causa'), columna(bajas_o_vacia, 'fecha'),
+        columna(bajas_o_vacia, 'destino'), columna(bajas_o_vacia, 'guia'),
+    )
+
+
+def _explotacion_desde_columnas(codigo: str, nombre: Optional[str], columnas: tuple) -> Explotacion:
+    return Explotacion(codigo=codigo, nombre=nombre, ovejas=_construir_ovejas(*columnas))
+
+
+class RepositorioExplotaciones:
+    """
+    Repositorio para gestionar múltiples explotaciones
+    
+    Sin almacén, todas las explotaciones viven en memoria. Con un almacén
+    (por ejemplo almacen_sqlite.AlmacenSQLite) las explotaciones se
+    guardan en él al agregarlas y se cargan al pedirlas por primera vez;
+    guardar_cambios escribe las ediciones de las que estén cargadas.
+    """
+    
+    def __init__(self, almacen=None):
+        self.almacen = almacen
+        # Explotaciones en memoria (con almacén, solo las ya cargadas)
         self.explotaciones: dict = {}
     
     def agregar_explotacion(self, explotacion: Explotacion):
         """Agregar una explotación al repositorio"""
+        if self.almacen is not None:
+            self.almacen.guardar(explotacion)
         self.explotaciones[explotacion.codigo] = explotacion
     
     def obtener_explotacion(self, codigo: str) -> Optional[Explotacion]:
         """Obtener una explotación por código"""
-        return self.explotaciones.get(codigo)
+        explotacion = self.explotaciones.get(codigo)
+        if explotacion is None and self.almacen is not None:
+            explotacion = self.almacen.cargar(codigo)
+            if explotacion is not None:
+                self.explotaciones[codigo] = explotacion
+        return explotacion
     
     def eliminar_explotacion(self, codigo: str):
         """Eliminar una explotación"""
+        if self.almacen is not None:
+            self.almacen.eliminar(codigo)
         if codigo in self.explotaciones:
             del self.explotaciones[codigo]
     
+    def guardar_cambios(self) -> int:
+        """Escribir en el almacén las ediciones de las explotaciones cargadas; retorna las ovejas escritas"""
+        if self.almacen is None:
+            return 0
+        return sum(self.almacen.guardar_cambios(explotacion) for explotacion in self.explotaciones.values())
+    
     def obtener_todas(self) -> List[Explotacion]:
-        """Obtener todas las explotaciones"""
-        return list(self.explotaciones.values())
+        """Obtener todas las explotaciones (con almacén, las carga todas)"""
+        return [self.obtener_explotacion(codigo) for codigo in self.obtener_codigos()]
     
     def obtener_codigos(self) -> List[str]:
         """Obtener códigos de todas las explotaciones"""
+        if self.almacen is not None:
+            return self.almacen.codigos()
         return list(self.explotaciones.keys())
     
     def cantidad_explotaciones(self) -> int:
         """Obtener cantidad de explotaciones"""
-        return len(self.explotaciones)
+        return len(self.obtener_codigos())
+    
+    def validar_todas(self, max_workers: int = None) -> dict:
+        """
+        Validar todas las explotaciones, una por proceso
+        
+        Retorna {codigo: (es_valida, errores)} en el orden del repositorio.
+        """
+        from utils import procesar_explotaciones, _validar_explotacion
+        return procesar_explotaciones(_validar_explotacion, self.obtener_todas(), max_workers)
+    
+    def estadisticas_todas(self, max_workers: int = None) -> dict:
+        """
+        Calcular los contadores de todas las explotaciones
+        
+        Las explotaciones en memoria se reparten entre max_workers procesos
+        (ver procesar_explotaciones); con almacén, las no cargadas se cuentan
+        con consultas agregadas, sin leer sus ovejas. Retorna {codigo:
+        ContadoresExplotacion} en el orden del repositorio; son copias, que
+        no cambian con la explotación aunque tenga contadores en vivo.
+        """
+        from utils import procesar_explotaciones, _estadisticas_explotacion
+        
+        if self.almacen is None:
+            return procesar_explotaciones(_estadisticas_explotacion, self.obtener_todas(), max_workers)
+        
+        cargadas = procesar_explotaciones(_estadisticas_explotacion, list(self.explotaciones.values()),
+                                          max_workers)
+        return {
+            codigo: cargadas[codigo] if codigo in cargadas else self.almacen.contadores(codigo)
+            for codigo in self.obtener_codigos()
+        }
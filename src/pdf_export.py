@@ -6,287 +6,612 @@ Genera reportes en PDF con la estructura de "Hoja de Identificación Individual"
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Flowable
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from datetime import datetime
+from functools import lru_cache, partial
 import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from models import Explotacion
 
 
-class ExportadorPDF:
-    """Clase para exportar datos a PDF"""
+# Columnas de la hoja (encabezados cortos para mejor presentación) y su ancho,
+# compartidas por los dos motores de exportación
+COLUMNAS_PDF = [
+    ('Nº Orden', 14*mm),
+    ('Identificación', 22*mm),
+    ('Año Nac.', 14*mm),
+    ('Fecha Ident.', 17*mm),
+    ('Raza', 14*mm),
+    ('Genotipiado', 15*mm),
+    ('Sexo', 11*mm),
+    ('Causa Alta', 14*mm),
+    ('Fecha Alta', 15*mm),
+    ('Procedencia', 15*mm),
+    ('Guía', 13*mm),
+    ('Causa Baja', 14*mm),
+    ('Fecha Baja', 15*mm),
+    ('Destino', 15*mm),
+    ('Guía', 13*mm),
+    ('Incidencias', 14*mm),
+]
+
+# Tipografía y relleno de las celdas: encabezado y datos
+FUENTE_ENCABEZADO, TAMANO_ENCABEZADO, RELLENO_ENCABEZADO = 'Helvetica-Bold', 8.5, 7
+FUENTE_DATOS, TAMANO_DATOS, RELLENO_DATOS = 'Helvetica', 7.5, 5
+
+# Alto de las filas de la tabla: una línea de texto (1.2 x tamaño de fuente) más el relleno
+ALTO_ENCABEZADO = TAMANO_ENCABEZADO * 1.2 + 2 * RELLENO_ENCABEZADO
+ALTO_FILA = TAMANO_DATOS * 1.2 + 2 * RELLENO_DATOS
+
+COLOR_ENCABEZADO = colors.HexColor('#4472C4')
+COLOR_FILA_ALTERNA = colors.HexColor('#F0F0F0')
+COLOR_REJILLA = colors.HexColor('#999999')
+
+# Motores de exportación: 'tabla' maqueta con platypus; 'rapido' dibuja
+# directamente en el canvas la misma hoja, sin maquetación. Las tablas de
+# datos se dibujan igual en los dos (ver _HojaCanvas)
+MODOS_EXPORTACION = ('tabla', 'rapido')
+
+# Celdas formateadas (y anchos de texto) que el motor rápido recuerda como máximo
+MAX_CELDAS_CACHE = 20000
+
+ANCHOS_PDF = [ancho for _, ancho in COLUMNAS_PDF]
+TITULO_PDF = "HOJA DE IDENTIFICACIÓN INDIVIDUAL DEL GANADO OVINO-CAPRINO"
+
+# Estilo de la tabla de datos. Se construye una sola vez y lo comparten
+# todas las exportaciones: no debe modificarse.
+_COMANDOS_TABLA = [
+    # Encabezado: fondo azul, texto blanco, negrita
+    ('BACKGROUND', (0, 0), (-1, 0), COLOR_ENCABEZADO),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, 0), FUENTE_ENCABEZADO),
+    ('FONTSIZE', (0, 0), (-1, 0), TAMANO_ENCABEZADO),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), RELLENO_ENCABEZADO),
+    ('TOPPADDING', (0, 0), (-1, 0), RELLENO_ENCABEZADO),
     
-    def __init__(self, explotacion: Explotacion):
-        self.explotacion = explotacion
-        self.styles = getSampleStyleSheet()
-        
-    def generar_pdf(self, ruta_archivo: str):
-        """Generar PDF con la hoja de identificación"""
-        doc = SimpleDocTemplate(
-            ruta_archivo,
-            pagesize=landscape(A4),
-            rightMargin=10*mm,
-            leftMargin=10*mm,
-            topMargin=15*mm,
-            bottomMargin=10*mm
-        )
-        
-        # Construir el documento
-        elementos = []
-        
-        # Título principal - más grande y prominente
-        titulo_style = ParagraphStyle(
+    # Bordes para encabezado
+    ('LINEBELOW', (0, 0), (-1, 0), 1.5, COLOR_ENCABEZADO),
+    
+    # Datos: alineación, bordes y espaciado
+    ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 1), (-1, -1), FUENTE_DATOS),
+    ('FONTSIZE', (0, 1), (-1, -1), TAMANO_DATOS),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_FILA_ALTERNA]),
+    ('LEFTPADDING', (0, 1), (-1, -1), RELLENO_DATOS),
+    ('RIGHTPADDING', (0, 1), (-1, -1), RELLENO_DATOS),
+    ('TOPPADDING', (0, 1), (-1, -1), RELLENO_DATOS),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), RELLENO_DATOS),
+    
+    # Bordes - Grid completo
+    ('GRID', (0, 0), (-1, -1), 0.5, COLOR_REJILLA),
+    
+    # Línea especial debajo de encabezado
+    ('LINEBELOW', (0, 0), (-1, 0), 2, COLOR_ENCABEZADO),
+]
+ESTILO_TABLA = TableStyle(_COMANDOS_TABLA)
+
+
+@lru_cache(maxsize=None)
+def _estilos_parrafo() -> Dict[str, object]:
+    """
+    Hoja de estilos base y estilos de párrafo de la hoja, creados una vez
+    
+    Se comparten entre exportaciones (e hilos): no deben modificarse.
+    """
+    base = getSampleStyleSheet()
+    return {
+        'base': base,
+        'titulo': ParagraphStyle(
             'CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=base['Heading1'],
             fontSize=16,
             textColor=colors.HexColor('#000000'),
             spaceAfter=12,
             alignment=1,  # Center
             fontName='Helvetica-Bold'
-        )
-        
-        titulo = Paragraph(
-            "HOJA DE IDENTIFICACIÓN INDIVIDUAL DEL GANADO OVINO-CAPRINO",
-            titulo_style
-        )
-        elementos.append(titulo)
-        
-        # Información de la explotación
-        info_text = f"Nº REGISTRO DE EXPLOTACIÓN: <b>{self.explotacion.codigo}</b>"
-        info_style = ParagraphStyle(
+        ),
+        'info': ParagraphStyle(
             'InfoStyle',
-            parent=self.styles['Normal'],
+            parent=base['Normal'],
             fontSize=11,
             spaceAfter=12,
             fontName='Helvetica'
-        )
-        elementos.append(Paragraph(info_text, info_style))
-        elementos.append(Spacer(1, 3*mm))
-        
-        # Crear tabla de datos
-        tabla_datos = self._construir_tabla_datos()
-        elementos.append(tabla_datos)
-        
-        # Información de generación
-        footer_text = f"Generado el: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
-        footer_style = ParagraphStyle(
+        ),
+        'pie': ParagraphStyle(
             'Footer',
-            parent=self.styles['Normal'],
+            parent=base['Normal'],
             fontSize=8,
             textColor=colors.grey,
             spaceAfter=2,
             topPadding=15
+        ),
+    }
+
+
+@lru_cache(maxsize=MAX_CELDAS_CACHE)
+def _ancho_texto(texto: str, fuente: str = FUENTE_DATOS, tamano: float = TAMANO_DATOS) -> float:
+    """Ancho de un texto; las métricas se reutilizan entre páginas y exportaciones"""
+    return stringWidth(texto, fuente, tamano)
+
+
+def fila_pdf(oveja) -> list:
+    """Valores de una oveja en el orden de COLUMNAS_PDF"""
+    alta = oveja.alta
+    baja = oveja.baja
+    return [
+        str(oveja.numero_orden),
+        oveja.identificacion,
+        str(oveja.ano_nacimiento),
+        oveja.fecha_identificacion,
+        oveja.raza,
+        # Genotipiado: la hoja oficial tiene la columna pero Oveja no guarda
+        # ese dato; se deja en blanco para rellenarla a mano
+        '',
+        oveja.sexo,
+        alta.causa if alta else '',
+        alta.fecha if alta else '',
+        alta.procedencia if alta else '',
+        alta.guia if alta else '',
+        baja.causa if baja else '',
+        baja.fecha if baja else '',
+        baja.destino if baja else '',
+        baja.guia if baja else '',
+        ''  # Incidencias (vacío por ahora)
+    ]
+
+
+class _FlowablesPerezosos(list):
+    """
+    Lista de flowables que se rellena desde un iterador a medida que se consume
+    
+    doc.build solo mira el principio de la lista y va borrando lo que coloca,
+    así que basta con tener un par de elementos por delante: el documento
+    nunca tiene en memoria más que las tablas de las páginas en curso.
+    """
+    
+    def __init__(self, iterador: Iterator, reserva: int = 2):
+        super().__init__()
+        self._iterador = iterador
+        self._reserva = reserva
+        self._rellenar()
+    
+    def _rellenar(self):
+        while self._iterador is not None and list.__len__(self) < self._reserva:
+            try:
+                self.append(next(self._iterador))
+            except StopIteration:
+                self._iterador = None
+    
+    def __len__(self):
+        self._rellenar()
+        return list.__len__(self)
+    
+    def __getitem__(self, indice):
+        self._rellenar()
+        return list.__getitem__(self, indice)
+
+
+class ExportadorPDF:
+    """Clase para exportar datos a PDF"""
+    
+    def __init__(self, explotacion: Explotacion):
+        self.explotacion = explotacion
+        self.styles = _estilos_parrafo()['base']
+        
+    def generar_pdf(self, ruta_archivo: str, progreso: Optional[Callable[[int, int], None]] = None):
+        """
+        Generar PDF con la hoja de identificación
+        
+        El registro se parte en una tabla por página (con su encabezado),
+        generadas a medida que el documento las coloca, así que cada página
+        cuesta lo mismo. La memoria sigue creciendo con el número de páginas:
+        reportlab guarda el contenido de cada página terminada, sin
+        comprimir, hasta escribir el archivo al final.
+        progreso(filas, total) se llama tras preparar cada página.
+        """
+        doc = SimpleDocTemplate(
+            ruta_archivo,
+            pagesize=landscape(A4),
+            rightMargin=10*mm,
+            leftMargin=10*mm,
+            topMargin=15*mm,
+            bottomMargin=10*mm
         )
-        elementos.append(Spacer(1, 12*mm))
-        elementos.append(Paragraph(footer_text, footer_style))
+        
+        elementos = self._elementos_cabecera()
+        filas_primera, filas_por_pagina = self._filas_por_pagina(doc.width, doc.height, elementos)
+        pie = self._elementos_pie()
+        
+        def documento():
+            yield from elementos
+            yield from self._tablas_por_pagina(filas_primera, filas_por_pagina, progreso)
+            yield from pie
         
         # Generar PDF
         try:
-            doc.build(elementos)
+            doc.build(_FlowablesPerezosos(documento()))
             return True, f"PDF generado correctamente: {ruta_archivo}"
         except Exception as e:
             return False, f"Error al generar PDF: {str(e)}"
     
-    def _construir_tabla_datos(self):
-        """Construir tabla con datos de las ovejas"""
+    def _elementos_cabecera(self) -> list:
+        """Título e información de la explotación (primera página)"""
+        elementos = []
         
-        # Encabezados más cortos para mejor presentación
-        encabezados = [
-            'Nº Orden',
-            'Identificación',
-            'Año Nac.',
-            'Fecha Ident.',
-            'Raza',
-            'Genotipiado',
-            'Sexo',
-            'Causa Alta',
-            'Fecha Alta',
-            'Procedencia',
-            'Guía',
-            'Causa Baja',
-            'Fecha Baja',
-            'Destino',
-            'Guía',
-            'Incidencias'
-        ]
+        # Título principal - más grande y prominente
+        estilos = _estilos_parrafo()
+        elementos.append(Paragraph(TITULO_PDF, estilos['titulo']))
         
-        # Datos
-        datos_tabla = [encabezados]
+        # Información de la explotación
+        info_text = f"Nº REGISTRO DE EXPLOTACIÓN: <b>{self.explotacion.codigo}</b>"
+        elementos.append(Paragraph(info_text, estilos['info']))
+        elementos.append(Spacer(1, 3*mm))
+        return elementos
+    
+    @staticmethod
+    def _filas_por_pagina(ancho: float, alto: float, cabecera: list) -> tuple:
+        """Filas que caben en la primera página (tras la cabecera) y en las demás"""
+        alto_marco = alto - 12  # relleno por defecto del Frame: 6 arriba y 6 abajo
+        alto_cabecera = sum(e.wrap(ancho - 12, alto_marco)[1] + e.getSpaceAfter() for e in cabecera)
+        filas_primera = max(1, int((alto_marco - alto_cabecera - ALTO_ENCABEZADO) // ALTO_FILA))
+        filas_por_pagina = int((alto_marco - ALTO_ENCABEZADO) // ALTO_FILA)
+        return filas_primera, filas_por_pagina
+    
+    def _elementos_pie(self) -> list:
+        """Información de generación, tras la tabla"""
+        # Información de generación
+        footer_text = f"Generado el: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+        return [Spacer(1, 12*mm), Paragraph(footer_text, _estilos_parrafo()['pie'])]
+    
+    def _tablas_por_pagina(self, filas_primera: int, filas_por_pagina: int,
+                           progreso: Optional[Callable[[int, int], None]] = None) -> Iterator[Flowable]:
+        """Generar una tabla (con encabezado) por página, separadas por saltos de página"""
+        ovejas = self.explotacion.ovejas
+        total = len(ovejas)
+        # Compartida por todas las páginas: las celdas ya medidas se reutilizan
+        hoja = _HojaCanvas(None, 0, ANCHOS_PDF)
+        inicio = 0
+        filas = filas_primera
+        while inicio < total or inicio == 0:
+            if inicio:
+                yield PageBreak()
+            yield _TablaPagina(hoja, ovejas[inicio:inicio + filas])
+            inicio += filas
+            filas = filas_por_pagina
+            if progreso:
+                progreso(min(inicio, total), total)
+    
+    def _construir_tabla_datos(self, ovejas=None, estilo: Optional[TableStyle] = None):
+        """Construir tabla con datos de las ovejas (por defecto, todas)"""
+        if ovejas is None:
+            ovejas = self.explotacion.ovejas
         
-        for oveja in self.explotacion.ovejas:
-            fila = [
-                str(oveja.numero_orden),
-                oveja.identificacion,
-                str(oveja.ano_nacimiento),
-                oveja.fecha_identificacion,
-                oveja.raza,
-                oveja.genotipiado,
-                oveja.sexo,
-                oveja.alta.causa if oveja.alta else '',
-                oveja.alta.fecha if oveja.alta else '',
-                oveja.alta.procedencia if oveja.alta else '',
-                oveja.alta.guia if oveja.alta else '',
-                oveja.baja.causa if oveja.baja else '',
-                oveja.baja.fecha if oveja.baja else '',
-                oveja.baja.destino if oveja.baja else '',
-                oveja.baja.guia if oveja.baja else '',
-                ''  # Incidencias (vacío por ahora)
-            ]
-            datos_tabla.append(fila)
+        datos_tabla = [[encabezado for encabezado, _ in COLUMNAS_PDF]]
+        datos_tabla += [fila_pdf(oveja) for oveja in ovejas]
         
         # Crear tabla con mejores proporciones
         tabla = Table(
             datos_tabla,
-            colWidths=[
-                14*mm,   # Nº Orden
-                22*mm,   # Identificación
-                14*mm,   # Año Nac
-                17*mm,   # Fecha Ident
-                14*mm,   # Raza
-                15*mm,   # Genotipiado
-                11*mm,   # Sexo
-                14*mm,   # Causa Alta
-                15*mm,   # Fecha Alta
-                15*mm,   # Procedencia
-                13*mm,   # Guía
-                14*mm,   # Causa Baja
-                15*mm,   # Fecha Baja
-                15*mm,   # Destino
-                13*mm,   # Guía
-                14*mm    # Incidencias
-            ]
+            colWidths=ANCHOS_PDF,
+            # Alto fijo: sin medir cada celda al maquetar
+            rowHeights=[ALTO_ENCABEZADO] + [ALTO_FILA] * (len(datos_tabla) - 1)
         )
+        # setStyle copia los comandos a la tabla: el estilo compartido no cambia
+        tabla.setStyle(estilo or ESTILO_TABLA)
+        return tabla
+    
+    def _estilo_tabla(self) -> TableStyle:
+        """Estilo de la tabla de datos (compartido por todas las exportaciones)"""
+        return ESTILO_TABLA
+    
+    def generar_pdf_simple(self, ruta_archivo: str, progreso: Optional[Callable[[int, int], None]] = None):
+        """
+        Generar PDF dibujando directamente en el canvas (modo rápido)
         
-        # Estilos mejorados - más profesionales
-        tabla.setStyle(TableStyle([
-            # Encabezado: fondo azul, texto blanco, negrita
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 8.5),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 7),
-            ('TOPPADDING', (0, 0), (-1, 0), 7),
+        Produce la misma hoja que generar_pdf (cabecera, misma paginación,
+        encabezado repetido en cada página, rejilla y filas alternas) sin
+        pasar por la maquetación de platypus, y añade el número de página.
+        Un texto más ancho que su celda se recorta al ancho útil de la
+        celda en lugar de invadir las vecinas.
+        """
+        try:
+            ancho_pagina, alto_pagina = landscape(A4)
+            izquierda, derecha, arriba, abajo = 10*mm, 10*mm, 15*mm, 10*mm
+            ancho_marco = ancho_pagina - izquierda - derecha
+            alto_marco = alto_pagina - arriba - abajo
             
-            # Bordes para encabezado
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, colors.HexColor('#4472C4')),
+            cabecera = self._elementos_cabecera()
+            filas_primera, filas_por_pagina = self._filas_por_pagina(ancho_marco, alto_marco, cabecera)
             
-            # Datos: alineación, bordes y espaciado
-            ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 7.5),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
-            ('LEFTPADDING', (0, 1), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 1), (-1, -1), 5),
-            ('TOPPADDING', (0, 1), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+            # Posición de la tabla: centrada en el marco, como la coloca platypus
+            anchos = ANCHOS_PDF
+            x_tabla = izquierda + 6 + (ancho_marco - 12 - sum(anchos)) / 2
+            y_marco = alto_pagina - arriba - 6
             
-            # Bordes - Grid completo
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#999999')),
+            c = canvas.Canvas(ruta_archivo, pagesize=(ancho_pagina, alto_pagina))
+            hoja = _HojaCanvas(c, x_tabla, anchos)
             
-            # Línea especial debajo de encabezado
-            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#4472C4')),
-        ]))
-        
-        return tabla
+            # Cabecera de la primera página: los mismos párrafos que en generar_pdf
+            y = y_marco
+            for elemento in cabecera:
+                _, alto = elemento.wrap(ancho_marco - 12, alto_marco)
+                elemento.drawOn(c, izquierda + 6, y - alto)
+                y -= alto + elemento.getSpaceAfter()
+            
+            ovejas = self.explotacion.ovejas
+            total = len(ovejas)
+            inicio = 0
+            filas = filas_primera
+            pagina = 1
+            while True:
+                y = hoja.dibujar_tabla(y, map(fila_pdf, ovejas[inicio:inicio + filas]))
+                inicio += filas
+                filas = filas_por_pagina
+                if progreso:
+                    progreso(min(inicio, total), total)
+                if inicio >= total:
+                    break
+                hoja.numerar(pagina, ancho_pagina - derecha, abajo / 2)
+                c.showPage()
+                pagina += 1
+                y = y_marco
+            
+            # Pie tras la tabla (en una página nueva si no cabe)
+            espacio, pie = self._elementos_pie()
+            _, alto = pie.wrap(ancho_marco - 12, alto_marco)
+            y -= espacio.height + alto
+            if y < abajo + 6:
+                hoja.numerar(pagina, ancho_pagina - derecha, abajo / 2)
+                c.showPage()
+                pagina += 1
+                y = y_marco - alto
+            pie.drawOn(c, izquierda + 6, y)
+            hoja.numerar(pagina, ancho_pagina - derecha, abajo / 2)
+            
+            c.save()
+            return True, f"PDF generado correctamente: {ruta_archivo}"
+        except Exception as e:
+            return False, f"Error al generar PDF: {str(e)}"
+
+
+class _HojaCanvas:
+    """
+    Dibujo de la tabla del registro directamente sobre un canvas
     
-    def generar_pdf_simple(self, ruta_archivo: str):
-        """Generar PDF de forma más simple usando canvas directamente"""
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import inch
-        
-        c = canvas.Canvas(ruta_archivo, pagesize=landscape(A4))
-        c.setFont("Helvetica-Bold", 12)
-        
-        # Título
-        c.drawString(20, 550, "HOJA DE IDENTIFICACIÓN INDIVIDUAL DEL GANADO OVINO-CAPRINO")
-        
-        # Información de explotación
-        c.setFont("Helvetica", 10)
-        c.drawString(20, 520, f"Nº REGISTRO DE EXPLOTACIÓN: {self.explotacion.codigo}")
-        
-        # Tabla de datos (usando reportlab Table)
-        y_position = 500
-        x_start = 20
-        
-        # Ancho de columnas
-        col_widths = [30, 60, 35, 50, 30, 30, 25, 35, 40, 40, 35, 35, 40, 40, 35, 30]
-        
-        # Encabezados
-        headers = [
-            'Nº O', 'Nº Ident.', 'Año N.', 'Fecha Ident.', 'Raza', 'Sexo',
-            'Causa A', 'Fecha A', 'Proc.', 'Guía A', 'Causa B', 'Fecha B', 'Dest.', 'Guía B', 'Inc.'
-        ]
-        
-        c.setFont("Helvetica-Bold", 7)
-        c.setFillColor(colors.HexColor('#4472C4'))
+    Todos los textos de la tabla van en un único objeto de texto (Table
+    crea uno por celda). c puede asignarse después, al dibujar.
+    """
+    
+    def __init__(self, c, x: float, anchos: list):
+        self.c = c
+        self.anchos = anchos
+        self.bordes = [x]
+        for ancho in anchos:
+            self.bordes.append(self.bordes[-1] + ancho)
+        self.centros = [(a + b) / 2 for a, b in zip(self.bordes, self.bordes[1:])]
+        # Ancho útil de cada columna y celdas ya formateadas (los valores se repiten mucho)
+        self.utiles = [ancho - 2 * RELLENO_DATOS for ancho in anchos]
+        self._celdas = {}
+        # Línea base del texto centrado verticalmente, relativa al pie de la fila
+        self.base_encabezado = (ALTO_ENCABEZADO + TAMANO_ENCABEZADO * 1.2) / 2 - TAMANO_ENCABEZADO
+        self.base_fila = (ALTO_FILA + TAMANO_DATOS * 1.2) / 2 - TAMANO_DATOS
+    
+    def _celda(self, texto: str, columna: int) -> tuple:
+        """
+        Texto recortado al ancho útil de la columna y su x para centrarlo
         
-        # Dibujar encabezados
-        x_pos = x_start
-        for i, header in enumerate(headers):
-            c.drawString(x_pos, y_position, header)
-            x_pos += col_widths[i]
+        La medida se hace una sola vez por valor distinto.
+        """
+        util = self.utiles[columna]
+        # Se guarda con el valor original, que es con el que se busca
+        original = texto
+        ancho = _ancho_texto(texto)
+        while ancho > util and texto:
+            texto = texto[:-1]
+            ancho = _ancho_texto(texto)
+        x = self.centros[columna] - ancho / 2
+        if len(self._celdas) >= MAX_CELDAS_CACHE:
+            # Identificaciones y guías casi no se repiten: no dejar crecer la caché sin límite
+            self._celdas.clear()
+        celda = self._celdas[original, columna] = (x, texto)
+        return celda
+    
+    def dibujar_tabla(self, y: float, filas) -> float:
+        """Dibujar encabezado y filas con su parte superior en y; retorna el pie de la tabla"""
+        c = self.c
+        x0, x1 = self.bordes[0], self.bordes[-1]
+        filas = list(filas)
+        y_datos = y - ALTO_ENCABEZADO
+        y_fin = y_datos - len(filas) * ALTO_FILA
         
-        # Dibujar datos
-        y_position -= 12
-        c.setFont("Helvetica", 7)
-        c.setFillColor(colors.black)
+        # Fondos: encabezado y filas alternas
+        c.setFillColor(COLOR_ENCABEZADO)
+        c.rect(x0, y_datos, x1 - x0, ALTO_ENCABEZADO, stroke=0, fill=1)
+        c.setFillColor(COLOR_FILA_ALTERNA)
+        for i in range(1, len(filas), 2):
+            c.rect(x0, y_datos - (i + 1) * ALTO_FILA, x1 - x0, ALTO_FILA, stroke=0, fill=1)
         
-        for oveja in self.explotacion.ovejas:
-            fila_datos = [
-                str(oveja.numero_orden),
-                oveja.identificacion,
-                str(oveja.ano_nacimiento),
-                oveja.fecha_identificacion,
-                oveja.raza,
-                oveja.sexo,
-                oveja.alta.causa if oveja.alta else '',
-                oveja.alta.fecha if oveja.alta else '',
-                oveja.alta.procedencia if oveja.alta else '',
-                oveja.alta.guia if oveja.alta else '',
-                oveja.baja.causa if oveja.baja else '',
-                oveja.baja.fecha if oveja.baja else '',
-                oveja.baja.destino if oveja.baja else '',
-                oveja.baja.guia if oveja.baja else '',
-                ''
-            ]
-            
-            x_pos = x_start
-            for i, dato in enumerate(fila_datos):
-                c.drawString(x_pos, y_position, str(dato)[:10])  # Limitar longitud
-                x_pos += col_widths[i]
-            
-            y_position -= 10
-            
-            # Nueva página si se alcanza el final
-            if y_position < 50:
-                c.showPage()
-                y_position = 550
+        # Textos: un único objeto de texto por tabla
+        texto = c.beginText()
+        texto.setFont(FUENTE_ENCABEZADO, TAMANO_ENCABEZADO)
+        texto.setFillColor(colors.whitesmoke)
+        base = y_datos + self.base_encabezado
+        for (encabezado, _), centro in zip(COLUMNAS_PDF, self.centros):
+            texto.setTextOrigin(centro - _ancho_texto(encabezado, FUENTE_ENCABEZADO, TAMANO_ENCABEZADO) / 2, base)
+            texto.textOut(encabezado)
         
-        # Footer
-        c.setFont("Helvetica", 8)
-        c.drawString(20, 20, f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        texto.setFont(FUENTE_DATOS, TAMANO_DATOS)
+        texto.setFillColor(colors.black)
+        celdas = self._celdas
+        origen, escribir = texto.setTextOrigin, texto.textOut
+        base = y_datos - ALTO_FILA + self.base_fila
+        for fila in filas:
+            for columna, valor in enumerate(fila):
+                if valor:
+                    x, recortado = celdas.get((valor, columna)) or self._celda(valor, columna)
+                    origen(x, base)
+                    escribir(recortado)
+            base -= ALTO_FILA
+        c.drawText(texto)
         
-        c.save()
-        return True, f"PDF generado correctamente: {ruta_archivo}"
+        # Rejilla completa y línea bajo el encabezado
+        c.setStrokeColor(COLOR_REJILLA)
+        c.setLineWidth(0.5)
+        horizontales = [y - ALTO_ENCABEZADO - i * ALTO_FILA for i in range(len(filas) + 1)]
+        c.lines(
+            [(x0, yh, x1, yh) for yh in [y] + horizontales]
+            + [(xv, y, xv, y_fin) for xv in self.bordes]
+        )
+        c.setStrokeColor(COLOR_ENCABEZADO)
+        c.setLineWidth(2)
+        c.line(x0, y_datos, x1, y_datos)
+        return y_fin
+    
+    def numerar(self, pagina: int, x: float, y: float):
+        """Número de página en la esquina inferior derecha"""
+        self.c.setFont(FUENTE_DATOS, TAMANO_DATOS)
+        self.c.setFillColor(colors.grey)
+        self.c.drawRightString(x, y, f"Página {pagina}")
 
 
-def exportar_explotacion_a_pdf(explotacion: Explotacion, ruta_archivo: str = None) -> tuple:
+class _TablaPagina(Flowable):
+    """
+    Tabla de una página de generar_pdf, dibujada con _HojaCanvas
+    
+    Las celdas son texto de una línea y las filas tienen alto fijo: platypus
+    solo necesita el tamaño del bloque para maquetarlo, sin el Table (ni el
+    setStyle) de cada página. Las filas se formatean al dibujar.
+    """
+    
+    def __init__(self, hoja: _HojaCanvas, ovejas: list):
+        super().__init__()
+        self.hoja = hoja
+        self.ovejas = ovejas
+        # Centrada en el marco, como Table
+        self.hAlign = 'CENTER'
+        self.width = hoja.bordes[-1] - hoja.bordes[0]
+        self.height = ALTO_ENCABEZADO + len(ovejas) * ALTO_FILA
+    
+    def wrap(self, ancho_disponible, alto_disponible):
+        return self.width, self.height
+    
+    def draw(self):
+        self.hoja.c = self.canv
+        self.hoja.dibujar_tabla(self.height, map(fila_pdf, self.ovejas))
+
+
+def exportar_explotacion_a_pdf(explotacion: Explotacion, ruta_archivo: str = None, modo: str = 'tabla',
+                               progreso: Optional[Callable[[int, int], None]] = None) -> tuple:
     """
     Función auxiliar para exportar una explotación a PDF
     
     Args:
         explotacion: Instancia de Explotacion
         ruta_archivo: Ruta del archivo PDF (si no se especifica, usa el código de la explotación)
+        modo: 'tabla' (maquetación con platypus) o 'rapido' (dibujo directo en el canvas)
+        progreso: Callback progreso(filas, total) opcional
     
     Returns:
         (exitoso: bool, mensaje: str)
     """
+    if modo not in MODOS_EXPORTACION:
+        raise ValueError(f"Modo de exportación desconocido: {modo} (use {' o '.join(MODOS_EXPORTACION)})")
+    
     if ruta_archivo is None:
         ruta_archivo = f"Explotacion_{explotacion.codigo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     
     exportador = ExportadorPDF(explotacion)
-    return exportador.generar_pdf(ruta_archivo)
+    if modo == 'rapido':
+        return exportador.generar_pdf_simple(ruta_archivo, progreso)
+    return exportador.generar_pdf(ruta_archivo, progreso)
+
+
+def _exportar_en_proceso(explotacion: Explotacion, carpeta: str, modo: str) -> dict:
+    """Exportar una explotación y medir el tiempo (se ejecuta en un proceso del pool)"""
+    ruta_archivo = os.path.join(carpeta, f"Explotacion_{explotacion.codigo}.pdf")
+    inicio = time.perf_counter()
+    try:
+        exitoso, mensaje = exportar_explotacion_a_pdf(explotacion, ruta_archivo, modo=modo)
+    except Exception as e:
+        exitoso, mensaje = False, f"Error al generar PDF: {str(e)}"
+    return {
+        'archivo': ruta_archivo,
+        'exitoso': exitoso,
+        'mensaje': mensaje,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def exportar_explotaciones_a_pdf(explotaciones: List[Explotacion], carpeta: str, modo: str = 'tabla',
+                                 max_workers: int = None, ruta_combinado: str = None) -> dict:
+    """
+    Exportar varias explotaciones a PDF, cada una en un proceso
+    
+    Args:
+        explotaciones: Lista de Explotacion (p. ej. repositorio.obtener_todas())
+        carpeta: Carpeta donde se escribe Explotacion_<codigo>.pdf de cada una
+        modo: 'tabla' o 'rapido', como en exportar_explotacion_a_pdf
+        max_workers: Procesos en paralelo (por defecto, uno por CPU)
+        ruta_combinado: Si se indica, une los PDF generados en uno solo con
+            un marcador por explotación (requiere el paquete pypdf)
+    
+    Returns:
+        {codigo: {'archivo', 'exitoso', 'mensaje', 'segundos'}} en el orden
+        de entrada; un fallo en una explotación no detiene las demás
+    """
+    from utils import procesar_explotaciones
+    
+    if modo not in MODOS_EXPORTACION:
+        raise ValueError(f"Modo de exportación desconocido: {modo} (use {' o '.join(MODOS_EXPORTACION)})")
+    if ruta_combinado:
+        comprobar_pypdf()
+    
+    os.makedirs(carpeta, exist_ok=True)
+    resultados = procesar_explotaciones(
+        partial(_exportar_en_proceso, carpeta=carpeta, modo=modo), explotaciones, max_workers,
+        capturar_errores=True
+    )
+    # Fallos fuera de la exportación (p. ej. al enviar la explotación al proceso)
+    for codigo, resultado in resultados.items():
+        if isinstance(resultado, Exception):
+            resultados[codigo] = {
+                'archivo': None,
+                'exitoso': False,
+                'mensaje': f"Error al generar PDF: {str(resultado)}",
+                'segundos': 0.0,
+            }
+    
+    if ruta_combinado:
+        combinar_pdfs(
+            [(codigo, r['archivo']) for codigo, r in resultados.items() if r['exitoso']],
+            ruta_combinado
+        )
+    return resultados
+
+
+def comprobar_pypdf():
+    """Importar pypdf (dependencia opcional, solo para combinar PDF) o lanzar ImportError"""
+    try:
+        import pypdf
+    except ImportError:
+        raise ImportError("Para combinar PDF hace falta el paquete pypdf (pip install pypdf)") from None
+    return pypdf
+
+
+def combinar_pdfs(documentos: List[Tuple[str, str]], ruta_destino: str):
+    """Unir PDF en uno solo; documentos es una lista de (título del marcador, ruta)"""
+    pypdf = comprobar_pypdf()
+    
+    escritor = pypdf.PdfWriter()
+    for titulo, ruta in documentos:
+        escritor.append(ruta, outline_item=titulo)
+    with open(ruta_destino, 'wb') as archivo:
+        escritor.write(archivo)
+    escritor.close()
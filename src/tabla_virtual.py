@@ -0,0 +1,243 @@
+"""
+Tabla virtual para FlockLedger
+Treeview que solo materializa las filas visibles de un registro grande
+"""
+
+from tkinter import ttk
+from typing import List, Optional, Sequence
+
+from models import COLUMNAS, Oveja
+
+# Alto de fila en píxeles (se fija en el estilo del Treeview)
+ALTO_FILA = 20
+
+# Filas extra que se materializan por debajo de la ventana visible
+SOBREBARRIDO = 5
+
+
+class TablaVirtual:
+    """
+    Tabla con desplazamiento virtual
+    
+    El Treeview nunca contiene más que la ventana visible (más un pequeño
+    sobrebarrido); las filas se leen de la secuencia de datos al mover la
+    barra de desplazamiento, por lo que abrir, desplazar y refrescar
+    cuesta lo mismo con 100 ovejas que con 100.000.
+    """
+    
+    def __init__(self, parent, columnas: List[str] = COLUMNAS):
+        self.columnas = list(columnas)
+        self.filas: Sequence[Oveja] = []
+        self.inicio = 0
+        # iid -> oveja y iid -> (texto, valores) de las filas materializadas
+        self._items = {}
+        self._pintado = {}
+        self._seleccion = {}
+        self._renderizando = False
+        
+        ttk.Style().configure('Treeview', rowheight=ALTO_FILA)
+        
+        # Frame para scrollbars
+        tree_frame = ttk.Frame(parent)
+        tree_frame.pack(fill='both', expand=True)
+        
+        # Scrollbar vertical (controla el inicio de la ventana, no el Treeview)
+        self.vsb = ttk.Scrollbar(tree_frame, orient='vertical', command=self._desplazar)
+        self.vsb.pack(side='right', fill='y')
+        
+        # Scrollbar horizontal
+        hsb = ttk.Scrollbar(tree_frame, orient='horizontal')
+        hsb.pack(side='bottom', fill='x')
+        
+        # Crear Treeview
+        self.tree = ttk.Treeview(tree_frame, columns=self.columnas, xscrollcommand=hsb.set)
+        self.tree.pack(fill='both', expand=True)
+        hsb.config(command=self.tree.xview)
+        
+        # Configurar columnas
+        self.tree.column('#0', width=50, anchor='center')
+        self.tree.heading('#0', text='#')
+        for col in self.columnas:
+            self.tree.column(col, width=100, anchor='w')
+            self.tree.heading(col, text=col)
+        
+        self.tree.bind('<Configure>', lambda e: self._renderizar())
+        self.tree.bind('<<TreeviewSelect>>', self._al_seleccionar)
+        self.tree.bind('<MouseWheel>', self._rueda)
+        self.tree.bind('<Button-4>', lambda e: self.desplazar_filas(-3))
+        self.tree.bind('<Button-5>', lambda e: self.desplazar_filas(3))
+        self.tree.bind('<Prior>', lambda e: self._pagina(-1))
+        self.tree.bind('<Next>', lambda e: self._pagina(1))
+        self.tree.bind('<Up>', lambda e: self._flecha(-1))
+        self.tree.bind('<Down>', lambda e: self._flecha(1))
+    
+    def mostrar(self, filas: Sequence[Oveja]):
+        """Mostrar una secuencia de ovejas desde el principio"""
+        self.filas = filas
+        self.inicio = 0
+        self._seleccion = {}
+        self._renderizar()
+    
+    def refrescar(self):
+        """Volver a pintar la ventana visible (p. ej. tras modificar los datos)"""
+        self._renderizar()
+    
+    def ir_a(self, posicion: int, seleccionar: bool = False):
+        """Desplazar la ventana lo justo para que la fila sea visible"""
+        visibles = self.filas_visibles()
+        if posicion < self.inicio:
+            self.inicio = posicion
+        elif posicion >= self.inicio + visibles:
+            self.inicio = posicion - visibles + 1
+        if seleccionar and 0 <= posicion < len(self.filas):
+            oveja = self.filas[posicion]
+            self._seleccion = {id(oveja): oveja}
+        self._renderizar()
+    
+    def filas_eliminadas(self, numeros_orden, filtrar: bool = False):
+        """
+        Actualizar la tabla tras eliminar ovejas de los datos
+        
+        Con filtrar=True también se quitan de la secuencia mostrada, para
+        cuando esta es una lista propia (p. ej. resultados de búsqueda) y
+        no la lista de la explotación.
+        """
+        numeros = set(numeros_orden)
+        if filtrar:
+            self.filas[:] = [o for o in self.filas if o.numero_orden not in numeros]
+        self._seleccion = {
+            clave: oveja for clave, oveja in self._seleccion.items()
+            if oveja.numero_orden not in numeros
+        }
+        self._renderizar()
+    
+    def oveja_de_item(self, item: str) -> Optional[Oveja]:
+        """Oveja mostrada en un item del Treeview"""
+        return self._items.get(item)
+    
+    def seleccion(self) -> List[Oveja]:
+        """Ovejas seleccionadas, incluidas las que ya no están en pantalla"""
+        return list(self._seleccion.values())
+    
+    def filas_visibles(self) -> int:
+        """Número de filas que caben en el Treeview"""
+        alto = self.tree.winfo_height()
+        if alto <= 1:
+            alto = int(self.tree.cget('height')) * ALTO_FILA
+        # Descontar la fila de encabezados
+        return max(1, alto // ALTO_FILA - 1)
+    
+    def desplazar_filas(self, delta: int):
+        """Mover la ventana visible delta filas"""
+        self.inicio += delta
+        self._renderizar()
+        return 'break'
+    
+    def _desplazar(self, accion, cantidad, unidad=None):
+        """Comando de la scrollbar vertical"""
+        visibles = self.filas_visibles()
+        if accion == 'moveto':
+            self.inicio = int(float(cantidad) * len(self.filas))
+        elif accion == 'scroll':
+            paso = visibles if unidad == 'pages' else 1
+            self.inicio += int(cantidad) * paso
+        self._renderizar()
+    
+    def _rueda(self, event):
+        return self.desplazar_filas(-3 if event.delta > 0 else 3)
+    
+    def _pagina(self, direccion: int):
+        return self.desplazar_filas(direccion * self.filas_visibles())
+    
+    def _flecha(self, direccion: int):
+        """Desplazar la ventana cuando el foco está en el borde"""
+        if not self._en_borde(direccion):
+            return None
+        self.desplazar_filas(direccion)
+        nuevo = self._borde(direccion)
+        if nuevo:
+            self.tree.focus(nuevo)
+            self.tree.selection_set(nuevo)
+        return 'break'
+    
+    def _borde(self, direccion: int):
+        """Primer o último item visible del Treeview"""
+        items = self.tree.get_children()
+        if not items:
+            return None
+        return items[0] if direccion < 0 else items[min(len(items), self.filas_visibles()) - 1]
+    
+    def _en_borde(self, direccion: int) -> bool:
+        borde = self._borde(direccion)
+        return borde is not None and self.tree.focus() == borde
+    
+    def _renderizar(self):
+        """
+        Materializar en el Treeview solo las filas de la ventana visible
+        
+        Se compara con lo ya pintado: los items se identifican por número de
+        orden, de modo que agregar o eliminar ovejas solo inserta, mueve o
+        borra los items afectados dentro de la ventana.
+        """
+        total = len(self.filas)
+        visibles = self.filas_visibles()
+        self.inicio = max(0, min(self.inicio, total - visibles))
+        fin = min(total, self.inicio + visibles + SOBREBARRIDO)
+        
+        deseadas = []
+        repeticiones = {}
+        for posicion in range(self.inicio, fin):
+            oveja = self.filas[posicion]
+            item = str(oveja.numero_orden)
+            if item in repeticiones:
+                repeticiones[item] += 1
+                item = f"{item}#{repeticiones[item]}"
+            else:
+                repeticiones[item] = 0
+            deseadas.append((item, oveja, posicion))
+        
+        self._renderizando = True
+        try:
+            nuevos = {item for item, _, _ in deseadas}
+            sobrantes = [item for item in self.tree.get_children() if item not in nuevos]
+            if sobrantes:
+                self.tree.delete(*sobrantes)
+                for item in sobrantes:
+                    del self._items[item]
+                    del self._pintado[item]
+            
+            seleccionados = []
+            for indice, (item, oveja, posicion) in enumerate(deseadas):
+                datos = oveja.to_dict()
+                contenido = (str(posicion + 1), [datos[col] for col in self.columnas])
+                if item not in self._pintado:
+                    self.tree.insert('', indice, iid=item, text=contenido[0], values=contenido[1])
+                else:
+                    if self._pintado[item] != contenido:
+                        self.tree.item(item, text=contenido[0], values=contenido[1])
+                    if self.tree.index(item) != indice:
+                        self.tree.move(item, '', indice)
+                self._items[item] = oveja
+                self._pintado[item] = contenido
+                if id(oveja) in self._seleccion:
+                    seleccionados.append(item)
+            self.tree.selection_set(seleccionados)
+            self.tree.yview_moveto(0)
+        finally:
+            self._renderizando = False
+        
+        if total:
+            self.vsb.set(self.inicio / total, min(1.0, (self.inicio + visibles) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+    
+    def _al_seleccionar(self, event=None):
+        """Sincronizar la selección persistente con la ventana visible"""
+        if self._renderizando:
+            return
+        seleccionados = set(self.tree.selection())
+        for item, oveja in self._items.items():
+            if item in seleccionados:
+                self._seleccion[id(oveja)] = oveja
+            else:
+                self._seleccion.pop(id(oveja), None)
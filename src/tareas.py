@@ -0,0 +1,138 @@
+"""
+Tareas en segundo plano para FlockLedger
+Ejecuta trabajos largos (carga, guardado, exportación) fuera del hilo de Tk
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+# Cada cuánto se atienden en el hilo de Tk los avisos de las tareas
+INTERVALO_SONDEO_MS = 40
+
+
+class TareaCancelada(Exception):
+    """La tarea se detuvo porque el usuario la canceló"""
+
+
+class Tarea:
+    """
+    Trabajo en curso en el hilo de fondo
+    
+    La función de la tarea recibe este objeto y debe pasar tarea.progreso
+    como callback de avance: además de informar a la interfaz, es el punto
+    en el que se comprueba la cancelación (lanza TareaCancelada).
+    """
+    
+    def __init__(self, descripcion: str, cancelable: bool = True):
+        self.descripcion = descripcion
+        self.cancelable = cancelable
+        self._cancelada = threading.Event()
+        self._avisos: Optional[queue.SimpleQueue] = None
+    
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelada.is_set()
+    
+    def cancelar(self):
+        """Pedir que la tarea se detenga en el próximo aviso de progreso"""
+        if self.cancelable:
+            self._cancelada.set()
+    
+    def progreso(self, hechos: int, total: int):
+        """Informar del avance (desde el hilo de fondo)"""
+        if self.cancelada:
+            raise TareaCancelada(self.descripcion)
+        self._avisos.put(('progreso', self, hechos, total))
+
+
+class EjecutorTareas:
+    """
+    Ejecutor de tareas de fondo para una ventana de Tk
+    
+    Las tareas se ejecutan de una en una en un hilo aparte. Tk no admite
+    llamadas desde otros hilos, así que el hilo de fondo solo deja avisos
+    en una cola y el hilo de Tk los recoge con root.after: los callbacks
+    al_progresar, al_terminar y al_fallar siempre se ejecutan en el hilo
+    de Tk.
+    """
+    
+    def __init__(self, root, al_progresar: Callable[[Tarea, int, int], None] = None):
+        self.root = root
+        self.al_progresar = al_progresar
+        self.actual: Optional[Tarea] = None
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tarea')
+        self._avisos = queue.SimpleQueue()
+        self._sondeo = None
+    
+    @property
+    def ocupado(self) -> bool:
+        return self.actual is not None
+    
+    def ejecutar(self, tarea: Tarea, funcion: Callable[[Tarea], object],
+                 al_terminar: Callable[[object], None],
+                 al_fallar: Callable[[BaseException], None]) -> Tarea:
+        """
+        Ejecutar funcion(tarea) en segundo plano
+        
+        Al acabar se llama al_terminar(resultado) o al_fallar(excepción)
+        (TareaCancelada si se canceló).
+        """
+        if self.ocupado:
+            raise RuntimeError(f"Ya hay una tarea en curso: {self.actual.descripcion}")
+        
+        tarea._avisos = self._avisos
+        self.actual = tarea
+        futuro = self._pool.submit(funcion, tarea)
+        futuro.add_done_callback(
+            lambda f: self._avisos.put(('fin', tarea, f, (al_terminar, al_fallar)))
+        )
+        if self._sondeo is None:
+            self._sondeo = self.root.after(INTERVALO_SONDEO_MS, self._atender)
+        return tarea
+    
+    def cancelar(self):
+        """Cancelar la tarea en curso, si la hay"""
+        if self.actual is not None:
+            self.actual.cancelar()
+    
+    def cerrar(self):
+        """Cancelar lo pendiente y liberar el hilo de fondo"""
+        self.cancelar()
+        if self._sondeo is not None:
+            self.root.after_cancel(self._sondeo)
+            self._sondeo = None
+        self._pool.shutdown(wait=False)
+    
+    def _atender(self):
+        """Procesar en el hilo de Tk los avisos pendientes"""
+        self._sondeo = None
+        ultimo_progreso = None
+        fin = None
+        try:
+            while True:
+                aviso = self._avisos.get_nowait()
+                if aviso[0] == 'progreso':
+                    # Solo interesa el avance más reciente
+                    ultimo_progreso = aviso
+                else:
+                    fin = aviso
+        except queue.Empty:
+            pass
+        
+        if ultimo_progreso is not None and fin is None and self.al_progresar:
+            _, tarea, hechos, total = ultimo_progreso
+            self.al_progresar(tarea, hechos, total)
+        
+        if fin is not None:
+            _, tarea, futuro, (al_terminar, al_fallar) = fin
+            self.actual = None
+            error = futuro.exception()
+            if error is None:
+                al_terminar(futuro.result())
+            else:
+                al_fallar(error)
+        
+        if self.ocupado and self._sondeo is None:
+            self._sondeo = self.root.after(INTERVALO_SONDEO_MS, self._atender)
@@ -3,14 +3,238 @@ Utilidades para FlockLedger
 Funciones auxiliares y helpers
 """
 
+import os
 from models import Explotacion, Oveja, Alta, Baja
 from typing import List, Tuple
 from datetime import datetime
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter, not_
+
+# Valores admitidos para el sexo
+SEXOS_VALIDOS = frozenset(['M', 'H', '-'])
+
+# Filas por bloque al validar una explotación mapeada
+TAMANO_BLOQUE_VALIDACION = 1 << 20
+
+# Por debajo de estas ovejas, validar oveja a oveja es más rápido que por columnas
+UMBRAL_VALIDACION_COLUMNAS = 2000
+
+
+def _contar(valores, sin_vacios: bool = False) -> dict:
+    """Contar valores conservando el orden de primera aparición"""
+    contador = dict(Counter(valores))
+    if sin_vacios:
+        contador.pop('', None)
+    return contador
+
+
+def _sumar(contador: dict, clave, cantidad: int):
+    """Sumar (o restar) a un contador, quitando las claves que llegan a 0"""
+    valor = contador.get(clave, 0) + cantidad
+    if valor:
+        contador[clave] = valor
+    else:
+        del contador[clave]
+
+
+class ContadoresExplotacion:
+    """
+    Contadores agregados de una explotación
+    
+    Reúne en un solo objeto los totales y las distribuciones que calcula
+    EstadisticasExplotacion, de modo que un resumen no necesita un
+    recorrido ni una lista de ovejas por cada métrica.
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.bajas = 0
+        self.por_raza = {}
+        self.por_sexo = {}
+        self.por_procedencia = {}
+        self.por_destino_baja = {}
+        self.causas_alta = {}
+        self.causas_baja = {}
+    
+    @property
+    def activas(self) -> int:
+        """Ovejas sin baja registrada"""
+        return self.total - self.bajas
+    
+    @classmethod
+    def calcular(cls, ovejas) -> 'ContadoresExplotacion':
+        """Calcular todos los contadores de un conjunto de ovejas"""
+        contadores = ContadoresExplotacion()
+        contadores._cargar(ovejas)
+        return contadores
+    
+    def _cargar(self, ovejas):
+        """
+        Calcular todos los contadores de una vez
+        
+        Cada contador es un map/Counter sobre el rebaño (o sobre sus altas o
+        bajas), sin código Python por oveja: en CPython varias pasadas así
+        son más rápidas que un único bucle que los cuente todos a la vez.
+        """
+        ovejas = ovejas if isinstance(ovejas, list) else list(ovejas)
+        altas = list(filter(None, map(attrgetter('alta'), ovejas)))
+        bajas = list(filter(None, map(attrgetter('baja'), ovejas)))
+        
+        self.total = len(ovejas)
+        self.bajas = len(bajas)
+        self.por_raza = _contar(map(attrgetter('raza'), ovejas))
+        self.por_sexo = _contar(map(attrgetter('sexo'), ovejas))
+        self.por_procedencia = _contar(map(attrgetter('procedencia'), altas), sin_vacios=True)
+        self.causas_alta = _contar(map(attrgetter('causa'), altas), sin_vacios=True)
+        self.por_destino_baja = _contar(map(attrgetter('destino'), bajas), sin_vacios=True)
+        self.causas_baja = _contar(map(attrgetter('causa'), bajas), sin_vacios=True)
+    
+    def sumar(self, oveja: Oveja, cantidad: int = 1):
+        """Contabilizar una oveja (cantidad=-1 para descontarla)"""
+        self.total += cantidad
+        _sumar(self.por_raza, oveja.raza, cantidad)
+        _sumar(self.por_sexo, oveja.sexo, cantidad)
+        
+        alta = oveja.alta
+        if alta:
+            if alta.procedencia:
+                _sumar(self.por_procedencia, alta.procedencia, cantidad)
+            if alta.causa:
+                _sumar(self.causas_alta, alta.causa, cantidad)
+        
+        baja = oveja.baja
+        if baja:
+            self.bajas += cantidad
+            if baja.destino:
+                _sumar(self.por_destino_baja, baja.destino, cantidad)
+            if baja.causa:
+                _sumar(self.causas_baja, baja.causa, cantidad)
+    
+    def copia(self) -> 'ContadoresExplotacion':
+        """Copia independiente de estos contadores"""
+        copia = ContadoresExplotacion()
+        copia.total = self.total
+        copia.bajas = self.bajas
+        copia.por_raza = dict(self.por_raza)
+        copia.por_sexo = dict(self.por_sexo)
+        copia.por_procedencia = dict(self.por_procedencia)
+        copia.por_destino_baja = dict(self.por_destino_baja)
+        copia.causas_alta = dict(self.causas_alta)
+        copia.causas_baja = dict(self.causas_baja)
+        return copia
+    
+    def diferencias(self, otros: 'ContadoresExplotacion') -> List[str]:
+        """Contadores que no coinciden con otros (vacío si son iguales)"""
+        propios = self.como_dict()
+        ajenos = otros.como_dict()
+        return [
+            f"{clave}: {propios[clave]!r} != {ajenos[clave]!r}"
+            for clave in propios
+            if propios[clave] != ajenos[clave]
+        ]
+    
+    def como_dict(self) -> dict:
+        """Contadores como diccionario (copia)"""
+        return {
+            'total': self.total,
+            'activas': self.activas,
+            'bajas': self.bajas,
+            'por_raza': dict(self.por_raza),
+            'por_sexo': dict(self.por_sexo),
+            'por_procedencia': dict(self.por_procedencia),
+            'por_destino_baja': dict(self.por_destino_baja),
+            'causas_alta': dict(self.causas_alta),
+            'causas_baja': dict(self.causas_baja),
+        }
+
+
+class ContadoresVivos(ContadoresExplotacion):
+    """
+    Contadores que se actualizan en O(1) con cada cambio de la explotación
+    
+    Se suscriben a la explotación (ver Explotacion.suscribir). Con
+    verificar=True, tras cada cambio se comparan con un recálculo completo
+    y se lanza AssertionError si difieren; pensado para pruebas.
+    """
+    
+    def __init__(self, explotacion: Explotacion, verificar: bool = False):
+        super().__init__()
+        self.explotacion = explotacion
+        self.verificar = verificar
+        self._cargar(explotacion.ovejas)
+    
+    def oveja_agregada(self, oveja: Oveja):
+        self.sumar(oveja)
+        self._comprobar()
+    
+    def oveja_eliminada(self, oveja: Oveja):
+        self.sumar(oveja, -1)
+        self._comprobar()
+    
+    def oveja_antes_de_modificar(self, oveja: Oveja):
+        self.sumar(oveja, -1)
+    
+    def oveja_modificada(self, oveja: Oveja):
+        self.sumar(oveja)
+        self._comprobar()
+    
+    def _comprobar(self):
+        if not self.verificar:
+            return
+        diferencias = self.diferencias(ContadoresExplotacion.calcular(self.explotacion.ovejas))
+        if diferencias:
+            raise AssertionError(
+                "Contadores inconsistentes con el recálculo:\n" + "\n".join(diferencias)
+            )
 
 
 class EstadisticasExplotacion:
     """Clase para calcular estadísticas de una explotación"""
     
+    @staticmethod
+    def activar_contadores(explotacion: Explotacion, verificar: bool = False) -> ContadoresVivos:
+        """
+        Mantener contadores en vivo en la explotación
+        
+        A partir de aquí las estadísticas se leen de los contadores en
+        lugar de recorrer el rebaño. Una explotación mapeada no cambia y ya
+        calcula sus contadores sobre las columnas del archivo: se rechaza con
+        TypeError en lugar de construir todas sus ovejas.
+        """
+        if getattr(explotacion, 'instantanea', None) is not None:
+            raise TypeError(f"La explotación {explotacion.codigo} es de solo lectura: "
+                            "sus contadores ya se calculan sobre la instantánea")
+        EstadisticasExplotacion.desactivar_contadores(explotacion)
+        contadores = ContadoresVivos(explotacion, verificar=verificar)
+        explotacion.suscribir(contadores)
+        explotacion.contadores = contadores
+        return contadores
+    
+    @staticmethod
+    def desactivar_contadores(explotacion: Explotacion):
+        """Dejar de mantener contadores en vivo"""
+        if getattr(explotacion, 'instantanea', None) is not None:
+            # Mapeada: nunca tiene contadores en vivo (y leer los suyos los calcularía)
+            return
+        if explotacion.contadores is not None:
+            explotacion.desuscribir(explotacion.contadores)
+            explotacion.contadores = None
+    
+    @staticmethod
+    def contadores(explotacion: Explotacion) -> ContadoresExplotacion:
+        """
+        Todos los contadores de la explotación
+        
+        La primera vez se calculan y quedan en vivo en la explotación (ver
+        activar_contadores): los resúmenes siguientes, aunque haya habido
+        cambios, no vuelven a recorrer el rebaño. Las explotaciones mapeadas
+        ya guardan los suyos.
+        """
+        if getattr(explotacion, 'contadores', None) is None:
+            EstadisticasExplotacion.activar_contadores(explotacion)
+        return explotacion.contadores
+    
     @staticmethod
     def total_ovejas(explotacion: Explotacion) -> int:
         """Total de ovejas"""
@@ -19,80 +243,42 @@ class EstadisticasExplotacion:
     @staticmethod
     def ovejas_activas(explotacion: Explotacion) -> int:
         """Cantidad de ovejas sin baja"""
-        return len(explotacion.obtener_ovejas_activas())
+        return EstadisticasExplotacion.contadores(explotacion).activas
     
     @staticmethod
     def ovejas_bajas(explotacion: Explotacion) -> int:
         """Cantidad de ovejas con baja registrada"""
-        return len(explotacion.obtener_ovejas_con_baja())
+        return EstadisticasExplotacion.contadores(explotacion).bajas
     
     @staticmethod
     def ovejas_por_raza(explotacion: Explotacion) -> dict:
-        """Agrupar ovejas por raza"""
-        razas = {}
-        for oveja in explotacion.ovejas:
-            if oveja.raza not in razas:
-                razas[oveja.raza] = []
-            razas[oveja.raza].append(oveja)
-        return razas
+        """Cantidad de ovejas por raza"""
+        return dict(EstadisticasExplotacion.contadores(explotacion).por_raza)
     
     @staticmethod
     def ovejas_por_sexo(explotacion: Explotacion) -> dict:
-        """Agrupar ovejas por sexo"""
-        sexos = {}
-        for oveja in explotacion.ovejas:
-            if oveja.sexo not in sexos:
-                sexos[oveja.sexo] = []
-            sexos[oveja.sexo].append(oveja)
-        return sexos
+        """Cantidad de ovejas por sexo"""
+        return dict(EstadisticasExplotacion.contadores(explotacion).por_sexo)
     
     @staticmethod
     def ovejas_por_procedencia(explotacion: Explotacion) -> dict:
-        """Agrupar ovejas por procedencia de alta"""
-        procedencias = {}
-        for oveja in explotacion.ovejas:
-            if oveja.alta and oveja.alta.procedencia:
-                proc = oveja.alta.procedencia
-                if proc not in procedencias:
-                    procedencias[proc] = []
-                procedencias[proc].append(oveja)
-        return procedencias
+        """Cantidad de ovejas por procedencia de alta"""
+        return dict(EstadisticasExplotacion.contadores(explotacion).por_procedencia)
     
     @staticmethod
     def ovejas_por_destino_baja(explotacion: Explotacion) -> dict:
-        """Agrupar ovejas por destino de baja"""
-        destinos = {}
-        for oveja in explotacion.ovejas:
-            if oveja.baja and oveja.baja.destino:
-                dest = oveja.baja.destino
-                if dest not in destinos:
-                    destinos[dest] = []
-                destinos[dest].append(oveja)
-        return destinos
+        """Cantidad de ovejas por destino de baja"""
+        return dict(EstadisticasExplotacion.contadores(explotacion).por_destino_baja)
     
     @staticmethod
     def causas_alta(explotacion: Explotacion) -> dict:
-        """Agrupar ovejas por causa de alta"""
-        causas = {}
-        for oveja in explotacion.ovejas:
-            if oveja.alta and oveja.alta.causa:
-                causa = oveja.alta.causa
-                if causa not in causas:
-                    causas[causa] = 0
-                causas[causa] += 1
-        return causas
+        """Cantidad de ovejas por causa de alta"""
+        return dict(EstadisticasExplotacion.contadores(explotacion).causas_alta)
     
     @staticmethod
     def causas_baja(explotacion: Explotacion) -> dict:
-        """Agrupar ovejas por causa de baja"""
-        causas = {}
-        for oveja in explotacion.ovejas:
-            if oveja.baja and oveja.baja.causa:
-                causa = oveja.baja.causa
-                if causa not in causas:
-                    causas[causa] = 0
-                causas[causa] += 1
-        return causas
+        """Cantidad de ovejas por causa de baja"""
+        return dict(EstadisticasExplotacion.contadores(explotacion).causas_baja)
 
 
 class ValidadorDatos:
@@ -155,15 +341,217 @@ class ValidadorDatos:
         """
         Validar todos los datos de una explotación
         Retorna (es_valida, diccionario_de_errores_por_oveja)
+        
+        Aplica las mismas reglas que validar_oveja, pero sobre columnas
+        completas: cada regla es una máscara booleana y las fechas de alta y
+        baja se convierten de una vez con pandas. Con menos de
+        UMBRAL_VALIDACION_COLUMNAS ovejas se aplica validar_oveja a cada
+        una: preparar las columnas cuesta más que lo que ahorran. Una
+        explotación mapeada (con instantanea) se valida sobre las columnas
+        del archivo, sin construir sus ovejas.
         """
-        errores = {}
+        import numpy as np
+        
+        instantanea = getattr(explotacion, 'instantanea', None)
+        if instantanea is not None:
+            return ValidadorDatos._validar_instantanea(instantanea)
+        
+        ovejas = explotacion.ovejas if isinstance(explotacion.ovejas, list) else list(explotacion.ovejas)
+        n = len(ovejas)
+        if n < UMBRAL_VALIDACION_COLUMNAS:
+            return ValidadorDatos._validar_oveja_a_oveja(ovejas)
+        
+        def vacios(valores, posiciones=None):
+            """Máscara de valores vacíos; con posiciones, valores solo de esas filas"""
+            if posiciones is None:
+                return np.fromiter(map(not_, valores), dtype=bool, count=n)
+            mascara = np.zeros(n, dtype=bool)
+            mascara[posiciones] = np.fromiter(map(not_, valores), dtype=bool, count=len(posiciones))
+            return mascara
         
-        for oveja in explotacion.ovejas:
+        try:
+            anos = np.fromiter(map(attrgetter('ano_nacimiento'), ovejas), dtype=np.int64, count=n)
+        except OverflowError:
+            anos = np.array([o.ano_nacimiento for o in ovejas], dtype=object)
+        
+        sexos = list(map(attrgetter('sexo'), ovejas))
+        altas = list(map(attrgetter('alta'), ovejas))
+        bajas = list(map(attrgetter('baja'), ovejas))
+        con_alta = np.fromiter(map(bool, altas), dtype=bool, count=n)
+        con_baja = np.fromiter(map(bool, bajas), dtype=bool, count=n)
+        pos_altas = np.flatnonzero(con_alta)
+        pos_bajas = np.flatnonzero(con_baja)
+        solo_altas = list(filter(None, altas))
+        solo_bajas = list(filter(None, bajas))
+        ambas = np.flatnonzero(con_alta & con_baja)
+        
+        reglas = ValidadorDatos._reglas(
+            anos,
+            vacios(map(attrgetter('identificacion'), ovejas)),
+            vacios(map(attrgetter('raza'), ovejas)),
+            vacios(sexos),
+            np.fromiter(map(SEXOS_VALIDOS.__contains__, sexos), dtype=bool, count=n),
+            vacios(map(attrgetter('causa'), solo_altas), pos_altas),
+            vacios(map(attrgetter('fecha'), solo_altas), pos_altas),
+            vacios(map(attrgetter('causa'), solo_bajas), pos_bajas),
+            vacios(map(attrgetter('fecha'), solo_bajas), pos_bajas),
+        )
+        reglas += ValidadorDatos._reglas_fechas(
+            n, ambas, [altas[p].fecha for p in ambas], [bajas[p].fecha for p in ambas])
+        
+        errores = {}
+        ValidadorDatos._anotar_errores(reglas, lambda posicion: ovejas[posicion].numero_orden, errores)
+        return (len(errores) == 0, errores)
+    
+    @staticmethod
+    def _validar_oveja_a_oveja(ovejas: List[Oveja]) -> Tuple[bool, dict]:
+        """validar_explotacion aplicando validar_oveja a cada oveja"""
+        errores = {}
+        for oveja in ovejas:
             es_valida, lista_errores = ValidadorDatos.validar_oveja(oveja)
             if not es_valida:
                 errores[oveja.numero_orden] = lista_errores
+        return (len(errores) == 0, errores)
+    
+    @staticmethod
+    def _validar_instantanea(instantanea) -> Tuple[bool, dict]:
+        """
+        validar_explotacion sobre las columnas de una instantánea, por bloques
+        
+        Los campos categóricos se validan una vez por valor distinto y se
+        reparten con sus códigos; que la identificación esté vacía se ve
+        en sus desplazamientos. Solo se leen las páginas de las columnas
+        que intervienen y la memoria no crece con el tamaño del registro
+        (salvo el propio diccionario de errores).
+        """
+        import numpy as np
+        
+        arreglos = instantanea.arreglos
+        categorias = instantanea.categorias
+        
+        def por_categoria(campo, condicion):
+            """Máscara de la condición para cada código de la columna categórica"""
+            return np.array([condicion(valor) for valor in categorias[campo]], dtype=bool)
+        
+        vacia = {campo: por_categoria(campo, not_)
+                 for campo in ('raza', 'sexo', 'causa_alta', 'fecha_alta', 'causa_baja', 'fecha_baja')}
+        sexo_valido = por_categoria('sexo', SEXOS_VALIDOS.__contains__)
+        
+        errores = {}
+        for inicio in range(0, instantanea.filas, TAMANO_BLOQUE_VALIDACION):
+            fin = min(inicio + TAMANO_BLOQUE_VALIDACION, instantanea.filas)
+            n = fin - inicio
+            
+            def codigos(campo):
+                return arreglos[campo][0][inicio:fin]
+            
+            def vacios(campo, marcas=None):
+                mascara = vacia[campo][codigos(campo)]
+                return mascara if marcas is None else mascara & marcas
+            
+            # Cada texto ocupa su longitud más el NUL: vacío si solo ocupa el NUL
+            desplazamientos = arreglos['identificacion'][1][inicio:fin + 1].astype(np.int64)
+            con_alta = codigos('alta').astype(bool)
+            con_baja = codigos('baja').astype(bool)
+            ambas = np.flatnonzero(con_alta & con_baja)
+            fechas_alta, fechas_baja = categorias['fecha_alta'], categorias['fecha_baja']
+            
+            reglas = ValidadorDatos._reglas(
+                codigos('ano_nacimiento'),
+                np.diff(desplazamientos) == 1,
+                vacios('raza'),
+                vacios('sexo'),
+                sexo_valido[codigos('sexo')],
+                vacios('causa_alta', con_alta),
+                vacios('fecha_alta', con_alta),
+                vacios('causa_baja', con_baja),
+                vacios('fecha_baja', con_baja),
+            )
+            reglas += ValidadorDatos._reglas_fechas(
+                n, ambas,
+                [fechas_alta[codigo] for codigo in codigos('fecha_alta')[ambas].tolist()],
+                [fechas_baja[codigo] for codigo in codigos('fecha_baja')[ambas].tolist()],
+            )
+            ordenes = codigos('numero_orden')
+            ValidadorDatos._anotar_errores(reglas, lambda posicion: int(ordenes[posicion]), errores)
         
         return (len(errores) == 0, errores)
+    
+    @staticmethod
+    def _reglas(anos, identificacion_vacia, raza_vacia, sexo_vacio, sexo_valido,
+                causa_alta_vacia, fecha_alta_vacia, causa_baja_vacia, fecha_baja_vacia) -> list:
+        """Máscaras de las reglas de validar_oveja (salvo las fechas), en su orden"""
+        return [
+            ("Identificación es requerida", identificacion_vacia),
+            ("Año de nacimiento debe ser mayor a 0", anos <= 0),
+            ("Año de nacimiento no puede ser en el futuro", anos > datetime.now().year),
+            ("Raza es requerida", raza_vacia),
+            ("Sexo es requerido", sexo_vacio),
+            ("Sexo debe ser M (Macho), H (Hembra) o - (no especificado)", ~sexo_valido),
+            ("Alta: Causa es requerida", causa_alta_vacia),
+            ("Alta: Fecha es requerida", fecha_alta_vacia),
+            ("Baja: Causa es requerida", causa_baja_vacia),
+            ("Baja: Fecha es requerida", fecha_baja_vacia),
+        ]
+    
+    @staticmethod
+    def _anotar_errores(reglas: list, numero_orden, errores: dict):
+        """Pasar las máscaras a errores[numero_orden] = [mensajes], en orden de fila y de regla"""
+        import numpy as np
+        
+        # Recorrer solo las filas con errores, regla a regla para conservar el orden
+        por_posicion = {}
+        for mensaje, mascara in reglas:
+            for posicion in np.flatnonzero(mascara).tolist():
+                por_posicion.setdefault(posicion, []).append(mensaje)
+        
+        for posicion in sorted(por_posicion):
+            errores[numero_orden(posicion)] = por_posicion[posicion]
+    
+    @staticmethod
+    def _reglas_fechas(n: int, posiciones, fechas_alta: list, fechas_baja: list) -> list:
+        """
+        Máscaras de las reglas de consistencia entre fecha de alta y de baja
+        
+        fechas_alta y fechas_baja son los textos de las filas posiciones (las
+        que tienen alta y baja).
+        """
+        import numpy as np
+        
+        invalidas = np.zeros(n, dtype=bool)
+        anteriores = np.zeros(n, dtype=bool)
+        
+        if len(posiciones):
+            convertidas_alta = _convertir_fechas(fechas_alta)
+            convertidas_baja = _convertir_fechas(fechas_baja)
+            
+            sin_fecha = np.isnat(convertidas_alta) | np.isnat(convertidas_baja)
+            invalidas[posiciones] = sin_fecha
+            anteriores[posiciones] = (convertidas_baja < convertidas_alta) & ~sin_fecha
+            
+            # Fechas fuera del rango de datetime64[ns] en pandas antiguos: comprobar con strptime
+            for i in np.flatnonzero(sin_fecha).tolist():
+                try:
+                    fecha_alta = datetime.strptime(fechas_alta[i], "%d/%m/%Y")
+                    fecha_baja = datetime.strptime(fechas_baja[i], "%d/%m/%Y")
+                except ValueError:
+                    continue
+                invalidas[posiciones[i]] = False
+                anteriores[posiciones[i]] = fecha_baja < fecha_alta
+        
+        return [
+            ("Fecha de baja no puede ser anterior a fecha de alta", anteriores),
+            ("Formato de fecha inválido (use DD/MM/YYYY)", invalidas),
+        ]
+
+
+def _convertir_fechas(textos: list):
+    """Convertir fechas DD/MM/YYYY a datetime64 (NaT si no son válidas), cada valor distinto una vez"""
+    import pandas as pd
+    
+    codigos, distintos = pd.factorize(pd.Series(textos, dtype=object))
+    fechas = pd.to_datetime(pd.Series(distintos, dtype=object), format="%d/%m/%Y", errors='coerce')
+    return fechas.to_numpy()[codigos]
 
 
 class FormateadorDatos:
@@ -193,7 +581,7 @@ class FormateadorDatos:
     @staticmethod
     def generar_resumen_explotacion(explotacion: Explotacion) -> str:
         """Generar resumen en texto de una explotación"""
-        stats = EstadisticasExplotacion()
+        contadores = EstadisticasExplotacion.contadores(explotacion)
         
         resumen = f"""
 RESUMEN DE EXPLOTACIÓN
@@ -202,21 +590,21 @@ Código: {explotacion.codigo}
 Nombre: {explotacion.nombre or 'Sin nombre'}
 
 ESTADÍSTICAS GENERALES:
-- Total de ovejas: {stats.total_ovejas(explotacion)}
-- Ovejas activas: {stats.ovejas_activas(explotacion)}
-- Ovejas con baja: {stats.ovejas_bajas(explotacion)}
+- Total de ovejas: {contadores.total}
+- Ovejas activas: {contadores.activas}
+- Ovejas con baja: {contadores.bajas}
 
 DISTRIBUCIÓN POR RAZA:
-{FormateadorDatos._generar_tabla_dist(stats.ovejas_por_raza(explotacion))}
+{FormateadorDatos._generar_tabla_dist(contadores.por_raza)}
 
 DISTRIBUCIÓN POR SEXO:
-{FormateadorDatos._generar_tabla_dist(stats.ovejas_por_sexo(explotacion))}
+{FormateadorDatos._generar_tabla_dist(contadores.por_sexo)}
 
 CAUSAS DE ALTA:
-{FormateadorDatos._generar_tabla_causas(stats.causas_alta(explotacion))}
+{FormateadorDatos._generar_tabla_causas(contadores.causas_alta)}
 
 CAUSAS DE BAJA:
-{FormateadorDatos._generar_tabla_causas(stats.causas_baja(explotacion))}
+{FormateadorDatos._generar_tabla_causas(contadores.causas_baja)}
 """
         return resumen
     
@@ -227,8 +615,8 @@ CAUSAS DE BAJA:
             return "  (Sin datos)"
         
         tabla = ""
-        for clave, ovejas in diccionario.items():
-            tabla += f"  - {clave}: {len(ovejas)} ovejas\n"
+        for clave, cantidad in diccionario.items():
+            tabla += f"  - {clave}: {cantidad} ovejas\n"
         return tabla
     
     @staticmethod
@@ -241,3 +629,65 @@ CAUSAS DE BAJA:
         for causa, cantidad in diccionario.items():
             tabla += f"  - {causa}: {cantidad}\n"
         return tabla
+
+
+def _validar_explotacion(explotacion: Explotacion) -> Tuple[bool, dict]:
+    return ValidadorDatos.validar_explotacion(explotacion)
+
+
+def _estadisticas_explotacion(explotacion: Explotacion) -> ContadoresExplotacion:
+    # Copia: los contadores en vivo siguen cambiando con la explotación
+    return EstadisticasExplotacion.contadores(explotacion).copia()
+
+
+def procesar_explotaciones(funcion, explotaciones: List[Explotacion], max_workers: int = None,
+                           capturar_errores: bool = False) -> dict:
+    """
+    Aplicar una función a cada explotación en un pool de procesos
+    
+    Cada explotación es una tarea. Nunca hay más de 2 * max_workers
+    explotaciones enviadas y sin recoger, y los resultados se devuelven
+    como {codigo: resultado} en el orden de entrada, sea cual sea el
+    orden en que terminen los procesos. Con un solo proceso se ejecuta
+    en serie, sin pool. La función debe estar definida a nivel de módulo.
+    
+    Con capturar_errores=True, la excepción de una explotación (incluidos
+    los fallos al enviarla al proceso) pasa a ser su resultado en lugar de
+    interrumpir las demás.
+    """
+    explotaciones = list(explotaciones)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(explotaciones))
+    
+    def recoger(futuro):
+        if not capturar_errores:
+            return futuro.result()
+        try:
+            return futuro.result()
+        except Exception as e:
+            return e
+    
+    if max_workers <= 1:
+        resultados = {}
+        for explotacion in explotaciones:
+            try:
+                resultados[explotacion.codigo] = funcion(explotacion)
+            except Exception as e:
+                if not capturar_errores:
+                    raise
+                resultados[explotacion.codigo] = e
+        return resultados
+    
+    resultados = {}
+    pendientes = deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for explotacion in explotaciones:
+            pendientes.append((explotacion.codigo, pool.submit(funcion, explotacion)))
+            if len(pendientes) >= 2 * max_workers:
+                codigo, futuro = pendientes.popleft()
+                resultados[codigo] = recoger(futuro)
+        while pendientes:
+            codigo, futuro = pendientes.popleft()
+            resultados[codigo] = recoger(futuro)
+    return resultados
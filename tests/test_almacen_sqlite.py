@@ -0,0 +1,74 @@
+"""Pruebas del almacén SQLite"""
+
+import sqlite3
+import threading
+
+from almacen_sqlite import AlmacenSQLite
+from models import Explotacion, Oveja
+from utils import ContadoresExplotacion
+
+
+def _explotacion(codigo, n=50):
+    return Explotacion(codigo=codigo, nombre=f'Granja {codigo}', ovejas=[
+        Oveja(i, f'ES{i:012d}', 2020, '01/03/2020', 'Merina' if i % 2 else 'Churra', 'H' if i % 3 else 'M')
+        for i in range(1, n + 1)
+    ])
+
+
+def test_guardar_cambios_desde_varios_hilos(tmp_path):
+    ruta = str(tmp_path / 'ovejas.db')
+    codigos = [f'ES{n}' for n in range(8)]
+    errores = []
+    
+    with AlmacenSQLite(ruta) as almacen:
+        def trabajar(codigo):
+            try:
+                explotacion = _explotacion(codigo)
+                almacen.guardar(explotacion)
+                for i in range(20):
+                    explotacion.agregar_oveja(Oveja(1000 + i, f'ES9{i:011d}', 2021, '', 'Merina', 'H'))
+                    explotacion.eliminar_oveja(i + 1)
+                    almacen.guardar_cambios(explotacion)
+                    almacen.contadores(codigo)
+            except Exception as error:
+                errores.append(error)
+        
+        hilos = [threading.Thread(target=trabajar, args=(codigo,)) for codigo in codigos]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        
+        assert errores == []
+        assert sorted(almacen.codigos()) == codigos
+    
+    with AlmacenSQLite(ruta) as almacen:
+        for codigo in codigos:
+            cargada = almacen.cargar(codigo)
+            assert cargada.total_ovejas() == 50
+            assert [o.numero_orden for o in cargada.ovejas] == list(range(21, 51)) + list(range(1000, 1020))
+
+
+def test_contadores_sin_cargar_coinciden_con_calcular(tmp_path):
+    explotacion = _explotacion('ES1')
+    with AlmacenSQLite(str(tmp_path / 'ovejas.db')) as almacen:
+        almacen.guardar(explotacion)
+        contadores = almacen.contadores('ES1')
+    
+    assert vars(contadores) == vars(ContadoresExplotacion.calcular(explotacion.ovejas))
+
+
+def test_sin_indice_sobre_fecha_baja(tmp_path):
+    ruta = str(tmp_path / 'ovejas.db')
+    AlmacenSQLite(ruta).cerrar()
+    # Base creada por una versión anterior, con el índice sobre el texto de la fecha
+    with sqlite3.connect(ruta) as conexion:
+        conexion.execute("CREATE INDEX ovejas_fecha_baja ON ovejas(explotacion, fecha_baja) WHERE baja")
+    conexion.close()
+    
+    AlmacenSQLite(ruta).cerrar()
+    
+    with sqlite3.connect(ruta) as conexion:
+        indices = [nombre for nombre, in conexion.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    conexion.close()
+    assert 'ovejas_fecha_baja' not in indices
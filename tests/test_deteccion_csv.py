@@ -0,0 +1,104 @@
+"""Pruebas de la detección del formato de los CSV: separador, cabeceras, codificación y filas desalineadas"""
+
+import pytest
+
+from deteccion_csv import TAMANO_MUESTRA, FilasDesalineadas, detectar_formato, mapear_cabecera
+from models import COLUMNAS, leer_csv_por_lotes
+
+FILA = ['7', 'ES100080000007', '2020', '01/03/2020', 'Merina', 'H', 'Compra', '05/05/2021', 'Peña', 'G1',
+        '', '', '', '']
+
+
+def _escribir(ruta, lineas, separador=',', codificacion='utf-8', fin='\n'):
+    texto = fin.join(separador.join(campos) for campos in lineas) + fin
+    ruta.write_bytes(texto.encode(codificacion))
+    return str(ruta)
+
+
+def _leer(ruta, **kwargs):
+    return [oveja for lote in leer_csv_por_lotes(ruta, **kwargs) for oveja in lote]
+
+
+@pytest.mark.parametrize('separador', [';', '\t'])
+def test_separador(tmp_path, separador):
+    ruta = _escribir(tmp_path / 'registro.csv', [COLUMNAS, FILA], separador=separador)
+    
+    formato = detectar_formato(ruta)
+    oveja, = _leer(ruta)
+    
+    assert formato.separador == separador
+    assert formato.campos == len(COLUMNAS)
+    assert (oveja.numero_orden, oveja.identificacion, oveja.alta.procedencia) == (7, 'ES100080000007', 'Peña')
+
+
+def test_cabecera_con_alias_y_en_otro_orden(tmp_path):
+    ruta = _escribir(tmp_path / 'registro.csv', [
+        ['Crotal', 'Nº de orden', 'Observaciones', 'Raza'],
+        ['ES100080000007', '7', 'cojea', 'Merina'],
+    ], separador=';')
+    
+    formato = detectar_formato(ruta)
+    oveja, = _leer(ruta)
+    
+    assert dict(formato.posiciones) == {'Identificación': 0, 'Nº Orden': 1, 'Raza': 3}
+    assert formato.ignoradas == ('Observaciones',)
+    assert (oveja.numero_orden, oveja.identificacion, oveja.raza, oveja.sexo) == (7, 'ES100080000007', 'Merina', '')
+
+
+@pytest.mark.parametrize('codificacion', ['utf-16-le', 'utf-16-be'])
+def test_utf16_sin_bom(tmp_path, codificacion):
+    ruta = _escribir(tmp_path / 'registro.csv', [COLUMNAS, FILA], codificacion=codificacion, fin='\r\n')
+    
+    formato = detectar_formato(ruta)
+    oveja, = _leer(ruta)
+    
+    assert formato.codificacion == codificacion
+    assert len(formato.posiciones) == len(COLUMNAS)
+    assert (oveja.numero_orden, oveja.alta.procedencia, oveja.baja) == (7, 'Peña', None)
+
+
+def test_cp1252_pasada_la_muestra(tmp_path):
+    # Solo ASCII en la muestra (cabecera con alias sin acentos): se detecta
+    # UTF-8 y al llegar a 'ñ' se reintenta con cp1252
+    cabecera = ['Orden', 'Identificacion', 'Ano Nacimiento', 'Fecha Identificacion', 'Raza', 'Sexo',
+                'Causa Alta', 'Fecha Alta', 'Procedencia', 'Guia Alta', 'Causa Baja', 'Fecha Baja',
+                'Destino', 'Guia Baja']
+    ascii_ = [[str(n), f'ES{n:012d}', '2020', '01/03/2020', 'Merina', 'H'] + [''] * 8
+              for n in range(1, TAMANO_MUESTRA // 30)]
+    ruta = _escribir(tmp_path / 'registro.csv', [cabecera] + ascii_ + [FILA], codificacion='cp1252')
+    
+    formato = detectar_formato(ruta)
+    ovejas = _leer(ruta, tamano_lote=100)
+    
+    assert formato.codificacion == 'utf-8'
+    assert (tmp_path / 'registro.csv').stat().st_size > TAMANO_MUESTRA
+    assert len(ovejas) == len(ascii_) + 1
+    assert ovejas[-1].alta.procedencia == 'Peña'
+
+
+def test_resumen_de_filas_desalineadas(tmp_path):
+    lineas = [COLUMNAS] + [FILA + ['de más'] if n % 2 else FILA for n in range(30)]
+    ruta = _escribir(tmp_path / 'registro.csv', lineas)
+    desalineadas = FilasDesalineadas()
+    
+    ovejas = _leer(ruta, tamano_lote=7, desalineadas=desalineadas)
+    
+    assert len(ovejas) == 30
+    assert all(oveja.alta.procedencia == 'Peña' for oveja in ovejas)
+    assert desalineadas.total == 15
+    assert desalineadas.lineas == list(range(3, 23, 2))
+    assert desalineadas.resumen() == (
+        f"15 filas tienen más campos que la cabecera ({len(COLUMNAS)}); se ignoraron los campos "
+        "sobrantes. Líneas: 3, 5, 7, 9, 11, 13, 15, 17, 19, 21, ..."
+    )
+    assert not FilasDesalineadas() and FilasDesalineadas().resumen() == ''
+
+
+def test_mapear_cabecera_devuelve_posiciones_de_solo_lectura():
+    cabecera = ','.join(COLUMNAS)
+    
+    _, posiciones, _, _ = mapear_cabecera(cabecera)
+    with pytest.raises(TypeError):
+        posiciones['Raza'] = 0
+    
+    assert mapear_cabecera(cabecera)[1]['Raza'] == COLUMNAS.index('Raza')
@@ -0,0 +1,89 @@
+"""Pruebas de los contadores de una explotación y del repositorio"""
+
+import pytest
+
+from models import Alta, Baja, Explotacion, Oveja, RepositorioExplotaciones
+from utils import ContadoresExplotacion, EstadisticasExplotacion
+
+
+def _explotacion(codigo='ES1'):
+    return Explotacion(codigo=codigo, ovejas=[
+        Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H', alta=Alta('A', '05/05/2021', 'ES100083', 'G1')),
+        Oveja(2, 'ES100080000002', 2021, '02/04/2021', 'Churra', 'M'),
+        Oveja(3, 'ES100080000003', 2019, '03/05/2019', 'Merina', 'H', baja=Baja('M', '10/10/2023', 'Matadero', 'G2')),
+    ])
+
+
+def test_contadores_vivos_coinciden_con_el_recalculo():
+    explotacion = _explotacion()
+    contadores = EstadisticasExplotacion.activar_contadores(explotacion, verificar=True)
+    
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.asignar_baja(explotacion.ovejas[0], Baja('V', '01/02/2024', 'ES450021', 'G3'))
+    explotacion.modificar_oveja(explotacion.ovejas[1], raza='Merina')
+    explotacion.eliminar_oveja(3)
+    
+    assert not contadores.diferencias(ContadoresExplotacion.calcular(explotacion.ovejas))
+    assert contadores.total == 3
+    assert contadores.bajas == 1
+    assert contadores.por_raza == {'Merina': 2, 'Assaf': 1}
+
+
+def test_copia_no_cambia_con_la_explotacion():
+    explotacion = _explotacion()
+    contadores = EstadisticasExplotacion.activar_contadores(explotacion)
+    copia = contadores.copia()
+    
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    
+    assert copia.total == 3
+    assert 'Assaf' not in copia.por_raza
+    assert contadores.total == 4
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_estadisticas_todas_retorna_copias(max_workers):
+    repositorio = RepositorioExplotaciones()
+    for codigo in ('ES1', 'ES2'):
+        repositorio.agregar_explotacion(_explotacion(codigo))
+    vivos = EstadisticasExplotacion.activar_contadores(repositorio.obtener_explotacion('ES1'))
+    
+    todas = repositorio.estadisticas_todas(max_workers=max_workers)
+    repositorio.obtener_explotacion('ES1').eliminar_oveja(1)
+    
+    assert list(todas) == ['ES1', 'ES2']
+    assert todas['ES1'] is not vivos
+    assert todas['ES1'].total == 3
+    assert not todas['ES2'].diferencias(ContadoresExplotacion.calcular(_explotacion('ES2').ovejas))
+
+
+def test_estadisticas_todas_con_almacen(tmp_path):
+    from almacen_sqlite import AlmacenSQLite
+    
+    with AlmacenSQLite(str(tmp_path / 'registro.db')) as almacen:
+        repositorio = RepositorioExplotaciones(almacen)
+        for codigo in ('ES1', 'ES2'):
+            repositorio.agregar_explotacion(_explotacion(codigo))
+        # ES2 solo está en el almacén
+        del repositorio.explotaciones['ES2']
+        
+        todas = repositorio.estadisticas_todas(max_workers=2)
+        
+        assert list(todas) == ['ES1', 'ES2']
+        for contadores in todas.values():
+            assert not contadores.diferencias(ContadoresExplotacion.calcular(_explotacion().ovejas))
+
+
+def test_estadisticas_quedan_en_vivo_tras_el_primer_calculo():
+    explotacion = _explotacion()
+    
+    assert EstadisticasExplotacion.ovejas_por_raza(explotacion) == {'Merina': 2, 'Churra': 1}
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.eliminar_oveja(3)
+    
+    assert explotacion.contadores is not None
+    assert EstadisticasExplotacion.ovejas_por_raza(explotacion) == {'Merina': 1, 'Churra': 1, 'Assaf': 1}
+    assert EstadisticasExplotacion.ovejas_por_procedencia(explotacion) == {'ES100083': 1}
+    assert EstadisticasExplotacion.ovejas_por_destino_baja(explotacion) == {}
+    assert EstadisticasExplotacion.ovejas_bajas(explotacion) == 0
+    assert not explotacion.contadores.diferencias(ContadoresExplotacion.calcular(explotacion.ovejas))
@@ -0,0 +1,58 @@
+"""Pruebas de la explotación mapeada sobre una instantánea"""
+
+import pytest
+
+from explotacion_mapeada import ExplotacionMapeada
+from models import Alta, Baja, Explotacion, Oveja
+from utils import ContadoresExplotacion, EstadisticasExplotacion, ValidadorDatos
+
+
+def _explotacion():
+    return Explotacion(codigo='ES1', ovejas=[
+        Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H', alta=Alta('A', '05/05/2021', 'ES100083', 'G1')),
+        Oveja(2, '', 2021, '02/04/2021', 'Churra', 'X'),
+        Oveja(3, 'ES100080000003', 0, '03/05/2019', '', 'H', baja=Baja('', '10/10/2023', 'Matadero', 'G2')),
+        Oveja(4, 'ES100080000004', 2019, '03/05/2019', 'Merina', '',
+              alta=Alta('A', '05/05/2022', 'ES100083', 'G3'), baja=Baja('M', '10/10/2021', 'Matadero', 'G4')),
+        Oveja(5, 'ES100080000005', 2019, '03/05/2019', 'Merina', 'M',
+              alta=Alta('A', '31/02/2022', '', 'G5'), baja=Baja('M', '10/10/2023', '', 'G6')),
+        Oveja(6, 'ES100080000006', 2018, '03/05/2018', 'Assaf', '-', alta=Alta('', '', '', '')),
+    ])
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    ruta = str(tmp_path / 'registro.csv')
+    _explotacion().to_csv(ruta)
+    return ruta
+
+
+@pytest.fixture
+def mapeada(ruta):
+    return ExplotacionMapeada.abrir(ruta, codigo='ES1')
+
+
+def test_validar_por_columnas_como_explotacion(ruta, mapeada, monkeypatch):
+    esperado = ValidadorDatos.validar_explotacion(Explotacion.from_csv(ruta, codigo='ES1'))
+    # Sin construir ovejas: solo se leen las columnas del archivo
+    monkeypatch.setattr(type(mapeada.instantanea), 'ovejas', None)
+    
+    assert ValidadorDatos.validar_explotacion(mapeada) == esperado
+    assert len(esperado[1]) == 4
+
+
+def test_validar_por_bloques(ruta, mapeada, monkeypatch):
+    import utils
+    monkeypatch.setattr(utils, 'TAMANO_BLOQUE_VALIDACION', 2)
+    
+    assert ValidadorDatos.validar_explotacion(mapeada) == \
+        ValidadorDatos.validar_explotacion(Explotacion.from_csv(ruta, codigo='ES1'))
+
+
+def test_contadores_sin_activar(mapeada):
+    with pytest.raises(TypeError):
+        EstadisticasExplotacion.activar_contadores(mapeada)
+    EstadisticasExplotacion.desactivar_contadores(mapeada)
+    
+    contadores = EstadisticasExplotacion.contadores(mapeada)
+    assert not contadores.diferencias(ContadoresExplotacion.calcular(_explotacion().ovejas))
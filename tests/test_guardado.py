@@ -0,0 +1,240 @@
+"""Pruebas del guardado en CSV y .xlsx: formato, reescritura completa, filas añadidas al final e ida y vuelta"""
+
+import csv
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from models import (COLUMNAS, HOJA_XLSX, Alta, Baja, Explotacion, Oveja, escribir_csv, escribir_xlsx,
+                    firma_para_agregar, guardar_csv, leer_xlsx_por_lotes)
+
+
+def _explotacion():
+    return Explotacion(codigo='ES000000000001', nombre='Prueba', ovejas=[
+        Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H'),
+        Oveja(2, 'ES100080000002', 2021, '02/04/2021', 'Raza "rara", cruzada', 'M',
+              alta=Alta('A', '05/05/2021', 'ES100083', 'G123456')),
+        Oveja(3, 'ES100080000003', 2019, '03/05/2019', 'Churra\nlínea dos', 'H',
+              baja=Baja('M', '10/10/2023', 'Matadero', 'G654321')),
+    ])
+
+
+def _leer(ruta):
+    with open(ruta, 'rb') as archivo:
+        return archivo.read()
+
+
+def test_escribir_csv_igual_que_to_csv_de_pandas(tmp_path):
+    explotacion = _explotacion()
+    ruta = tmp_path / 'registro.csv'
+    referencia = tmp_path / 'pandas.csv'
+    
+    escribir_csv(explotacion.ovejas, str(ruta), tamano_lote=2)
+    pd.DataFrame([o.to_dict() for o in explotacion.ovejas]).to_csv(referencia, index=False)
+    
+    assert _leer(ruta) == _leer(referencia)
+
+
+def test_ida_y_vuelta_con_comillas_y_saltos_de_linea(tmp_path):
+    explotacion = _explotacion()
+    ruta = str(tmp_path / 'registro.csv')
+    
+    explotacion.to_csv(ruta)
+    
+    assert Explotacion.from_csv(ruta, codigo='ES000000000001').ovejas == explotacion.ovejas
+
+
+def test_agregar_ovejas_solo_anade_filas(tmp_path):
+    explotacion = _explotacion()
+    explotacion.seguir_cambios()
+    ruta = str(tmp_path / 'registro.csv')
+    explotacion.to_csv(ruta)
+    antes = _leer(ruta)
+    
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.to_csv(ruta)
+    
+    completo = str(tmp_path / 'completo.csv')
+    escribir_csv(explotacion.ovejas, completo)
+    assert _leer(ruta).startswith(antes)
+    assert _leer(ruta) == _leer(completo)
+
+
+def test_primer_guardado_tras_abrir_anade_filas(tmp_path):
+    ruta = str(tmp_path / 'registro.csv')
+    escribir_csv(_explotacion().ovejas, ruta)
+    antes = _leer(ruta)
+    
+    firma = firma_para_agregar(ruta)
+    explotacion = Explotacion.from_csv(ruta, codigo='ES000000000001')
+    explotacion.seguir_cambios().marcar_guardado(ruta, firma)
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.to_csv(ruta)
+    
+    completo = str(tmp_path / 'completo.csv')
+    escribir_csv(explotacion.ovejas, completo)
+    assert _leer(ruta).startswith(antes)
+    assert _leer(ruta) == _leer(completo)
+
+
+@pytest.mark.parametrize('contenido', [
+    # Otro separador, otra codificación, otro orden de columnas y sin fin de línea al final
+    lambda cabecera, fila: (';'.join(cabecera) + os.linesep + ';'.join(fila) + os.linesep).encode('utf-8'),
+    lambda cabecera, fila: (','.join(cabecera) + os.linesep + ','.join(fila) + os.linesep).encode('cp1252'),
+    lambda cabecera, fila: (','.join(cabecera[::-1]) + os.linesep + ','.join(fila[::-1]) + os.linesep).encode('utf-8'),
+    lambda cabecera, fila: (','.join(cabecera) + os.linesep + ','.join(fila)).encode('utf-8'),
+], ids=['punto_y_coma', 'cp1252', 'otro_orden', 'sin_fin_de_linea'])
+def test_abrir_csv_con_otro_formato_reescribe(tmp_path, contenido):
+    from models import COLUMNAS
+    ruta = str(tmp_path / 'registro.csv')
+    with open(ruta, 'wb') as archivo:
+        archivo.write(contenido(COLUMNAS, ['1', 'ES100080000001'] + [''] * 12))
+    
+    assert firma_para_agregar(ruta) is None
+    explotacion = Explotacion.from_csv(ruta, codigo='ES000000000001')
+    explotacion.seguir_cambios().marcar_guardado(ruta, firma_para_agregar(ruta))
+    explotacion.agregar_oveja(Oveja(2, 'ES100080000002', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.to_csv(ruta)
+    
+    completo = str(tmp_path / 'completo.csv')
+    escribir_csv(explotacion.ovejas, completo)
+    assert _leer(ruta) == _leer(completo)
+
+
+def test_archivo_cambiado_por_fuera_reescribe(tmp_path):
+    explotacion = _explotacion()
+    explotacion.seguir_cambios()
+    ruta = str(tmp_path / 'registro.csv')
+    explotacion.to_csv(ruta)
+    with open(ruta, 'a', newline='', encoding='utf-8') as archivo:
+        csv.writer(archivo).writerow(['99', 'ES100080000099'] + [''] * 12)
+    
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.to_csv(ruta)
+    
+    assert Explotacion.from_csv(ruta, codigo='ES000000000001').ovejas == explotacion.ovejas
+
+
+def test_guardado_fallido_conserva_los_cambios(tmp_path, monkeypatch):
+    explotacion = _explotacion()
+    cambios = explotacion.seguir_cambios()
+    ruta = str(tmp_path / 'registro.csv')
+    explotacion.to_csv(ruta)
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    
+    def progreso(hechas, total):
+        raise KeyboardInterrupt
+    
+    with pytest.raises(KeyboardInterrupt):
+        explotacion.to_csv(ruta, progreso=progreso)
+    
+    assert cambios.hay_cambios
+    assert not [nombre for nombre in os.listdir(tmp_path) if nombre.endswith('.tmp')]
+    explotacion.to_csv(ruta)
+    assert Explotacion.from_csv(ruta, codigo='ES000000000001').ovejas == explotacion.ovejas
+
+
+def test_guardar_csv_retorna_la_firma(tmp_path):
+    explotacion = _explotacion()
+    cambios = explotacion.seguir_cambios()
+    ruta = str(tmp_path / 'registro.csv')
+    
+    firma = guardar_csv(explotacion.ovejas, ruta, cambios.extraer())
+    
+    assert firma == (os.path.getsize(ruta), os.stat(ruta).st_mtime_ns)
+    assert firma == firma_para_agregar(ruta)
+
+
+def test_cancelar_tras_anadir_no_hace_fallar_el_guardado(tmp_path):
+    explotacion = _explotacion()
+    cambios = explotacion.seguir_cambios()
+    ruta = str(tmp_path / 'registro.csv')
+    explotacion.to_csv(ruta)
+    explotacion.agregar_oveja(Oveja(4, 'ES100080000004', 2024, '01/01/2024', 'Assaf', 'H'))
+    llamadas = []
+    
+    def progreso(hechas, total):
+        # Una cancelación que llegue después de añadir ya no se comprobaría
+        llamadas.append(os.path.getsize(ruta))
+    
+    tamano = os.path.getsize(ruta)
+    guardar_csv(explotacion.ovejas, ruta, cambios.extraer(), progreso=progreso)
+    
+    assert llamadas == [tamano]
+    assert os.path.getsize(ruta) > tamano
+
+
+@pytest.mark.parametrize('texto', [
+    'con "comillas"', '"', 'a,b', 'línea\nsiguiente', 'retorno\r\nde carro', ' espacios ', '007', 'ñandú', '',
+])
+def test_textos_raros_igual_que_to_csv_y_de_vuelta(tmp_path, texto):
+    explotacion = Explotacion(codigo='ES1', ovejas=[
+        Oveja(1, texto, 2020, texto, texto, 'H', alta=Alta(texto, '01/01/2021', texto, texto)),
+        Oveja(2, 'ES100080000002', 2021, '', 'Merina', 'M', baja=Baja('M', texto, texto, texto)),
+    ])
+    ruta = tmp_path / 'registro.csv'
+    referencia = tmp_path / 'pandas.csv'
+    
+    escribir_csv(explotacion.ovejas, str(ruta))
+    pd.DataFrame([o.to_dict() for o in explotacion.ovejas]).to_csv(referencia, index=False)
+    
+    assert _leer(ruta) == _leer(referencia)
+    assert Explotacion.from_csv(str(ruta), codigo='ES1').ovejas == explotacion.ovejas
+
+
+def _leer_xlsx(ruta, **kwargs):
+    return [oveja for lote in leer_xlsx_por_lotes(ruta, **kwargs) for oveja in lote]
+
+
+def _libro(ruta, hojas):
+    """Libro con las hojas indicadas (nombre -> filas), en ese orden"""
+    from openpyxl import Workbook
+    
+    libro = Workbook()
+    libro.remove(libro.active)
+    for nombre, filas in hojas.items():
+        hoja = libro.create_sheet(nombre)
+        for fila in filas:
+            hoja.append(fila)
+    libro.save(ruta)
+    return ruta
+
+
+def test_xlsx_ida_y_vuelta(tmp_path):
+    explotacion = _explotacion()
+    ruta = str(tmp_path / 'registro.xlsx')
+    
+    escribir_xlsx(explotacion.ovejas, ruta, tamano_lote=2)
+    
+    assert _leer_xlsx(ruta, tamano_lote=2) == explotacion.ovejas
+
+
+def test_xlsx_celdas_vacias_fechas_y_enteros_como_texto(tmp_path):
+    ruta = _libro(str(tmp_path / 'registro.xlsx'), {HOJA_XLSX: [
+        COLUMNAS,
+        [5.0, 'ES100080000005', 2020.0, datetime(2020, 3, 1), 'Merina', 'H',
+         'Compra', date(2021, 5, 5), 12345.0, None, None, None, None, None],
+        [None, None, None, None, None, 'M', None, None, None, None, 'Muerte', '10/10/2023', None, 7.5],
+    ]})
+    
+    primera, segunda = _leer_xlsx(ruta)
+    
+    assert primera == Oveja(5, 'ES100080000005', 2020, '01/03/2020', 'Merina', 'H',
+                            alta=Alta('Compra', '05/05/2021', '12345', ''))
+    assert segunda == Oveja(0, '', 0, '', '', 'M', baja=Baja('Muerte', '10/10/2023', '', '7.5'))
+
+
+@pytest.mark.parametrize('hojas', [
+    # Renombrada: se lee la única hoja
+    lambda filas: {'Hoja1': filas},
+    # Con otra hoja delante: se lee la del registro
+    lambda filas: {'Notas': [['nada que ver']], HOJA_XLSX: filas},
+], ids=['renombrada', 'otra_hoja_delante'])
+def test_xlsx_sin_la_hoja_del_registro_o_con_otras(tmp_path, hojas):
+    explotacion = _explotacion()
+    filas = [COLUMNAS] + [list(oveja.to_dict().values()) for oveja in explotacion.ovejas]
+    ruta = _libro(str(tmp_path / 'registro.xlsx'), hojas(filas))
+    
+    assert _leer_xlsx(ruta) == explotacion.ovejas
@@ -0,0 +1,74 @@
+"""Pruebas del índice de búsqueda por subcadena"""
+
+import indice_busqueda
+from indice_busqueda import IndiceBusqueda
+from models import Alta, Explotacion, Oveja
+
+
+def _oveja(orden, raza='Merina'):
+    return Oveja(orden, f"ES{100080000000 + orden:012d}", 2020, '01/03/2020', raza, 'H',
+                 alta=Alta('A', '05/05/2021', 'ES100083', f"G{orden}"))
+
+
+def _buscar_recorriendo(explotacion, texto):
+    """Lo que debe dar el índice: los campos de la tabla como texto, por subcadena"""
+    consulta = texto.lower()
+    return [o for o in explotacion.ovejas
+            if any(consulta in str(valor).lower() for valor in o.to_dict().values())]
+
+
+def test_numero_de_orden_por_subcadena():
+    explotacion = Explotacion(codigo='ES1', ovejas=[_oveja(i) for i in (7, 17, 70, 123)])
+    indice = IndiceBusqueda(explotacion)
+    
+    assert [o.numero_orden for o in indice.buscar('7')] == [7, 17, 70]
+    assert [o.numero_orden for o in indice.buscar('12')] == [123]
+
+
+def test_sigue_los_cambios_de_la_explotacion():
+    explotacion = Explotacion(codigo='ES1', ovejas=[_oveja(i) for i in range(1, 30)])
+    indice = IndiceBusqueda(explotacion)
+    
+    explotacion.agregar_oveja(_oveja(30, raza='Assaf'))
+    explotacion.modificar_oveja(explotacion.ovejas[0], raza='Churra')
+    explotacion.eliminar_ovejas([2, 3])
+    
+    for consulta in ('assaf', 'churra', 'merina', 'ES10008000000', '3', 'g2', 'h'):
+        assert indice.buscar(consulta) == _buscar_recorriendo(explotacion, consulta), consulta
+
+
+def test_valores_sin_ovejas_se_podan(monkeypatch):
+    monkeypatch.setattr(indice_busqueda, 'MIN_VALORES_COMPACTAR', 0)
+    explotacion = Explotacion(codigo='ES1', ovejas=[_oveja(i) for i in range(1, 101)])
+    indice = IndiceBusqueda(explotacion)
+    trigramas = len(indice._trigramas)
+    
+    explotacion.eliminar_ovejas(range(1, 91))
+    
+    # Tras compactar quedan como mucho tantos valores sin ovejas como en uso
+    sin_ovejas = indice._valores.count(None)
+    assert sin_ovejas <= len(indice._valores) - sin_ovejas
+    assert len(indice._trigramas) < trigramas
+    assert all(len(lista) for lista in indice._trigramas.values())
+    assert 'es100080000001' not in indice._vocabulario[1]
+    for consulta in ('es1000800000', '9', 'g5', 'merina'):
+        assert indice.buscar(consulta) == _buscar_recorriendo(explotacion, consulta), consulta
+    
+    explotacion.agregar_oveja(_oveja(1))
+    assert indice.buscar('es100080000001') == [explotacion.ovejas[-1]]
+
+
+def test_construir_sin_seguir_con_progreso(monkeypatch):
+    monkeypatch.setattr(indice_busqueda, 'TAMANO_BLOQUE_INDICE', 4)
+    explotacion = Explotacion(codigo='ES1', ovejas=[_oveja(i) for i in range(1, 11)])
+    avisos = []
+    
+    indice = IndiceBusqueda(explotacion, seguir=False, progreso=lambda hechas, total: avisos.append((hechas, total)))
+    explotacion.agregar_oveja(_oveja(11))
+    
+    assert avisos == [(4, 10), (8, 10), (10, 10)]
+    assert [o.numero_orden for o in indice.buscar('G11')] == []
+    
+    indice.seguir()
+    explotacion.agregar_oveja(_oveja(12))
+    assert [o.numero_orden for o in indice.buscar('G12')] == [12]
@@ -0,0 +1,110 @@
+"""Pruebas de las instantáneas binarias del registro"""
+
+import os
+
+from deteccion_csv import FilasDesalineadas
+from explotacion_mapeada import ExplotacionDiferida
+from models import Explotacion, Oveja, Alta, Baja
+from instantanea import (Instantanea, abrir_instantanea, borrar_instantanea, cargar_explotacion,
+                         crear_instantanea, ruta_instantanea)
+
+
+def _guardar(tmp_path):
+    explotacion = Explotacion(codigo='ES1', nombre='Prueba', ovejas=[
+        Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H'),
+        Oveja(2, 'ES100080000002', 2021, '02/04/2021', 'Raza "ñ", cruzada', 'M',
+              alta=Alta('A', '05/05/2021', 'ES100083', 'G123456'),
+              baja=Baja('M', '10/10/2023', 'Matadero', 'G654321')),
+    ])
+    explotacion.seguir_cambios()
+    ruta = str(tmp_path / 'registro.csv')
+    explotacion.to_csv(ruta)
+    return explotacion, ruta
+
+
+def test_cargar_desde_instantanea(tmp_path):
+    explotacion, ruta = _guardar(tmp_path)
+    crear_instantanea(ruta)
+    
+    assert abrir_instantanea(ruta) is not None
+    assert list(cargar_explotacion(ruta, codigo='ES1').ovejas) == explotacion.ovejas
+
+
+def test_instantanea_caduca_al_anadir_filas(tmp_path):
+    explotacion, ruta = _guardar(tmp_path)
+    crear_instantanea(ruta)
+    
+    explotacion.agregar_oveja(Oveja(3, 'ES100080000003', 2024, '01/01/2024', 'Assaf', 'H'))
+    explotacion.to_csv(ruta)
+    
+    assert abrir_instantanea(ruta) is None
+    assert cargar_explotacion(ruta, codigo='ES1').ovejas == explotacion.ovejas
+
+
+def test_borrar_instantanea(tmp_path):
+    _, ruta = _guardar(tmp_path)
+    crear_instantanea(ruta)
+    
+    borrar_instantanea(ruta)
+    borrar_instantanea(ruta)
+    
+    assert not os.path.exists(ruta_instantanea(ruta))
+
+
+def test_cargar_no_construye_ovejas_hasta_el_primer_cambio(tmp_path, monkeypatch):
+    explotacion, ruta = _guardar(tmp_path)
+    crear_instantanea(ruta)
+    construidas = []
+    ovejas = Instantanea.ovejas
+    monkeypatch.setattr(Instantanea, 'ovejas', lambda self, *args, **kwargs: construidas.append(args) or
+                        ovejas(self, *args, **kwargs))
+    
+    cargada = cargar_explotacion(ruta, codigo='ES1')
+    
+    assert isinstance(cargada, ExplotacionDiferida) and not cargada.materializada
+    assert cargada.total_ovejas() == 2 and construidas == []
+    assert cargada.ovejas[1] == explotacion.ovejas[1]
+    
+    cargada.seguir_cambios()
+    cargada.eliminar_oveja(1)
+    
+    assert cargada.materializada
+    assert cargada.ovejas == explotacion.ovejas[1:]
+    assert cargada.obtener_oveja(2) is cargada.ovejas[0]
+    assert list(cargada.cambios.eliminadas.values()) == [explotacion.ovejas[0]]
+
+
+def test_filas_desalineadas_se_repiten_al_abrir_la_instantanea(tmp_path):
+    ruta = tmp_path / 'registro.csv'
+    ruta.write_text('Nº Orden,Identificación,Raza\n1,ES1,Merina\n2,ES2,Churra,sobra\n', encoding='utf-8')
+    desde_csv = FilasDesalineadas()
+    Explotacion.from_csv(str(ruta), codigo='ES1', desalineadas=desde_csv)
+    crear_instantanea(str(ruta))
+    
+    desde_instantanea = FilasDesalineadas()
+    cargada = cargar_explotacion(str(ruta), codigo='ES1', desalineadas=desde_instantanea)
+    
+    assert isinstance(cargada, ExplotacionDiferida)
+    assert desde_csv and desde_instantanea.resumen() == desde_csv.resumen()
+
+
+def test_columnas_con_el_tipo_mas_pequeno(tmp_path):
+    _, ruta = _guardar(tmp_path)
+    crear_instantanea(ruta)
+    
+    arreglos = abrir_instantanea(ruta).arreglos
+    
+    assert arreglos['numero_orden'][0].dtype.str == '<i4'
+    assert arreglos['raza'][0].dtype.str == '|u1'
+
+
+def test_enteros_que_no_caben_en_32_bits(tmp_path):
+    explotacion = Explotacion(codigo='ES1', ovejas=[Oveja(2**40, 'ES1', 2020, '', 'Merina', 'H')])
+    ruta = str(tmp_path / 'registro.csv')
+    explotacion.to_csv(ruta)
+    crear_instantanea(ruta)
+    
+    instantanea = abrir_instantanea(ruta)
+    
+    assert instantanea.arreglos['numero_orden'][0].dtype.str == '<i8'
+    assert instantanea.ovejas() == explotacion.ovejas
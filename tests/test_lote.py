@@ -0,0 +1,60 @@
+"""Pruebas del modo por lotes"""
+
+import sys
+
+import pytest
+
+import lote
+from models import Explotacion, Oveja
+from pdf_export import exportar_explotaciones_a_pdf
+
+
+def _csv(ruta):
+    Explotacion(codigo='ES1', ovejas=[Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H')]).to_csv(str(ruta))
+    return ruta
+
+
+def test_pdf_combinado_sin_pypdf_falla_antes_de_exportar(tmp_path, monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, 'pypdf', None)
+    entrada = _csv(tmp_path / 'ES1.csv')
+    salida = tmp_path / 'salida'
+    
+    codigo = lote.main([str(entrada), '-o', str(salida), '--pdf-combinado', str(tmp_path / 'todo.pdf')])
+    
+    assert codigo == 2
+    assert 'pypdf' in capsys.readouterr().err
+    assert not salida.exists()
+
+
+def test_exportar_combinado_sin_pypdf_falla_antes_de_exportar(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pypdf', None)
+    carpeta = tmp_path / 'pdf'
+    explotacion = Explotacion(codigo='ES1', ovejas=[Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H')])
+    
+    with pytest.raises(ImportError, match='pypdf'):
+        exportar_explotaciones_a_pdf([explotacion], str(carpeta), ruta_combinado=str(tmp_path / 'todo.pdf'))
+    
+    assert not carpeta.exists()
+
+
+def test_nombres_salida_distingue_csv_con_el_mismo_nombre(tmp_path):
+    archivos = [str(tmp_path / 'granja_a' / 'ES1.csv'), str(tmp_path / 'granja_b' / 'es1.csv'),
+                str(tmp_path / 'granja_a' / 'ES2.csv'), str(tmp_path / 'granja_a_ES1.csv')]
+    
+    nombres = lote.nombres_salida(archivos)
+    
+    assert nombres[:3] == ['granja_a_ES1', 'granja_b_es1', 'ES2']
+    assert len({nombre.casefold() for nombre in nombres}) == len(nombres)
+
+
+def test_lote_no_pisa_salidas_de_csv_homonimos(tmp_path):
+    for carpeta in ('granja_a', 'granja_b'):
+        (tmp_path / carpeta).mkdir()
+        _csv(tmp_path / carpeta / 'ES1.csv')
+    salida = tmp_path / 'salida'
+    
+    codigo = lote.main([str(tmp_path / 'granja_a'), str(tmp_path / 'granja_b'), '-o', str(salida), '-w', '1'])
+    
+    assert codigo == 0
+    assert sorted(p.name for p in salida.iterdir()) == [
+        'granja_a_ES1.pdf', 'granja_a_ES1_resumen.txt', 'granja_b_ES1.pdf', 'granja_b_ES1_resumen.txt']
@@ -0,0 +1,137 @@
+"""Pruebas de la conversión de datos a ovejas y de los índices de Explotacion"""
+
+import copy
+import pickle
+
+import pandas as pd
+import pytest
+
+import models
+from models import (CAMPO_DE_COLUMNA, CAMPOS_OVEJA, COLUMNAS, COLUMNAS_CATEGORICAS, Alta, Baja, Explotacion,
+                    Oveja, _columnas_de_ovejas, _entero_celda, leer_csv_por_lotes)
+from utils import ContadoresExplotacion, EstadisticasExplotacion
+
+ENTEROS = ['12', '１２', '1_000', ' 7 ', 2.5, True, 'abc', None, float('nan'), '-3', '', 5]
+
+
+def _dataframe(ordenes):
+    filas = [dict.fromkeys(COLUMNAS, '') for _ in ordenes]
+    for fila, orden in zip(filas, ordenes):
+        fila.update({'Nº Orden': orden, 'Identificación': 'ES1', 'Año Nacimiento': '2020',
+                     'Raza': 'Merina', 'Sexo': 'H', 'Causa Alta': 'A', 'Fecha Alta': '01/01/2020'})
+    return pd.DataFrame(filas, columns=COLUMNAS)
+
+
+def test_campo_de_cada_columna():
+    oveja = Oveja(7, 'ES1', 2020, '01/03/2020', 'Merina', 'H', alta=Alta('A', '05/05/2021', 'ES2', 'G1'),
+                  baja=Baja('M', '10/10/2023', 'Matadero', 'G2'))
+    valores = {campo: columna[0] for campo, columna in zip(CAMPOS_OVEJA, _columnas_de_ovejas([oveja]))}
+    
+    assert list(CAMPO_DE_COLUMNA) == COLUMNAS
+    assert {columna: valores[campo] for columna, campo in CAMPO_DE_COLUMNA.items()} == oveja.to_dict()
+    assert COLUMNAS_CATEGORICAS == {'Fecha Identificación', 'Raza', 'Sexo', 'Causa Alta', 'Fecha Alta',
+                                    'Procedencia', 'Causa Baja', 'Fecha Baja', 'Destino'}
+
+
+@pytest.mark.parametrize('ordenes', [
+    ENTEROS,
+    ['1', '2', '3'],
+    [1.0, 2.0, float('nan')],
+    [True, False, True],
+])
+def test_from_dataframe_equivale_a_from_dict(ordenes):
+    df = _dataframe(ordenes)
+    
+    ovejas = Explotacion.from_dataframe(df, codigo='ES1').ovejas
+    
+    assert ovejas == [Oveja.from_dict(fila) for fila in df.to_dict('records')]
+
+
+@pytest.mark.parametrize('valor', [valor for valor in ENTEROS if valor is not None])
+def test_entero_celda_como_int(valor):
+    try:
+        esperado = int(valor)
+    except (ValueError, TypeError):
+        esperado = 0
+    assert _entero_celda(valor) == esperado
+
+
+@pytest.mark.parametrize('procedencia, esperada', [(b'Pe\xf1a', 'Peña'), (b'Pe\x81a', 'Pe\x81a')])
+def test_codificacion_que_falla_tras_la_muestra_se_reintenta(tmp_path, procedencia, esperada):
+    # UTF-8 válido en los primeros KB y un byte cp1252 (o sin definir en cp1252)
+    # pasado el búfer de lectura de pandas
+    ruta = tmp_path / 'registro.csv'
+    filas = [f'{n},ES{n:012d},2020,01/03/2020,Merina,H,,,,,,,,'.encode() for n in range(1, 20001)]
+    filas.append(b'20001,ES1,2020,01/03/2020,Merina,H,Compra,01/01/2021,' + procedencia + b',G1,,,,')
+    ruta.write_bytes(','.join(COLUMNAS).encode() + b'\n' + b'\n'.join(filas) + b'\n')
+    
+    lotes = list(leer_csv_por_lotes(str(ruta), tamano_lote=1000))
+    ovejas = [oveja for lote in lotes for oveja in lote]
+    
+    assert len(lotes) > 1
+    assert [oveja.numero_orden for oveja in ovejas] == list(range(1, 20002))
+    assert ovejas[-1].alta.procedencia == esperada
+
+
+def test_eliminar_ovejas_deja_indices_y_contadores_como_recalculados():
+    # Números de orden e identificaciones repetidos, con y sin alta o baja
+    ovejas = [
+        Oveja(i % 40, f"ES{i % 55:012d}", 2015 + i % 8, '01/03/2020', ('Merina', 'Churra', '')[i % 3],
+              ('H', 'M')[i % 2],
+              alta=Alta(('Compra', 'Nacimiento')[i % 2], '05/05/2021', f"ES{i % 7}", 'G1') if i % 3 else None,
+              baja=Baja(('Muerte', 'Venta')[i % 2], '10/10/2023', ('Matadero', '')[i % 2], 'G2') if i % 4 == 0 else None)
+        for i in range(120)
+    ]
+    explotacion = Explotacion(codigo='ES1', ovejas=list(ovejas))
+    EstadisticasExplotacion.activar_contadores(explotacion)
+    
+    # Repetidos en la petición y uno que no existe
+    explotacion.eliminar_ovejas([3, 3, 17, 0, 39, 1000])
+    
+    quedan = [o for o in ovejas if o.numero_orden not in (3, 17, 0, 39)]
+    assert explotacion.ovejas == quedan
+    for orden in range(41):
+        esperada = next((o for o in quedan if o.numero_orden == orden), None)
+        assert explotacion.obtener_oveja(orden) is esperada
+    for identificacion in {o.identificacion for o in ovejas}:
+        esperada = next((o for o in quedan if o.identificacion == identificacion), None)
+        assert explotacion.obtener_oveja_por_identificacion(identificacion) is esperada
+    assert not explotacion.contadores.diferencias(ContadoresExplotacion.calcular(quedan))
+
+
+def _explotacion_con_observadores():
+    explotacion = Explotacion(codigo='ES1', nombre='Prueba', ovejas=[
+        Oveja(1, 'ES100080000001', 2020, '01/03/2020', 'Merina', 'H', alta=Alta('A', '05/05/2021', 'ES2', 'G1')),
+        Oveja(2, 'ES100080000002', 2021, '02/04/2021', 'Churra', 'M', baja=Baja('M', '10/10/2023', 'Matadero', 'G2')),
+    ])
+    EstadisticasExplotacion.activar_contadores(explotacion)
+    explotacion.seguir_cambios()
+    return explotacion
+
+
+def test_pickle_ida_y_vuelta():
+    explotacion = _explotacion_con_observadores()
+    
+    copia = pickle.loads(pickle.dumps(explotacion))
+    
+    assert type(copia) is Explotacion
+    assert copia == explotacion and copia.nombre == 'Prueba'
+    assert copia.obtener_oveja(2) == explotacion.obtener_oveja(2)
+    assert copia.obtener_oveja_por_identificacion('ES100080000001').alta == Alta('A', '05/05/2021', 'ES2', 'G1')
+    # Los observadores no viajan
+    assert copia.contadores is None and copia.cambios is None and not copia._observadores
+
+
+def test_copy_y_deepcopy_no_pasan_por_pickle(monkeypatch):
+    explotacion = _explotacion_con_observadores()
+    monkeypatch.setattr(models, '_columnas_de_ovejas', None)
+    
+    superficial = copy.copy(explotacion)
+    profunda = copy.deepcopy(explotacion)
+    
+    assert superficial.ovejas is explotacion.ovejas
+    assert superficial.contadores is explotacion.contadores
+    assert profunda == explotacion
+    assert profunda.ovejas[0] is not explotacion.ovejas[0]
+    assert profunda.obtener_oveja(1) is profunda.ovejas[0]
+    assert profunda.contadores is not explotacion.contadores
@@ -0,0 +1,74 @@
+"""Pruebas de la exportación a PDF con los dos motores"""
+
+import io
+
+import pytest
+from reportlab.pdfgen import canvas
+
+import pdf_export
+from models import Alta, Baja, Explotacion, Oveja
+from pdf_export import COLUMNAS_PDF, MODOS_EXPORTACION, exportar_explotacion_a_pdf, fila_pdf
+
+FILAS = 60
+
+
+def _explotacion():
+    ovejas = [
+        Oveja(i, f"ES{100080000000 + i:012d}", 2020, '01/03/2020', 'Merina', 'H',
+              alta=Alta('A', '05/05/2021', 'ES100083', 'G123456') if i % 2 else None,
+              baja=Baja('M', '10/10/2023', 'Matadero con un nombre muy largo', 'G654321') if i % 3 == 0 else None)
+        for i in range(1, FILAS + 1)
+    ]
+    return Explotacion(codigo='ES1', nombre='Señorío', ovejas=ovejas)
+
+
+@pytest.mark.parametrize('modo', MODOS_EXPORTACION)
+def test_exportar(tmp_path, modo):
+    ruta = tmp_path / f'{modo}.pdf'
+    avances = []
+    
+    exitoso, mensaje = exportar_explotacion_a_pdf(_explotacion(), str(ruta), modo=modo,
+                                                  progreso=lambda hechas, total: avances.append(hechas))
+    
+    assert exitoso, mensaje
+    assert ruta.read_bytes().startswith(b'%PDF')
+    assert avances[-1] == FILAS
+
+
+def test_mismas_paginas_en_los_dos_modos(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    paginas = {}
+    for modo in MODOS_EXPORTACION:
+        ruta = str(tmp_path / f'{modo}.pdf')
+        exportar_explotacion_a_pdf(_explotacion(), ruta, modo=modo)
+        paginas[modo] = len(pypdf.PdfReader(ruta).pages)
+    
+    assert len(set(paginas.values())) == 1
+    assert paginas['tabla'] > 1
+
+
+def test_fila_pdf_deja_genotipiado_en_blanco():
+    oveja = _explotacion().ovejas[0]
+    
+    fila = fila_pdf(oveja)
+    
+    assert len(fila) == len(COLUMNAS_PDF)
+    columnas = [nombre for nombre, _ in COLUMNAS_PDF]
+    assert fila[columnas.index('Genotipiado')] == ''
+    assert fila[columnas.index('Sexo')] == oveja.sexo
+
+
+def test_valor_largo_se_mide_una_sola_vez(monkeypatch):
+    hoja = pdf_export._HojaCanvas(canvas.Canvas(io.BytesIO()), 0, [ancho for _, ancho in COLUMNAS_PDF])
+    largo = 'Matadero con un nombre muchísimo más largo que su columna'
+    filas = [[largo] + [''] * (len(COLUMNAS_PDF) - 1)] * 3
+    recortes = []
+    monkeypatch.setattr(hoja, '_celda', lambda valor, columna: recortes.append(valor)
+                        or pdf_export._HojaCanvas._celda(hoja, valor, columna))
+    
+    hoja.dibujar_tabla(500, filas)
+    hoja.dibujar_tabla(500, filas)
+    
+    assert recortes == [largo]
+    _, recortado = hoja._celdas[largo, 0]
+    assert largo.startswith(recortado) and recortado != largo
@@ -0,0 +1,75 @@
+"""Pruebas de ValidadorDatos: la validación por columnas da lo mismo que validar_oveja"""
+
+import random
+from datetime import datetime
+
+import pytest
+
+import utils
+from explotacion_mapeada import ExplotacionMapeada
+from models import Alta, Baja, Explotacion, Oveja
+from utils import ValidadorDatos
+
+FECHAS = [
+    '', '01/03/2020', '1/3/2020', '10/10/2019', '31/02/2020', '29/02/2024', '29/02/2023', '01/13/2020',
+    '2020-03-01', '01/03/20', ' 01/03/2020', '01/03/2020 ', '01/01/2300', '01/01/1500', 'abc',
+]
+
+
+def _oveja_a_oveja(ovejas):
+    errores = {}
+    for oveja in ovejas:
+        es_valida, lista_errores = ValidadorDatos.validar_oveja(oveja)
+        if not es_valida:
+            errores[oveja.numero_orden] = lista_errores
+    return (len(errores) == 0, errores)
+
+
+def _explotacion(filas=3000, semilla=1):
+    """Combinaciones al azar de campos vacíos, sexos y años inválidos y fechas raras"""
+    rng = random.Random(semilla)
+    ano_actual = datetime.now().year
+    
+    def alta_o_baja(clase):
+        if rng.random() < 0.3:
+            return None
+        return clase(rng.choice(['', 'A']), rng.choice(FECHAS), rng.choice(['', 'ES1']), 'G1')
+    
+    return Explotacion(codigo='ES1', ovejas=[
+        Oveja(i, rng.choice(['', 'ES100080000001']), rng.choice([-1, 0, 2020, ano_actual, ano_actual + 1]),
+              rng.choice(FECHAS), rng.choice(['', 'Merina']), rng.choice(['', 'M', 'H', '-', 'X', 'm']),
+              alta=alta_o_baja(Alta), baja=alta_o_baja(Baja))
+        for i in range(1, filas + 1)
+    ])
+
+
+def test_por_columnas_igual_que_oveja_a_oveja(monkeypatch):
+    monkeypatch.setattr(utils, 'UMBRAL_VALIDACION_COLUMNAS', 0)
+    explotacion = _explotacion()
+    
+    resultado = ValidadorDatos.validar_explotacion(explotacion)
+    
+    assert resultado == _oveja_a_oveja(explotacion.ovejas)
+    # Cada caso aparece: fechas inválidas, baja antes del alta y campos vacíos
+    mensajes = {mensaje for lista in resultado[1].values() for mensaje in lista}
+    assert "Formato de fecha inválido (use DD/MM/YYYY)" in mensajes
+    assert "Fecha de baja no puede ser anterior a fecha de alta" in mensajes
+    assert "Identificación es requerida" in mensajes
+
+
+def test_instantanea_igual_que_oveja_a_oveja(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'TAMANO_BLOQUE_VALIDACION', 1000)
+    ruta = str(tmp_path / 'registro.csv')
+    _explotacion().to_csv(ruta)
+    
+    esperado = _oveja_a_oveja(Explotacion.from_csv(ruta, codigo='ES1').ovejas)
+    
+    assert ValidadorDatos.validar_explotacion(ExplotacionMapeada.abrir(ruta, codigo='ES1')) == esperado
+
+
+@pytest.mark.parametrize('filas', [0, 1, utils.UMBRAL_VALIDACION_COLUMNAS - 1])
+def test_pocas_ovejas_sin_pasar_por_columnas(filas, monkeypatch):
+    monkeypatch.setattr(ValidadorDatos, '_reglas', None)
+    explotacion = _explotacion(filas)
+    
+    assert ValidadorDatos.validar_explotacion(explotacion) == _oveja_a_oveja(explotacion.ovejas)